@@ -1,12 +1,30 @@
 from __future__ import print_function
 
+from collections import deque
 try:
     import Queue as queue
 except ImportError:
     import queue
-import time
 
 from qsforex import settings
+from qsforex.library.event_loop import EventLoop, EventLoopStatistics
+from qsforex.library.events import BarEvent, OrderEvent, SignalEvent, TickEvent
+
+
+class EventDeque(deque):
+    """
+    A plain (unsynchronised) deque with the put/get interface
+    of queue.Queue, used by the batched backtest engine where
+    there is no concurrency and so no need for locking.
+    """
+    put = deque.append
+    qsize = deque.__len__
+
+    def get(self, block=False):
+        try:
+            return self.popleft()
+        except IndexError:
+            raise queue.Empty
 
 
 class Backtest(object):
@@ -19,15 +37,51 @@ class Backtest(object):
         self, pairs, data_handler, strategy,
         strategy_params, portfolio, execution,
         equity=100000.0, heartbeat=0.0,
-        max_iters=10000000000
+        max_iters=10000000000, csv_dir=settings.CSV_DATA_DIR,
+        batch_size=None, output_dir=settings.OUTPUT_RESULTS_DIR,
+        equity_file=True, recorder=None, start=None, end=None,
+        until=None, data_params=None, profile=False, verbose=True
     ):
         """
         Initialises the backtest.
+
+        If batch_size is given, the batched engine is used (see
+        _run_batch_backtest) rather than the event queue. If
+        equity_file is False no per-tick backtest.csv is written and
+        the results come from the portfolio's EquityStatistics,
+        otherwise recorder is the portfolio's EquityRecorder (by
+        default one writing every tick to backtest.csv).
+
+        If start, end or until are given the historic data handler
+        only replays the ticks from start to the end of the day end
+        and before the time until. Any further
+        keyword arguments of the data handler's initialize, e.g.
+        the bar_spec of a HistoricBarPriceHandler, are given in
+        the data_params dictionary.
+
+        If profile is True the event handlers are timed (see
+        EventLoopStatistics) and the statistics are printed and
+        written to output_dir at the end of the backtest.
+
+        If verbose is False the backtest prints nothing, e.g. when
+        it is one of many run by a parameter sweep.
         """
         self.pairs = pairs
-        self.events = queue.Queue()
-        self.csv_dir = settings.CSV_DATA_DIR
-        self.ticker = data_handler(self.pairs, self.csv_dir)
+        self.batch_size = batch_size
+        if self.batch_size is None:
+            self.events = queue.Queue()
+        else:
+            self.events = EventDeque()
+        self.csv_dir = csv_dir
+        self.ticker = data_handler()
+        data_params = dict(data_params or {})
+        if start is not None:
+            data_params["start"] = start
+        if end is not None:
+            data_params["end"] = end
+        if until is not None:
+            data_params["until"] = until
+        self.ticker.initialize(self.pairs, self.csv_dir, **data_params)
         self.strategy_params = strategy_params
         self.strategy = strategy(
             self.pairs, self.events, **self.strategy_params
@@ -36,9 +90,44 @@ class Backtest(object):
         self.heartbeat = heartbeat
         self.max_iters = max_iters
         self.portfolio = portfolio(
-            self.ticker, self.events, equity=self.equity, backtest=True
+            self.ticker, self.events, equity=self.equity, backtest=True,
+            output_dir=output_dir, equity_file=equity_file,
+            recorder=recorder
         )
         self.execution = execution()
+        self.output_dir = output_dir
+        self.stats = EventLoopStatistics() if profile else None
+        self.verbose = verbose
+        self.loop = self._create_event_loop()
+
+    def _create_event_loop(self):
+        """
+        Registers the strategy, portfolio and execution handlers
+        of each event type with the event loop.
+        """
+        loop = EventLoop(self.events, self.heartbeat, self.stats)
+        for event_class in (TickEvent, BarEvent):
+            loop.register(
+                event_class, self.strategy.calculate_signals,
+                "strategy.calculate_signals"
+            )
+            loop.register(
+                event_class, self.portfolio.update_portfolio,
+                "portfolio.update_portfolio"
+            )
+        loop.register(
+            SignalEvent, self.portfolio.execute_signal,
+            "portfolio.execute_signal"
+        )
+        loop.register(
+            OrderEvent, self.execution.execute_order,
+            "execution.execute_order"
+        )
+        return loop
+
+    def _log(self, message):
+        if self.verbose:
+            print(message)
 
     def _run_backtest(self):
         """
@@ -49,36 +138,104 @@ class Backtest(object):
         continue unti the maximum number of iterations is
         exceeded.
         """
-        print("Running Backtest...")
+        self._log("Running Backtest...")
+        self.loop.run(
+            idle=lambda: self.ticker.stream_next_tick(self.events),
+            max_iters=self.max_iters,
+            until=lambda: self.ticker.continue_backtest
+        )
+
+    def _run_batch_backtest(self):
+        """
+        Reads ticks ahead from the price handler in blocks of
+        batch_size and processes them without going through a
+        synchronised queue or sleeping between events.
+
+        Strategies which implement calculate_signals_batch(ticks)
+        receive the whole block at once and return a list of
+        (index, SignalEvent) tuples, other strategies are called
+        tick by tick as usual. In both cases the ordering of the
+        queue engine is preserved: the prices are updated to each
+        tick in turn, the portfolio is updated and then all of the
+        signals (and resulting orders) of that tick are handled
+        before moving on to the next tick.
+
+        Here max_iters limits the number of ticks processed.
+
+        Only the cost of the queue itself is saved: the prices,
+        positions and statistics are still updated tick by tick,
+        and that is most of the time of a backtest. On 60,000
+        EURUSD ticks with MovingAverageCrossStrategy the batched
+        engine is roughly 1.2-1.35x faster than the queue engine
+        (see scripts/benchmark_backtest.py).
+        """
+        self._log("Running Backtest...")
+        batch_strategy = hasattr(self.strategy, "calculate_signals_batch")
+        if batch_strategy:
+            calculate_signals_batch = self.loop.wrap(
+                self.strategy.calculate_signals_batch,
+                "strategy.calculate_signals_batch", "TICK"
+            )
+            update_portfolio = self.loop.wrap(
+                self.portfolio.update_portfolio,
+                "portfolio.update_portfolio", "TICK"
+            )
+        dispatch = self.loop.dispatch
         iters = 0
         while iters < self.max_iters and self.ticker.continue_backtest:
-            try:
-                event = self.events.get(False)
-            except queue.Empty:
-                self.ticker.stream_next_tick(self.events)
-            else:
-                if event is not None:
-                    if event.type == 'TICK':
-                        self.strategy.calculate_signals(event)
-                        self.portfolio.update_portfolio(event)
-                    elif event.type == 'SIGNAL':
-                        self.portfolio.execute_signal(event)
-                    elif event.type == 'ORDER':
-                        self.execution.execute_order(event)
-            time.sleep(self.heartbeat)
-            iters += 1
+            ticks = self.ticker.next_ticks(
+                min(self.batch_size, self.max_iters - iters)
+            )
+            if not ticks:
+                break
+            if batch_strategy:
+                signals = deque(calculate_signals_batch(ticks))
+            for i, tick in enumerate(ticks):
+                self.ticker.update_prices(tick)
+                if batch_strategy:
+                    while signals and signals[0][0] == i:
+                        self.events.append(signals.popleft()[1])
+                    update_portfolio(tick)
+                else:
+                    # The strategy, then the portfolio
+                    dispatch(tick)
+                if self.stats is not None and self.events:
+                    self.stats.sample_depth(iters + i, len(self.events))
+                # The signals and orders resulting from the tick
+                while self.events:
+                    event = self.events.popleft()
+                    dispatch(event)
+            iters += len(ticks)
 
     def _output_performance(self):
         """
         Outputs the strategy performance from the backtest.
         """
-        print("Calculating Performance Metrics...")
-        self.portfolio.output_results()
+        if hasattr(self.ticker, "prefetch_stats"):
+            self._log(
+                "Loaded %(days)d days of data, stalled %(stalls)d times "
+                "for %(stall_time)0.3fs waiting for data" % (
+                    self.ticker.prefetch_stats()
+                )
+            )
+        if self.stats is not None:
+            self._log(self.stats.to_dataframe().to_string(index=False))
+            self.stats.to_csv(self.output_dir)
+        self._log("Calculating Performance Metrics...")
+        return self.portfolio.output_results(verbose=self.verbose)
 
     def simulate_trading(self):
         """
         Simulates the backtest and outputs portfolio performance.
+        The price handler is closed however the backtest ends.
         """
-        self._run_backtest()
-        self._output_performance()
-        print("Backtest complete.")
+        try:
+            if self.batch_size is None:
+                self._run_backtest()
+            else:
+                self._run_batch_backtest()
+        finally:
+            self.ticker.close()
+        results = self._output_performance()
+        self._log("Backtest complete.")
+        return results
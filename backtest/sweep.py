@@ -0,0 +1,113 @@
+from __future__ import print_function
+
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+
+import pandas as pd
+
+from qsforex import settings
+from qsforex.backtest.backtest import Backtest
+from qsforex.execution.execution import SimulatedExecution
+from qsforex.library.price_handlers import HistoricTickStorePriceHandler
+from qsforex.library.tick_store import ingest_csv_dir
+from qsforex.portfolio.portfolio import Portfolio
+
+
+def parameter_grid(param_grid):
+    """
+    Expands a dictionary of parameter name -> list of values
+    into the list of all combinations, as keyword dictionaries.
+    The parameter names are iterated in sorted order.
+    """
+    names = sorted(param_grid)
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*[param_grid[n] for n in names])
+    ]
+
+
+def run_combination(task):
+    """
+    Runs a single backtest of a parameter sweep and returns a
+    dictionary of its parameters and performance statistics.
+
+    If the task has a "start", "end" (the last day, inclusive)
+    and/or "until" (an exclusive time) only the ticks of that
+    window are backtested, see Backtest.
+
+    This is executed in the worker processes. Only the small task
+    dictionary is pickled: the ticks are read from the (memory-
+    mapped) tick store, whose pages the operating system shares
+    between all of the workers, and no per-tick equity file is
+    written as the statistics are accumulated by the portfolio.
+    """
+    backtest = Backtest(
+        task["pairs"], HistoricTickStorePriceHandler,
+        task["strategy"], task["params"],
+        task["portfolio"], task["execution"],
+        equity=task["equity"], csv_dir=task["store_dir"],
+        batch_size=task["batch_size"], equity_file=False,
+        start=task.get("start"), end=task.get("end"),
+        until=task.get("until"), verbose=False
+    )
+    backtest.simulate_trading()
+
+    stats = backtest.portfolio.statistics
+    result = dict(task["params"])
+    result["final_equity"] = stats.last_total
+    result["total_return"] = stats.total_return
+    result["sharpe_ratio"] = stats.sharpe_ratio()
+    result["max_drawdown"] = stats.max_drawdown
+    result["drawdown_duration"] = stats.max_duration
+    return result
+
+
+def run_sweep(
+    pairs, strategy, param_grid,
+    store_dir=settings.TICK_STORE_DIR, csv_dir=None,
+    equity=settings.EQUITY, max_workers=None, batch_size=10000,
+    portfolio=Portfolio, execution=SimulatedExecution
+):
+    """
+    Runs a backtest for every combination of strategy parameters
+    across a pool of worker processes, e.g. to optimise the
+    short_window/long_window of the MovingAverageCrossStrategy:
+
+        run_sweep(
+            ["EURUSD"], MovingAverageCrossStrategy,
+            {"short_window": [250, 500], "long_window": [1000, 2000]}
+        )
+
+    Parameters:
+    pairs - The list of currency pairs to trade.
+    strategy - The strategy class.
+    param_grid - Dictionary of parameter name -> list of values.
+    store_dir - The tick store the workers read their ticks from.
+    csv_dir - If given, its CSV files are first ingested into the
+        tick store, so that they are only decoded once.
+    equity - The starting equity of every backtest.
+    max_workers - Number of worker processes (default: CPU count).
+    batch_size - Block size of the batched backtest engine.
+
+    Returns:
+    A pandas DataFrame with one row per combination, holding the
+    parameters, final_equity, total_return, sharpe_ratio,
+    max_drawdown and drawdown_duration.
+    """
+    if csv_dir is not None:
+        ingest_csv_dir(csv_dir, store_dir, pairs=pairs)
+    combinations = parameter_grid(param_grid)
+    tasks = [
+        {
+            "pairs": pairs, "strategy": strategy, "params": params,
+            "portfolio": portfolio, "execution": execution,
+            "equity": equity, "store_dir": store_dir,
+            "batch_size": batch_size
+        } for params in combinations
+    ]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(run_combination, tasks))
+    return pd.DataFrame(results, columns=sorted(param_grid) + [
+        "final_equity", "total_return", "sharpe_ratio",
+        "max_drawdown", "drawdown_duration"
+    ])
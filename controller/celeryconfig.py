@@ -1,4 +1,7 @@
 BROKER_URL = 'amqp://'
+# The backtest campaigns of qsforex.controller.tasks collect their
+# results with a chord, which needs a backend supporting chords
+# shared by the workers, e.g. 'redis://host:6379/0'
 CELERY_RESULT_BACKEND = 'amqp://'
 
 CELERY_TASK_SERIALIZER = 'json'
@@ -6,7 +9,10 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TIMEZONE = 'Europe/Rome'
 CELERY_ENABLE_UTC = True
-CELERY_IMPORTS = ("qsforex.library.price_handlers")
+CELERY_IMPORTS = (
+    "qsforex.library.price_handlers",
+    "qsforex.controller.tasks",
+)
 
 # This will be necessary when we start doing real stuff
 # CELERY_ANNOTATIONS = {
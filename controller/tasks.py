@@ -0,0 +1,140 @@
+from __future__ import absolute_import
+
+from decimal import Decimal
+import importlib
+
+from celery import chord
+
+from qsforex import settings
+from qsforex.backtest.sweep import parameter_grid, run_combination
+from qsforex.controller.celery import app, logger
+
+
+RESULT_COLUMNS = [
+    "final_equity", "total_return", "sharpe_ratio",
+    "max_drawdown", "drawdown_duration"
+]
+
+
+def class_path(cls):
+    """
+    Returns the import path of a class, e.g.
+    "qsforex.strategy.strategy.MovingAverageCrossStrategy".
+    """
+    return "%s.%s" % (cls.__module__, cls.__name__)
+
+
+def import_class(path):
+    module, name = path.rsplit(".", 1)
+    return getattr(importlib.import_module(module), name)
+
+
+def campaign_tasks(
+    pair_sets, strategy, param_grid, date_ranges=((None, None),),
+    store_dir=settings.TICK_STORE_DIR, equity=settings.EQUITY,
+    batch_size=10000,
+    portfolio="qsforex.portfolio.portfolio.Portfolio",
+    execution="qsforex.execution.execution.SimulatedExecution"
+):
+    """
+    Splits a backtest campaign into the descriptors of its tasks,
+    one per combination of pair set, (start, end) date range and
+    strategy parameters (see parameter_grid). end is the last day
+    of a range (inclusive), as for Backtest, and either may be
+    None for an open range.
+
+    A descriptor is a small JSON serialisable dictionary: the
+    classes are given by their import paths (or as classes, which
+    are converted) and the equity as a string. No tick data is
+    sent to the workers, they read it from the tick store at
+    store_dir, which must therefore be shared by (e.g. mounted
+    at the same path on) every worker node.
+    """
+    paths = [
+        c if isinstance(c, str) else class_path(c)
+        for c in (strategy, portfolio, execution)
+    ]
+    return [
+        {
+            "pairs": list(pairs), "start": start, "end": end,
+            "strategy": paths[0], "params": params,
+            "portfolio": paths[1], "execution": paths[2],
+            "equity": str(equity), "store_dir": store_dir,
+            "batch_size": batch_size
+        }
+        for pairs in pair_sets
+        for start, end in date_ranges
+        for params in parameter_grid(param_grid)
+    ]
+
+
+@app.task
+def run_backtest_task(descriptor):
+    """
+    Runs the backtest of a single campaign task descriptor on a
+    worker, returning the descriptor's pairs, date range and
+    parameters together with the performance statistics.
+    """
+    logger.info("Running backtest %s", descriptor)
+    task = dict(descriptor)
+    for name in ("strategy", "portfolio", "execution"):
+        task[name] = import_class(task[name])
+    task["equity"] = Decimal(task["equity"])
+    stats = run_combination(task)
+    result = {
+        "pairs": ",".join(descriptor["pairs"]),
+        "start": descriptor["start"], "end": descriptor["end"]
+    }
+    for name, value in stats.items():
+        # Decimal and NumPy values are not JSON serialisable
+        if not isinstance(value, (str, int)) and value is not None:
+            value = float(value)
+        result[name] = value
+    return result
+
+
+@app.task
+def aggregate_results(results):
+    """
+    The chord callback of a campaign, receiving the results of
+    all of its tasks. They are returned sorted by pairs, date
+    range and parameters, so that the order does not depend on
+    which worker finished first.
+    """
+    return sorted(results, key=lambda r: sorted(
+        (k, str(v)) for k, v in r.items() if k not in RESULT_COLUMNS
+    ))
+
+
+def run_campaign(descriptors):
+    """
+    Sends the campaign's tasks to the workers as a chord, a group
+    of run_backtest_task whose results are collected by
+    aggregate_results, returning its AsyncResult.
+
+        result = run_campaign(campaign_tasks(
+            [["EURUSD"], ["GBPUSD", "EURUSD"]],
+            MovingAverageCrossStrategy,
+            {"short_window": [250, 500], "long_window": [1000, 2000]},
+            [("2015-06-01", "2015-06-14"), ("2015-06-15", "2015-06-30")]
+        ))
+        frame = campaign_frame(result.get())
+    """
+    return chord(
+        run_backtest_task.s(d) for d in descriptors
+    )(aggregate_results.s())
+
+
+def campaign_frame(results):
+    """
+    Returns the aggregated results of a campaign as a pandas
+    DataFrame, one row per task.
+    """
+    import pandas as pd
+
+    columns = ["pairs", "start", "end"]
+    params = sorted(set(
+        k for r in results for k in r
+        if k not in columns and k not in RESULT_COLUMNS
+    ))
+    return pd.DataFrame(results, columns=columns + params + RESULT_COLUMNS)
@@ -0,0 +1,24 @@
+from __future__ import print_function
+
+from qsforex import settings
+from qsforex.backtest.sweep import run_sweep
+from qsforex.strategy.strategy import MovingAverageCrossStrategy
+
+
+if __name__ == "__main__":
+    # Trade on EURUSD
+    pairs = ["EURUSD"]
+
+    # The grid of MovingAverageCrossStrategy parameters to test
+    param_grid = {
+        "short_window": [250, 500, 1000],
+        "long_window": [2000, 4000]
+    }
+
+    # Ingest the CSV files into the tick store (only the first
+    # time) and run every combination in parallel
+    results = run_sweep(
+        pairs, MovingAverageCrossStrategy, param_grid,
+        csv_dir=settings.CSV_DATA_DIR, equity=settings.EQUITY
+    )
+    print(results.sort_values("final_equity", ascending=False))
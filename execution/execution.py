@@ -1,11 +1,22 @@
 from __future__ import print_function
 
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 try:
     import httplib
 except ImportError:
     import http.client as httplib
 import logging
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+import select
+import socket
+try:
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
 try:
     from urllib import urlencode
 except ImportError:
@@ -43,19 +54,153 @@ class SimulatedExecution(object):
         pass
 
 
+class ConnectionPool(object):
+    """
+    A pool of persistent (keep-alive) HTTP connections. Each
+    request takes an idle connection, or makes a new one with
+    connect(), and returns it to the pool once the response has
+    been read, so that connections are reused.
+
+    A server may drop an idle keep-alive connection at any time.
+    A reused connection which has been closed by the server is
+    replaced by a new one before the request is sent, and if
+    sending the request fails on a reused connection it is sent
+    again, once, on a new one. Once the request has been sent any
+    error is raised, as the server may have acted on it (and sent
+    an order) before the connection failed.
+    """
+
+    # Errors meaning that a reused connection had been dropped
+    STALE_ERRORS = (httplib.CannotSendRequest, socket.error)
+
+    def __init__(self, connect, size=4):
+        self.connect = connect
+        self.size = size
+        self.idle = queue.LifoQueue()
+        self.connections_made = 0
+
+    def _new(self):
+        self.connections_made += 1
+        return self.connect(), False
+
+    def _get(self):
+        while True:
+            try:
+                conn = self.idle.get(False)
+            except queue.Empty:
+                return self._new()
+            if not self._dropped(conn):
+                return conn, True
+            conn.close()
+
+    def _put(self, conn):
+        if self.idle.qsize() < self.size:
+            self.idle.put(conn)
+        else:
+            conn.close()
+
+    @staticmethod
+    def _dropped(conn):
+        """
+        Returns True if an idle connection has been closed by the
+        server, which makes its socket readable (at end of file).
+        """
+        if conn.sock is None:
+            return True
+        try:
+            readable = select.select([conn.sock], [], [], 0)[0]
+        except (ValueError, socket.error):
+            return True
+        return bool(readable)
+
+    def request(self, method, url, body=None, headers=None):
+        """
+        Makes a request, returning the response status and body.
+        """
+        conn, reused = self._get()
+        while True:
+            try:
+                conn.request(method, url, body, headers or {})
+            except socket.timeout:
+                conn.close()
+                raise
+            except self.STALE_ERRORS:
+                conn.close()
+                if not reused:
+                    raise
+                conn, reused = self._new()
+            except Exception:
+                conn.close()
+                raise
+            else:
+                break
+        try:
+            response = conn.getresponse()
+            data = response.read()
+        except Exception:
+            # The server may have received the order: never resend
+            conn.close()
+            raise
+        if response.will_close:
+            conn.close()
+        else:
+            self._put(conn)
+        return response.status, data
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get(False).close()
+            except queue.Empty:
+                break
+
+
 class OANDAExecutionHandler(ExecutionHandler):
+    """
+    Sends orders to OANDA over a pool of keep-alive connections
+    (see ConnectionPool), rather than over a single connection
+    which is never re-established once the server drops it.
+
+    If lanes is True, execute_order returns at once and the order
+    is sent by a thread of its instrument: the orders of different
+    instruments are sent in parallel, those of a single instrument
+    in order. Otherwise it waits for, and returns, the response.
+
+    The round trip of every order is recorded in round_trips, as
+    (instrument, side, units, status, seconds) tuples, with a status
+    of None if the order failed without a response. The failures
+    of orders sent by the lanes are also logged at error level.
+    """
 
-    def __init__(self, domain, access_token, account_id):
+    def __init__(
+        self, domain, access_token, account_id,
+        pool_size=4, lanes=False, port=None, secure=True, timeout=10.0
+    ):
         self.domain = domain
         self.access_token = access_token
         self.account_id = account_id
-        self.conn = self.obtain_connection()
+        self.port = port
+        self.secure = secure
+        self.timeout = timeout
+        self.pool = ConnectionPool(self.obtain_connection, pool_size)
+        self.lanes = {} if lanes else None
+        self.round_trips = []
         self.logger = logging.getLogger(__name__)
 
     def obtain_connection(self):
-        return httplib.HTTPSConnection(self.domain)
+        if self.secure:
+            return httplib.HTTPSConnection(
+                self.domain, self.port, timeout=self.timeout
+            )
+        return httplib.HTTPConnection(
+            self.domain, self.port, timeout=self.timeout
+        )
 
-    def execute_order(self, event):
+    def send_order(self, event):
+        """
+        Sends an order and waits for the response, returning the
+        response status and body.
+        """
         instrument = "%s_%s" % (event.instrument[:3], event.instrument[3:])
         headers = {
             "Content-Type": "application/x-www-form-urlencoded",
@@ -68,11 +213,54 @@ class OANDAExecutionHandler(ExecutionHandler):
             "type": event.order_type,
             "side": event.side
         })
-        self.conn.request(
-            "POST",
-            "/v1/accounts/%s/orders" % str(self.account_id),
-            params, headers
-        )
-        response = self.conn.getresponse().read().decode(
-            "utf-8").replace("\n", "").replace("\t", "")
+        start = perf_counter()
+        try:
+            status, data = self.pool.request(
+                "POST",
+                "/v1/accounts/%s/orders" % str(self.account_id),
+                params, headers
+            )
+        except Exception:
+            self.round_trips.append((
+                event.instrument, event.side, event.units, None,
+                perf_counter() - start
+            ))
+            raise
+        self.round_trips.append((
+            event.instrument, event.side, event.units, status,
+            perf_counter() - start
+        ))
+        response = data.decode("utf-8").replace("\n", "").replace("\t", "")
         self.logger.debug(response)
+        return status, response
+
+    def execute_order(self, event):
+        if self.lanes is None:
+            return self.send_order(event)
+        lane = self.lanes.get(event.instrument)
+        if lane is None:
+            lane = ThreadPoolExecutor(max_workers=1)
+            self.lanes[event.instrument] = lane
+        future = lane.submit(self.send_order, event)
+        future.add_done_callback(
+            lambda f: self._order_done(event, f)
+        )
+        return future
+
+    def _order_done(self, event, future):
+        """
+        Logs the failure of an order sent by a lane, as nothing
+        else may ever look at its future.
+        """
+        if not future.cancelled() and future.exception() is not None:
+            self.logger.error(
+                "Order failed: %s: %r", event, future.exception()
+            )
+
+    def close(self):
+        """
+        Waits for the orders in flight and closes the connections.
+        """
+        for lane in (self.lanes or {}).values():
+            lane.shutdown(wait=True)
+        self.pool.close()
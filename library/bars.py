@@ -0,0 +1,172 @@
+from __future__ import print_function
+
+import os
+import os.path
+
+import numpy as np
+
+
+BAR_KINDS = ("time", "tick", "volume")
+
+BAR_COLUMNS = {
+    "time": np.int64,
+    "open": np.int64,
+    "high": np.int64,
+    "low": np.int64,
+    "close": np.int64,
+    "ask": np.int64,
+    "volume": np.float64,
+    "ticks": np.int64,
+}
+
+
+class BarSpec(object):
+    """
+    BarSpec describes how ticks are aggregated into bars:
+
+        BarSpec("time", 60) - one bar per 60 seconds,
+        BarSpec("tick", 500) - one bar per 500 ticks,
+        BarSpec("volume", 1e6) - a new bar every 1e6 units of
+            (ask plus bid) volume, i.e. at the tick that takes
+            the day's cumulative volume past each multiple of 1e6
+            (so a bar's volume differs from 1e6 by less than the
+            volume of a single tick).
+
+    Bars never span two days, so tick and volume bars restart
+    at the start of every day.
+    """
+
+    def __init__(self, kind, size):
+        if kind not in BAR_KINDS:
+            raise ValueError("Unknown bar kind: %s" % kind)
+        if size <= 0:
+            raise ValueError("Bar size must be positive: %s" % size)
+        self.kind = kind
+        self.size = size
+
+    @property
+    def key(self):
+        """
+        The name under which the bars are cached, e.g. "time_60".
+        """
+        return "%s_%s" % (self.kind, ("%g" % self.size).replace(".", "p"))
+
+    def __repr__(self):
+        return "BarSpec(%r, %r)" % (self.kind, self.size)
+
+
+def bar_ids(day, spec):
+    """
+    Returns the (non-decreasing) bar number of every tick of a
+    day's tick store columns.
+    """
+    times = day["time"]
+    if spec.kind == "time":
+        return times // int(spec.size * 1e9)
+    elif spec.kind == "tick":
+        return np.arange(len(times)) // int(spec.size)
+    volume = day["ask_volume"].astype(np.float64) + day["bid_volume"]
+    # A bar is complete at the tick taking the cumulative volume
+    # past a multiple of the bar size
+    return np.floor_divide(np.cumsum(volume) - volume, spec.size)
+
+
+def make_bars(day, spec):
+    """
+    Aggregates a single day of ticks, given as the tick store
+    columns (see TickStore.read_day), into bars.
+
+    The ticks are grouped by their (sorted) bar number and every
+    column is reduced at the group boundaries in one vectorised
+    step, rather than by a per-tick Python loop.
+
+    Returns a dictionary of columns (see BAR_COLUMNS):
+    time - The bar close time, in epoch ns. For time bars the end
+        of the interval, otherwise the time of the last tick.
+    open, high, low, close - The bid prices, in integer pipettes.
+    ask - The closing ask price, in integer pipettes.
+    volume - The total ask plus bid volume.
+    ticks - The number of ticks.
+    """
+    times = day["time"]
+    n = len(times)
+    if n == 0:
+        return dict(
+            (name, np.empty(0, dtype=dtype))
+            for name, dtype in BAR_COLUMNS.items()
+        )
+    bid = np.asarray(day["bid"])
+    volume = day["ask_volume"].astype(np.float64) + day["bid_volume"]
+    ids = bar_ids(day, spec)
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(ids)) + 1])
+    ends = np.append(starts[1:], n) - 1
+
+    if spec.kind == "time":
+        size_ns = int(spec.size * 1e9)
+        bar_times = (ids[starts] + 1) * size_ns
+    else:
+        bar_times = times[ends]
+    return {
+        "time": np.asarray(bar_times, dtype=np.int64),
+        "open": bid[starts],
+        "high": np.maximum.reduceat(bid, starts),
+        "low": np.minimum.reduceat(bid, starts),
+        "close": bid[ends],
+        "ask": np.asarray(day["ask"])[ends],
+        "volume": np.add.reduceat(volume, starts),
+        "ticks": np.diff(np.append(starts, n)),
+    }
+
+
+class BarCache(object):
+    """
+    BarCache keeps the bars made from a TickStore on disk, with
+    the same layout as the store itself:
+
+        cache_dir/PAIR/YYYYMMDD/<spec key>/close.npy
+        ...
+
+    Bars are made on first use and rebuilt if the day in the
+    tick store has been written since.
+    """
+
+    def __init__(self, cache_dir, store):
+        self.cache_dir = cache_dir
+        self.store = store
+
+    def _bar_dir(self, pair, date_str, spec):
+        return os.path.join(self.cache_dir, pair, date_str, spec.key)
+
+    def is_fresh(self, pair, date_str, spec):
+        time_path = os.path.join(
+            self._bar_dir(pair, date_str, spec), "time.npy"
+        )
+        tick_path = os.path.join(
+            self.store.store_dir, pair, date_str, "time.npy"
+        )
+        return (
+            os.path.exists(time_path) and
+            os.path.getmtime(time_path) >= os.path.getmtime(tick_path)
+        )
+
+    def read_bars(self, pair, date_str, spec):
+        """
+        Returns the bars of a pair and day as a dictionary of
+        column arrays, making and caching them if needed.
+        """
+        bar_dir = self._bar_dir(pair, date_str, spec)
+        if self.is_fresh(pair, date_str, spec):
+            return dict(
+                (name, np.load(os.path.join(bar_dir, "%s.npy" % name)))
+                for name in BAR_COLUMNS
+            )
+        bars = make_bars(self.store.read_day(pair, date_str), spec)
+        if not os.path.isdir(bar_dir):
+            os.makedirs(bar_dir)
+        # 'time.npy' is written last, see TickStore.write_day
+        for name in sorted(BAR_COLUMNS, key=lambda c: c == "time"):
+            np.save(
+                os.path.join(bar_dir, "%s.npy" % name),
+                np.ascontiguousarray(bars[name], dtype=BAR_COLUMNS[name])
+            )
+        return bars
@@ -0,0 +1,191 @@
+from __future__ import print_function
+
+import bisect
+import datetime
+import json
+import os
+import os.path
+
+from qsforex.library.tick_store import CSV_FILE_PATTERN, CSV_TIME_FORMAT
+
+
+CATALOGUE_FILENAME = ".qsforex_catalogue.json"
+
+
+def _format_date(date):
+    """
+    Converts a "YYYYMMDD" string, date, datetime or pandas
+    Timestamp into a "YYYYMMDD" string (None is kept).
+    """
+    if date is None or isinstance(date, str):
+        return date
+    return date.strftime("%Y%m%d")
+
+
+def scan_csv_file(csv_path):
+    """
+    Returns the number of ticks and the first and last tick
+    timestamps (as ISO format strings, None if there are no
+    ticks) of a 'PAIR_YYYYMMDD.csv' file, without parsing it.
+    """
+    lines = 0
+    last_byte = b"\n"
+    with open(csv_path, "rb") as f:
+        header = f.readline()
+        first = f.readline()
+        f.seek(0)
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            lines += chunk.count(b"\n")
+            last_byte = chunk[-1:]
+        if last_byte != b"\n":
+            lines += 1
+        # The last line lies within the final block of the file
+        size = f.tell()
+        f.seek(max(0, size - 4096))
+        last = f.read().rstrip(b"\r\n").split(b"\n")[-1]
+    ticks = lines - 1 if header else 0
+    if ticks <= 0:
+        return 0, None, None
+    return ticks, _parse_time(first), _parse_time(last)
+
+
+def _parse_time(line):
+    stamp = line.decode("ascii").split(",", 1)[0]
+    return datetime.datetime.strptime(stamp, CSV_TIME_FORMAT).isoformat()
+
+
+class CSVCatalogue(object):
+    """
+    CSVCatalogue is a persistent index of the 'PAIR_YYYYMMDD.csv'
+    tick files of a directory, holding for each pair the sorted
+    list of dates and, per file, its size, modification time,
+    number of ticks and first/last tick timestamps.
+
+    It is saved as JSON in the directory itself. Refreshing it
+    lists the directory once and only rescans the files which
+    are new or whose size or modification time has changed, so
+    that opening a directory of many thousands of daily files
+    does not require reading (or repeatedly matching) them all.
+    """
+
+    def __init__(self, csv_dir, path=None):
+        """
+        Parameters:
+        csv_dir - The directory of CSV tick files.
+        path - The catalogue file, by default CATALOGUE_FILENAME
+            within csv_dir.
+        """
+        self.csv_dir = csv_dir
+        self.path = path or os.path.join(csv_dir, CATALOGUE_FILENAME)
+        self.files = {}
+        self._dates = {}
+        self.load()
+
+    def load(self):
+        """
+        Reads the saved catalogue, if there is one.
+        """
+        try:
+            with open(self.path) as f:
+                self.files = json.load(f)["files"]
+        except (IOError, OSError, ValueError, KeyError):
+            self.files = {}
+        self._index()
+
+    def save(self):
+        """
+        Writes the catalogue, via a temporary file so that a
+        concurrent reader never sees a partial file.
+        """
+        tmp_path = "%s.%d.tmp" % (self.path, os.getpid())
+        with open(tmp_path, "w") as f:
+            json.dump({"files": self.files}, f, sort_keys=True)
+        os.rename(tmp_path, self.path)
+
+    def _index(self):
+        dates = {}
+        for entry in self.files.values():
+            dates.setdefault(entry["pair"], []).append(entry["date"])
+        for pair_dates in dates.values():
+            pair_dates.sort()
+        self._dates = dates
+
+    def refresh(self, save=True):
+        """
+        Brings the catalogue up to date with the directory,
+        scanning new or modified files and dropping deleted ones.
+        Returns the list of filenames that were (re)scanned.
+
+        If save is True and anything changed, the catalogue is
+        written back (silently skipped if the directory is not
+        writable).
+        """
+        files = {}
+        scanned = []
+        for filename in os.listdir(self.csv_dir):
+            match = CSV_FILE_PATTERN.match(filename)
+            if match is None:
+                continue
+            st = os.stat(os.path.join(self.csv_dir, filename))
+            entry = self.files.get(filename)
+            if (
+                entry is None or entry["size"] != st.st_size or
+                entry["mtime"] != st.st_mtime
+            ):
+                ticks, first, last = scan_csv_file(
+                    os.path.join(self.csv_dir, filename)
+                )
+                entry = {
+                    "pair": match.group(1), "date": match.group(2),
+                    "size": st.st_size, "mtime": st.st_mtime,
+                    "ticks": ticks, "first": first, "last": last
+                }
+                scanned.append(filename)
+            files[filename] = entry
+        changed = scanned or len(files) != len(self.files)
+        self.files = files
+        self._index()
+        if save and changed:
+            try:
+                self.save()
+            except (IOError, OSError):
+                pass
+        return scanned
+
+    def pairs(self):
+        return sorted(self._dates)
+
+    def dates(self, pair, start=None, end=None):
+        """
+        Returns the sorted "YYYYMMDD" dates of a pair's files,
+        optionally restricted to start <= date <= end, where start
+        and end may be date strings, dates or datetimes.
+        """
+        pair_dates = self._dates.get(pair, [])
+        lo, hi = 0, len(pair_dates)
+        start, end = _format_date(start), _format_date(end)
+        if start is not None:
+            lo = bisect.bisect_left(pair_dates, start)
+        if end is not None:
+            hi = bisect.bisect_right(pair_dates, end)
+        return pair_dates[lo:hi]
+
+    def select_dates(self, pairs, start=None, end=None):
+        """
+        Returns the sorted union of the dates of several pairs
+        between start and end (inclusive).
+        """
+        dates = set()
+        for pair in pairs:
+            dates.update(self.dates(pair, start, end))
+        return sorted(dates)
+
+    def has_day(self, pair, date_str):
+        return "%s_%s.csv" % (pair, date_str) in self.files
+
+    def entry(self, pair, date_str):
+        """
+        Returns the catalogue entry (pair, date, size, mtime,
+        ticks, first, last) of a pair's file for a day.
+        """
+        return self.files["%s_%s.csv" % (pair, date_str)]
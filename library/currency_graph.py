@@ -0,0 +1,69 @@
+from collections import deque
+
+
+class CurrencyGraph(object):
+    """
+    CurrencyGraph is an undirected graph whose nodes are the
+    currencies and whose edges are the subscribed currency
+    pairs. It is used to find the shortest chain of pairs
+    (the "legs") needed to convert an amount from one
+    currency into another, e.g. JPY into EUR by way of
+    USDJPY and EURUSD when no EURJPY quote is streamed.
+
+    Paths are found by a breadth-first search and cached, so
+    each conversion is only resolved once.
+    """
+
+    def __init__(self, pairs):
+        self.pairs = list(pairs)
+        self.edges = {}
+        for pair in self.pairs:
+            base, quote = pair[:3], pair[3:]
+            # Converting base into quote uses the pair's quote,
+            # converting quote into base its reciprocal
+            self.edges.setdefault(base, []).append((quote, pair, False))
+            self.edges.setdefault(quote, []).append((base, pair, True))
+        self._paths = {}
+
+    def path(self, from_currency, to_currency):
+        """
+        Returns the shortest conversion path as a tuple of
+        (pair, inverted) legs, where inverted is True if the
+        reciprocal of the pair's quote is required. Converting
+        a currency into itself gives an empty path.
+
+        Raises a KeyError if the currencies are not connected.
+        """
+        key = (from_currency, to_currency)
+        try:
+            return self._paths[key]
+        except KeyError:
+            pass
+        legs = self._search(from_currency, to_currency)
+        if legs is None:
+            raise KeyError(
+                "No conversion path from %s to %s" % key
+            )
+        self._paths[key] = legs
+        return legs
+
+    def _search(self, from_currency, to_currency):
+        if from_currency == to_currency:
+            return ()
+        previous = {from_currency: None}
+        frontier = deque([from_currency])
+        while frontier:
+            currency = frontier.popleft()
+            for neighbour, pair, inverted in self.edges.get(currency, []):
+                if neighbour in previous:
+                    continue
+                previous[neighbour] = (currency, pair, inverted)
+                if neighbour == to_currency:
+                    legs = []
+                    while previous[neighbour] is not None:
+                        currency, pair, inverted = previous[neighbour]
+                        legs.append((pair, inverted))
+                        neighbour = currency
+                    return tuple(reversed(legs))
+                frontier.append(neighbour)
+        return None
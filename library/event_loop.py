@@ -0,0 +1,272 @@
+from __future__ import print_function
+
+import math
+import os
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+import time
+try:
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
+
+import numpy as np
+import pandas as pd
+
+from qsforex.library.events import EventType, OrderEvent, TickEvent
+
+
+# Latencies are kept in a histogram with this many logarithmic
+# bins per doubling, so percentiles are within about 5%
+BINS_PER_OCTAVE = 8
+
+
+class HandlerStatistics(object):
+    """
+    The call count, cumulative time and latency histogram of a
+    single handler, in constant memory however often it is called.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.bins = {}
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        b = int(math.floor(
+            math.log(max(seconds, 1e-12), 2) * BINS_PER_OCTAVE
+        ))
+        self.bins[b] = self.bins.get(b, 0) + 1
+
+    def percentile(self, q):
+        """
+        Returns the (approximate) q-th percentile latency, as the
+        geometric midpoint of the histogram bin containing it.
+        """
+        if not self.count:
+            return np.nan
+        rank = q / 100.0 * self.count
+        seen = 0
+        for b in sorted(self.bins):
+            seen += self.bins[b]
+            if seen >= rank:
+                break
+        return 2.0 ** ((b + 0.5) / BINS_PER_OCTAVE)
+
+
+class EventLoopStatistics(object):
+    """
+    Instrumentation of an EventLoop: per handler (and event type)
+    call counts, cumulative and percentile latencies, and the
+    depth of the events queue sampled every sample_every polls.
+    """
+
+    def __init__(self, sample_every=1000):
+        self.sample_every = sample_every
+        self.handlers = {}
+        self.queue_depth = []
+
+    def timed(self, name, event_type, handler):
+        """
+        Returns handler wrapped so that each call is timed and
+        recorded under (name, event_type).
+        """
+        key = (name, event_type)
+        if key not in self.handlers:
+            self.handlers[key] = HandlerStatistics()
+        stats = self.handlers[key]
+
+        def timed_handler(event):
+            start = perf_counter()
+            result = handler(event)
+            stats.record(perf_counter() - start)
+            return result
+        return timed_handler
+
+    def sample_depth(self, iteration, depth):
+        self.queue_depth.append((iteration, time.time(), depth))
+
+    def to_dataframe(self):
+        """
+        Returns the handler statistics as a pandas DataFrame with
+        one row per handler and event type, latencies in seconds.
+        """
+        rows = []
+        for (name, event_type), s in sorted(self.handlers.items()):
+            rows.append({
+                "handler": name, "event": event_type, "count": s.count,
+                "total": s.total,
+                "mean": s.total / s.count if s.count else np.nan,
+                "p50": s.percentile(50), "p90": s.percentile(90),
+                "p99": s.percentile(99), "max": s.max
+            })
+        return pd.DataFrame(rows, columns=[
+            "handler", "event", "count", "total", "mean",
+            "p50", "p90", "p99", "max"
+        ])
+
+    def queue_depth_frame(self):
+        return pd.DataFrame(
+            self.queue_depth, columns=["iteration", "time", "depth"]
+        )
+
+    def to_csv(self, output_dir):
+        """
+        Writes handler_stats.csv and queue_depth.csv into output_dir.
+        """
+        self.to_dataframe().to_csv(
+            os.path.join(output_dir, "handler_stats.csv"), index=False
+        )
+        self.queue_depth_frame().to_csv(
+            os.path.join(output_dir, "queue_depth.csv"), index=False
+        )
+
+
+class EventLoop(object):
+    """
+    EventLoop is the event-driven core shared by the backtester
+    and live trading. Handlers are registered per event type and
+    each event taken off the queue is passed to the handlers of
+    its type, in order of registration, looked up in a table
+    indexed by the event's integer type_id.
+
+    If an EventLoopStatistics is given every handler is timed.
+    """
+
+    def __init__(self, events, heartbeat=0.0, stats=None):
+        self.events = events
+        self.heartbeat = heartbeat
+        self.stats = stats
+        self.handlers = [[] for event_type in EventType]
+
+    def wrap(self, handler, name, event_type):
+        """
+        Returns the handler, timed if the loop is instrumented.
+        """
+        if self.stats is None:
+            return handler
+        return self.stats.timed(name, event_type, handler)
+
+    def register(self, event_class, handler, name=None, first=False):
+        """
+        Registers a handler (a callable taking the event) for
+        an event class, e.g. TickEvent, after those already
+        registered or, if first is True, before them. The name
+        under which it is timed defaults to the handler's qualified
+        name.
+        """
+        if name is None:
+            if hasattr(handler, "__self__"):
+                name = "%s.%s" % (
+                    handler.__self__.__class__.__name__, handler.__name__
+                )
+            else:
+                # A plain function, lambda or other callable
+                name = getattr(handler, "__qualname__", repr(handler))
+        handlers = self.handlers[event_class.type_id]
+        handlers.insert(
+            0 if first else len(handlers),
+            self.wrap(handler, name, event_class.type)
+        )
+
+    def dispatch(self, event):
+        for handler in self.handlers[event.type_id]:
+            handler(event)
+
+    def run(
+        self, idle=None, max_iters=None, until=None,
+        block=False, timeout=None
+    ):
+        """
+        Polls the events queue and dispatches each event, calling
+        idle() whenever the queue is empty (e.g. to stream the
+        next tick of a backtest). Between polls the loop pauses for
+        "heartbeat" seconds. It continues until max_iters polls have
+        been made or until() returns False.
+
+        If block is True the loop instead waits on the queue, so
+        that it wakes as soon as an event arrives and uses no CPU
+        while idle. idle() is then called for housekeeping whenever
+        nothing has arrived for timeout seconds (and until() is only
+        checked between events or timeouts), and heartbeat is
+        ignored.
+        """
+        events = self.events
+        dispatch = self.dispatch
+        stats = self.stats
+        sleep = self.heartbeat if not block else 0.0
+        iters = 0
+        while (
+            (max_iters is None or iters < max_iters) and
+            (until is None or until())
+        ):
+            try:
+                if block:
+                    event = events.get(True, timeout)
+                else:
+                    event = events.get(False)
+            except queue.Empty:
+                if idle is not None:
+                    idle()
+            else:
+                if event is not None:
+                    dispatch(event)
+            if sleep:
+                time.sleep(sleep)
+            if stats is not None and iters % stats.sample_every == 0:
+                stats.sample_depth(iters, events.qsize())
+            iters += 1
+        return iters
+
+
+class OrderLatency(object):
+    """
+    Measures the latency from the receipt of a tick to the orders
+    resulting from it having been sent. The tick's received stamp
+    is carried by the SignalEvents and OrderEvents generated from
+    it, so that every order is timed from its own tick, however
+    many ticks arrived in between. on_order is registered as the
+    last OrderEvent handler of an EventLoop, i.e. after the
+    execution handler.
+
+    The receipt time is the tick's received stamp if it has one
+    (so that the time spent in the events queue is included),
+    otherwise on_tick, registered as the first TickEvent handler,
+    stamps the tick as it is taken off the queue.
+    """
+
+    def __init__(self):
+        self.stats = HandlerStatistics()
+
+    def register(self, loop):
+        loop.register(
+            TickEvent, self.on_tick, "order_latency.on_tick", first=True
+        )
+        loop.register(OrderEvent, self.on_order, "order_latency")
+
+    def on_tick(self, event):
+        if event.received is None:
+            event.received = perf_counter()
+
+    def on_order(self, event):
+        if event.received is not None:
+            self.stats.record(perf_counter() - event.received)
+
+    def summary(self):
+        """
+        Returns the count and the mean, median, 99th percentile
+        and maximum latencies, in seconds, as a dictionary.
+        """
+        s = self.stats
+        return {
+            "count": s.count,
+            "mean": s.total / s.count if s.count else np.nan,
+            "p50": s.percentile(50), "p99": s.percentile(99), "max": s.max
+        }
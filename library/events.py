@@ -1,15 +1,45 @@
+from enum import IntEnum
+
+
+class EventType(IntEnum):
+    """
+    The integer tags of the event types. Each event class holds
+    its tag as a plain int in type_id (plain, as comparing or
+    hashing an IntEnum member is considerably slower than for
+    an int), which can be used to index a dispatch table.
+    """
+    TICK = 0
+    BAR = 1
+    SIGNAL = 2
+    ORDER = 3
+
+
 class Event(object):
-    pass
+    """
+    Event is the base class of all events. The events define
+    __slots__, so that they have no per-instance __dict__ and
+    are cheaper to allocate, and their string type and integer
+    type_id are class attributes rather than instance fields.
+    """
+    __slots__ = ()
 
 
 class TickEvent(Event):
+    """
+    A quote of an instrument. Live ticks also carry received, the
+    (time.perf_counter) time at which the tick arrived, so that
+    the latency from receipt to the resulting orders is measured.
+    """
+    __slots__ = ("instrument", "time", "bid", "ask", "received")
+    type = 'TICK'
+    type_id = int(EventType.TICK)
 
-    def __init__(self, instrument, time, bid, ask):
-        self.type = 'TICK'
+    def __init__(self, instrument, time, bid, ask, received=None):
         self.instrument = instrument
         self.time = time
         self.bid = bid
         self.ask = ask
+        self.received = received
 
     def __str__(self):
         return "Type: %s, Instrument: %s, Time: %s, Bid: %s, Ask: %s" % (
@@ -18,14 +48,62 @@ class TickEvent(Event):
         )
 
 
+class BarEvent(Event):
+    """
+    An OHLC bar of bid prices (see qsforex.library.bars), which
+    also carries the closing bid/ask quote as bid and ask so
+    that it can stand in for a TickEvent at the bar close.
+    """
+    __slots__ = (
+        "instrument", "time", "open", "high", "low", "close",
+        "bid", "ask", "volume", "ticks"
+    )
+    type = 'BAR'
+    type_id = int(EventType.BAR)
+
+    def __init__(
+        self, instrument, time, open, high, low, close, ask,
+        volume, ticks
+    ):
+        self.instrument = instrument
+        self.time = time
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.bid = close
+        self.ask = ask
+        self.volume = volume
+        self.ticks = ticks
+
+    def __str__(self):
+        return (
+            "Type: %s, Instrument: %s, Time: %s, Open: %s, High: %s, "
+            "Low: %s, Close: %s, Ask: %s, Volume: %s, Ticks: %s" % (
+                str(self.type), str(self.instrument), str(self.time),
+                str(self.open), str(self.high), str(self.low),
+                str(self.close), str(self.ask), str(self.volume),
+                str(self.ticks)
+            )
+        )
+
+
 class SignalEvent(Event):
+    """
+    A signal of a strategy. received is that of the tick which
+    generated the signal, if any (see TickEvent), and is passed
+    on to the resulting orders.
+    """
+    __slots__ = ("instrument", "order_type", "side", "time", "received")
+    type = 'SIGNAL'
+    type_id = int(EventType.SIGNAL)
 
-    def __init__(self, instrument, order_type, side, time):
-        self.type = 'SIGNAL'
+    def __init__(self, instrument, order_type, side, time, received=None):
         self.instrument = instrument
         self.order_type = order_type
         self.side = side
         self.time = time  # Time of the last tick that generated the signal
+        self.received = received
 
     def __str__(self):
         return "Type: %s, Instrument: %s, Order Type: %s, Side: %s" % (
@@ -38,13 +116,20 @@ class SignalEvent(Event):
 
 
 class OrderEvent(Event):
+    """
+    An order to be executed. received is that of the tick from
+    which the order originates, if any (see SignalEvent).
+    """
+    __slots__ = ("instrument", "units", "order_type", "side", "received")
+    type = 'ORDER'
+    type_id = int(EventType.ORDER)
 
-    def __init__(self, instrument, units, order_type, side):
-        self.type = 'ORDER'
+    def __init__(self, instrument, units, order_type, side, received=None):
         self.instrument = instrument
         self.units = units
         self.order_type = order_type
         self.side = side
+        self.received = received
 
     def __str__(self):
         return "Type: %s, Instrument: %s, Units: %s, Order Type: %s, Side: %s" % (
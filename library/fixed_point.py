@@ -0,0 +1,73 @@
+from decimal import Decimal, ROUND_HALF_DOWN
+
+
+# Prices are carried as integer "pipettes", i.e. scaled by 10^5,
+# which matches the 0.00001 quantisation used by the PriceHandler
+PRICE_EXPONENT = 5
+PRICE_SCALE = 10 ** PRICE_EXPONENT
+PRICE_QUANTUM = Decimal(1).scaleb(-PRICE_EXPONENT)
+
+
+def div_round_half_down(n, d):
+    """
+    Integer division of n by the positive integer d, rounded to
+    the nearest integer with ties going towards zero. This is the
+    integer equivalent of quantizing with ROUND_HALF_DOWN.
+    """
+    q, r = divmod(abs(n), d)
+    if 2 * r > d:
+        q += 1
+    return q if n >= 0 else -q
+
+
+def to_pipettes(x):
+    """
+    Converts a float (or string, bytes or Decimal) price into
+    integer pipettes, rounding as PriceHandler.to_decimal does
+    (through its decimal string, with ROUND_HALF_DOWN) so that
+    both representations agree for any number of decimal places.
+    """
+    if isinstance(x, bytes):
+        x = x.decode("ascii")
+    return int(Decimal(str(x)).quantize(
+        PRICE_QUANTUM, rounding=ROUND_HALF_DOWN
+    ).scaleb(PRICE_EXPONENT))
+
+
+def from_pipettes(x, exponent=PRICE_EXPONENT):
+    """
+    Converts an integer amount scaled by 10^exponent back into
+    a Decimal, e.g. from_pipettes(110100) == Decimal("1.10100").
+    """
+    return Decimal(x).scaleb(-exponent)
+
+
+def invert_pipettes(pair, bid, ask):
+    """
+    The integer pipette equivalent of PriceHandler.invert_prices,
+    turning the bid/ask of "GBPUSD" into the bid/ask of "USDGBP".
+    """
+    inv_pair = "%s%s" % (pair[3:], pair[:3])
+    inv_bid = div_round_half_down(PRICE_SCALE * PRICE_SCALE, bid)
+    inv_ask = div_round_half_down(PRICE_SCALE * PRICE_SCALE, ask)
+    return inv_pair, inv_bid, inv_ask
+
+
+def multiply_pipettes(prices, inverted=None):
+    """
+    The integer pipette equivalent of PriceHandler.multiply_prices,
+    returning the product of several rates (e.g. the legs of a
+    cross rate), dividing by those whose flag in inverted is True,
+    rounded once to the nearest pipette.
+    """
+    if inverted is None:
+        inverted = [False] * len(prices)
+    numerator = denominator = 1
+    for price, inv in zip(prices, inverted):
+        if inv:
+            numerator *= PRICE_SCALE
+            denominator *= price
+        else:
+            numerator *= price
+            denominator *= PRICE_SCALE
+    return div_round_half_down(numerator * PRICE_SCALE, denominator)
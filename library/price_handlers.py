@@ -1,24 +1,104 @@
 from __future__ import print_function
 
+import bisect
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from decimal import Decimal, getcontext, ROUND_HALF_DOWN
 import os
 import os.path
-import re
 import datetime
+import heapq
+import time
+try:
+    from time import perf_counter
+except ImportError:
+    from time import time as perf_counter
 
 import logging
-import json
 import requests
 
 import numpy as np
 import pandas as pd
 
 from qsforex import settings
-from qsforex.library.events import TickEvent
+from qsforex.library.bars import BarCache, BarSpec
+from qsforex.library.catalogue import CSVCatalogue
+from qsforex.library.events import BarEvent, TickEvent
+from qsforex.library.fixed_point import (
+    PRICE_SCALE, from_pipettes, invert_pipettes, multiply_pipettes,
+    to_pipettes
+)
+from qsforex.library.prices import TickerPrices
+from qsforex.library.tick_parser import decimal_price, parse_tick
+from qsforex.library.tick_merge import (
+    merge_order, merge_pair_arrays, trim_pair_arrays
+)
+from qsforex.library.tick_store import TickStore
 
 from celery import Task
 
 
+def to_epoch_ns(timestamp):
+    """
+    Converts a timestamp (anything pandas.Timestamp accepts, e.g.
+    a datetime or "2015-06-01 12:00") into epoch nanoseconds,
+    keeping None as None.
+    """
+    if timestamp is None:
+        return None
+    return pd.Timestamp(timestamp).value
+
+
+def window_end_ns(end, until):
+    """
+    Returns the exclusive end, in epoch nanoseconds, of a replay
+    which ends with the day end (inclusive, a "YYYYMMDD" string,
+    date or datetime whose time is ignored) and/or before the time
+    until (exclusive), whichever comes first, or None.
+    """
+    bounds = []
+    if end is not None:
+        day = pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+        bounds.append(day.value)
+    if until is not None:
+        bounds.append(to_epoch_ns(until))
+    return min(bounds) if bounds else None
+
+
+def window_days(start_ns, end_ns):
+    """
+    Returns the first and last "YYYYMMDD" days holding ticks of
+    the window start_ns <= time < end_ns (None for an open end).
+    """
+    first = last = None
+    if start_ns is not None:
+        first = pd.Timestamp(start_ns).strftime("%Y%m%d")
+    if end_ns is not None:
+        last = pd.Timestamp(end_ns - 1).strftime("%Y%m%d")
+    return first, last
+
+
+def read_csv_pair(csv_dir, pair, date_str):
+    """
+    Reads the CSV file of a single pair and day, returning the
+    (pair, times, bids, asks) arrays that are merged by
+    merge_pair_arrays. It is a module level function so that
+    it can be run by the prefetch threads or processes.
+    """
+    pair_path = os.path.join(csv_dir, '%s_%s.csv' % (pair, date_str))
+    frame = pd.io.parsers.read_csv(
+        pair_path, header=0, index_col=0,
+        parse_dates=True, dayfirst=True,
+        names=("Time", "Ask", "Bid", "AskVolume", "BidVolume")
+    )
+    return (
+        pair,
+        frame.index.values.astype("datetime64[ns]").view(np.int64),
+        frame["Bid"].values,
+        frame["Ask"].values
+    )
+
+
 class PriceHandler(Task):
     """
     PriceHandler is an abstract base class providing an interface for
@@ -32,36 +112,28 @@ class PriceHandler(Task):
     tick data would be streamed via a brokerage. Thus a historic and live
     system will be treated identically by the rest of the QSForex 
     backtesting suite.
+
+    When fixed_point is True, prices are carried as integer
+    pipettes (see qsforex.library.fixed_point) rather than as
+    Decimals, both in the TickEvents and in the prices dict.
     """
     _initialized = False
+    fixed_point = False
 
     def _set_up_prices_dict(self):
         """
         Due to the way that the Position object handles P&L
         calculation, it is necessary to include values for not
         only base/quote currencies but also their reciprocals.
-        This means that this class will contain keys for, e.g.
+        This means that the prices will contain keys for, e.g.
         "GBPUSD" and "USDGBP".
 
-        At this stage they are calculated in an ad-hoc manner,
-        but a future TODO is to modify the following code to
-        be more robust and straightforward to follow.
+        The reciprocal quotes, as well as any cross rates that
+        can be reached through the streamed pairs, are only
+        calculated (and then cached) when they are read, see
+        TickerPrices.
         """
-        prices_dict = dict(
-            (k, v) for k, v in (
-                (p, {"bid": None, "ask": None, "time": None}) for p in self.pairs
-            )
-        )
-        inv_prices_dict = dict(
-            (k, v) for k, v in (
-                (
-                    "%s%s" % (p[3:], p[:3]),
-                    {"bid": None, "ask": None, "time": None}
-                ) for p in self.pairs
-            )
-        )
-        prices_dict.update(inv_prices_dict)
-        return prices_dict
+        return TickerPrices(self.pairs, self.invert, self.multiply)
 
     @staticmethod
     def invert_prices(pair, bid, ask):
@@ -80,15 +152,98 @@ class PriceHandler(Task):
         )
         return inv_pair, inv_bid, inv_ask
 
+    @staticmethod
+    def multiply_prices(prices, inverted=None):
+        """
+        Multiplies several rates together, e.g. the legs of a
+        cross rate such as JPY -> USD -> EUR, dividing by those
+        prices whose flag in inverted is True (i.e. multiplying by
+        their reciprocals). The product is calculated at full
+        precision and only quantized at the end.
+        """
+        getcontext().rounding = ROUND_HALF_DOWN
+        if inverted is None:
+            inverted = [False] * len(prices)
+        product = Decimal("1.0")
+        for price, inv in zip(prices, inverted):
+            if inv:
+                product /= price
+            else:
+                product *= price
+        return product.quantize(Decimal("0.00001"))
+
     @staticmethod
     def to_decimal(x, quant=Decimal("0.00001")):
         getcontext().rounding = ROUND_HALF_DOWN
         return Decimal(str(x)).quantize(quant)
 
+    def to_price(self, x):
+        """
+        Converts a raw (float) price into the numeric
+        representation used by this price handler.
+        """
+        if self.fixed_point:
+            return to_pipettes(x)
+        return self.to_decimal(x)
+
+    def invert(self, pair, bid, ask):
+        """
+        Inverts the prices of a pair, using the numeric
+        representation of this price handler.
+        """
+        if self.fixed_point:
+            return invert_pipettes(pair, bid, ask)
+        return self.invert_prices(pair, bid, ask)
+
+    def multiply(self, prices, inverted=None):
+        """
+        Multiplies several rates together, using the numeric
+        representation of this price handler.
+        """
+        if self.fixed_point:
+            return multiply_pipettes(prices, inverted)
+        return self.multiply_prices(prices, inverted)
+
     def run(self):
         raise NameError(
             'This is an abstract class. Overload your run function to return a TickEvent')
 
+    def close(self):
+        """
+        Releases any resources held by the price handler, such as
+        background workers. Does nothing unless overridden.
+        """
+        pass
+
+    def next_tick(self):
+        """
+        Returns the next TickEvent without updating the prices,
+        or None once the data is exhausted. Only implemented by
+        the historic price handlers.
+        """
+        raise NameError(
+            'This price handler does not support reading ahead')
+
+    def next_ticks(self, n):
+        """
+        Reads ahead (up to) n TickEvents without updating the
+        prices, so that they can be processed as a batch. Each
+        tick must then be passed to update_prices in turn.
+        """
+        ticks = []
+        for i in range(n):
+            tick = self.next_tick()
+            if tick is None:
+                break
+            ticks.append(tick)
+        return ticks
+
+    def update_prices(self, tick):
+        """
+        Makes the prices of a (read ahead) tick the current ones.
+        """
+        self.prices.set_quote(tick.instrument, tick.bid, tick.ask, tick.time)
+
 
 class HistoricCSVPriceHandler(PriceHandler):
     """
@@ -99,113 +254,272 @@ class HistoricCSVPriceHandler(PriceHandler):
 
     def initialize(self,
                    pairs=settings.PAIRS,
-                   csv_dir=settings.CSV_DATA_DIR):
+                   csv_dir=settings.CSV_DATA_DIR,
+                   fixed_point=False,
+                   prefetch_days=0,
+                   prefetch_processes=False,
+                   start=None,
+                   end=None,
+                   until=None):
         """
         Initialises the historic data handler by requesting
         the location of the CSV files and a list of symbols.
 
         It will be assumed that all files are of the form
-        'pair.csv', where "pair" is the currency pair. For
-        GBP/USD the filename is GBPUSD.csv.
+        'PAIR_YYYYMMDD.csv', where "PAIR" is the currency pair.
+        For GBP/USD on 1st June 2015 the filename is
+        GBPUSD_20150601.csv.
+
+        While a day is being replayed the files of the following
+        prefetch_days days are parsed by a pool of background
+        threads, one file per pair in parallel, so that the
+        backtest does not block at the day boundaries. At most
+        prefetch_days days are held ahead of the current one.
+        The number of day switches which had to wait for their
+        data and the total time spent waiting are kept in stalls
+        and stall_time (see prefetch_stats). The pool is shut down
+        by close, which should be called when stopping early.
+
+        The available files are looked up in the directory's
+        CSVCatalogue, which is refreshed incrementally. Only the
+        ticks from start, up to the end of the day end and before
+        until, are replayed and only the days of that window are
+        opened, see also seek.
 
         Parameters:
         pairs - The list of currency pairs to obtain.
         csv_dir - Absolute directory path to the CSV files.
+        fixed_point - Carry prices as integer pipettes.
+        prefetch_days - Number of days to read ahead, by default 0
+            to read each day synchronously when it is reached.
+        prefetch_processes - Parse in a pool of processes rather
+            than threads, which avoids contending for the GIL with
+            the backtest at the cost of copying the arrays back.
+        start - The time of the first tick to replay (a datetime,
+            date, "YYYYMMDD" or any string pandas.Timestamp
+            accepts), by default the earliest available.
+        end - The last day to replay (inclusive, as for start),
+            by default the latest available.
+        until - The time before which the replay ends (exclusive),
+            for windows which do not end at a day boundary.
         """
         self.pairs = pairs
         self.csv_dir = csv_dir
+        self.fixed_point = fixed_point
         self.prices = self._set_up_prices_dict()
-        self.pair_frames = {}
-        self.file_dates = self._list_all_file_dates()
-        self.continue_backtest = True
-        self.cur_date_idx = 0
-        self.cur_date_pairs = self._open_convert_csv_files_for_day(
-            self.file_dates[self.cur_date_idx]
+        self.start = to_epoch_ns(start)
+        self.end = window_end_ns(end, until)
+        self.catalogue = CSVCatalogue(self.csv_dir)
+        self.catalogue.refresh()
+        self.file_dates = self._list_all_file_dates(
+            *window_days(self.start, self.end)
         )
+        self.continue_backtest = True
+        self.prefetch_days = prefetch_days
+        self.days_loaded = 0
+        self.stalls = 0
+        self.stall_time = 0.0
+        self._prefetched = deque()
+        self._executor = None
+        self._pool = None
+        if self.prefetch_days > 0:
+            self._pool = (
+                ProcessPoolExecutor if prefetch_processes
+                else ThreadPoolExecutor
+            )
+        self._open_at(0, self.start)
         self._initialized = True
 
-    def _list_all_csv_files(self):
-        files = os.listdir(self.csv_dir)
-        matching_files = []
-        for pair in self.pairs:
-            pattern = re.compile(pair + "_\d{8}.csv")
-            matching_files += [f for f in files if pattern.search(f)]
-            matching_files.sort()
-        return matching_files
+    def _list_all_file_dates(self, start=None, end=None):
+        """
+        Returns the sorted list of "YYYYMMDD" date strings
+        between start and end for which at least one of the
+        requested pairs has a file.
+        """
+        return self.catalogue.select_dates(self.pairs, start, end)
 
-    def _list_all_file_dates(self):
+    def _day_pairs(self, date_str):
         """
-        Removes the pair, underscore and '.csv' from the
-        dates and eliminates duplicates. Returns a list
-        of date strings of the form "YYYYMMDD". 
+        Returns the requested pairs which have a file for the day.
         """
-        csv_files = self._list_all_csv_files()
-        de_dup_csv = list(set([d[7:-4] for d in csv_files]))
-        de_dup_csv.sort()
-        return de_dup_csv
+        return [p for p in self.pairs if self.catalogue.has_day(p, date_str)]
 
     def _open_convert_csv_files_for_day(self, date_str):
         """
         Opens the CSV files from the data directory, converting
         them into pandas DataFrames within a pairs dictionary.
 
-        The function then concatenates all of the separate pairs
-        for a single day into a single data frame that is time 
-        ordered, allowing tick data events to be added to the queue 
-        in a chronological fashion.
+        The function then merges the (already time ordered) 
+        ticks of all the separate pairs for a single day into a
+        single chronological stream of (time, pair, bid, ask)
+        tuples, allowing tick data events to be added to the 
+        queue in a chronological fashion.
         """
-        for p in self.pairs:
-            pair_path = os.path.join(self.csv_dir, '%s_%s.csv' % (p, date_str))
-            self.pair_frames[p] = pd.io.parsers.read_csv(
-                pair_path, header=0, index_col=0,
-                parse_dates=True, dayfirst=True,
-                names=("Time", "Ask", "Bid", "AskVolume", "BidVolume")
+        self.days_loaded += 1
+        return self._merge_day([
+            read_csv_pair(self.csv_dir, p, date_str)
+            for p in self._day_pairs(date_str)
+        ])
+
+    def _merge_day(self, pair_arrays):
+        return merge_pair_arrays(
+            trim_pair_arrays(pair_arrays, self._floor, self.end)
+        )
+
+    def _open_at(self, date_idx, floor):
+        """
+        Makes the day file_dates[date_idx] the current one, skipping
+        its ticks before the floor time (epoch ns or None), and
+        restarts the prefetching from the following day.
+        """
+        for futures in self._prefetched:
+            for future in futures:
+                future.cancel()
+        self._prefetched.clear()
+        self._floor = floor
+        self.cur_date_idx = date_idx
+        if date_idx < len(self.file_dates):
+            self.cur_date_pairs = self._open_convert_csv_files_for_day(
+                self.file_dates[date_idx]
             )
-            self.pair_frames[p]["Pair"] = p
-        return pd.concat(self.pair_frames.values()).sort_index().iterrows()
+        else:
+            self.cur_date_pairs = iter([])
+        self._prefetch()
+
+    def seek(self, timestamp):
+        """
+        Repositions the replay at the first tick at or after the
+        given time (but not before start), so that the next tick
+        returned is that one. Only the day files from there on
+        are read: the day is found by a binary search over the
+        dates and the tick by a binary search within the day.
+
+        The current prices are reset, as they would otherwise
+        belong to the previous position in time.
+        """
+        floor = to_epoch_ns(timestamp)
+        if self.start is not None:
+            floor = max(floor, self.start)
+        self.prices = self._set_up_prices_dict()
+        self.continue_backtest = True
+        self._open_at(
+            bisect.bisect_left(self.file_dates, window_days(floor, None)[0]),
+            floor
+        )
+
+    def _prefetch(self):
+        """
+        Submits the files of the days following the current one
+        to the thread pool, up to prefetch_days days ahead.
+        """
+        if self._pool is None:
+            return
+        date_idx = self.cur_date_idx + len(self._prefetched) + 1
+        while (
+            len(self._prefetched) < self.prefetch_days and
+            date_idx < len(self.file_dates)
+        ):
+            date_str = self.file_dates[date_idx]
+            if self._executor is None:
+                self._executor = self._pool(
+                    max_workers=len(self.pairs) * self.prefetch_days
+                )
+            self._prefetched.append([
+                self._executor.submit(
+                    read_csv_pair, self.csv_dir, p, date_str
+                )
+                for p in self._day_pairs(date_str)
+            ])
+            date_idx += 1
+        if not self._prefetched:
+            # Nothing left to read ahead
+            self._shutdown_executor()
+
+    def _shutdown_executor(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def close(self):
+        """
+        Cancels any prefetching and shuts down the pool of threads
+        or processes. The replay can still continue afterwards,
+        the pool being started again if needed.
+        """
+        for futures in self._prefetched:
+            for future in futures:
+                future.cancel()
+        self._prefetched.clear()
+        self._shutdown_executor()
 
     def _update_csv_for_day(self):
         try:
             dt = self.file_dates[self.cur_date_idx + 1]
         except IndexError:  # End of file dates
             return False
+        if self._prefetched:
+            futures = self._prefetched.popleft()
+            if not all(f.done() for f in futures):
+                # The backtest has caught up with the prefetching
+                self.stalls += 1
+                start = time.time()
+                pair_arrays = [f.result() for f in futures]
+                self.stall_time += time.time() - start
+            else:
+                pair_arrays = [f.result() for f in futures]
         else:
-            self.cur_date_pairs = self._open_convert_csv_files_for_day(dt)
-            self.cur_date_idx += 1
-            return True
+            # Without prefetching every day switch waits for the data
+            self.stalls += 1
+            start = time.time()
+            pair_arrays = [
+                read_csv_pair(self.csv_dir, p, dt)
+                for p in self._day_pairs(dt)
+            ]
+            self.stall_time += time.time() - start
+        self.days_loaded += 1
+        self.cur_date_pairs = self._merge_day(pair_arrays)
+        self.cur_date_idx += 1
+        self._prefetch()
+        return True
+
+    def prefetch_stats(self):
+        """
+        Returns a dictionary of the number of days loaded, the
+        number of day switches that stalled waiting for prefetched
+        data and the total seconds spent waiting.
+        """
+        return {
+            "days": self.days_loaded,
+            "stalls": self.stalls,
+            "stall_time": self.stall_time
+        }
+
+    def next_tick(self):
+        while True:
+            try:
+                index, pair, bid, ask = next(self.cur_date_pairs)
+            except StopIteration:
+                # End of the current days data, which may be empty
+                # at the boundaries of the start/end window
+                if not self._update_csv_for_day():  # End of the data
+                    self.continue_backtest = False
+                    return
+            else:
+                break
+
+        # Return the tick event with decimalised prices
+        return TickEvent(pair, index, self.to_price(bid), self.to_price(ask))
 
     def run(self):
         """
         This method returns a single tick and it updates
-        the current bid/ask and inverse bid/ask.
+        the current bid/ask (the inverted pair is only
+        calculated if and when it is needed).
         """
-        try:
-            index, row = next(self.cur_date_pairs)
-        except StopIteration:
-            # End of the current days data
-            if self._update_csv_for_day():
-                index, row = next(self.cur_date_pairs)
-            else:  # End of the data
-                self.continue_backtest = False
-                return
-
-        pair = row["Pair"]
-        bid = self.to_decimal(row["Bid"])
-        ask = self.to_decimal(row["Ask"])
-
-        # Create decimalised prices for traded pair
-        self.prices[pair]["bid"] = bid
-        self.prices[pair]["ask"] = ask
-        self.prices[pair]["time"] = index
-
-        # Create decimalised prices for inverted pair
-        inv_pair, inv_bid, inv_ask = self.invert_prices(pair, bid, ask)
-        self.prices[inv_pair]["bid"] = inv_bid
-        self.prices[inv_pair]["ask"] = inv_ask
-        self.prices[inv_pair]["time"] = index
-
-        # Return the tick event
-        return TickEvent(pair, index, bid, ask)
+        tick = self.next_tick()
+        if tick is not None:
+            self.update_prices(tick)
+        return tick
 
     def stream_next_tick(self, events_queue):
         """
@@ -216,17 +530,262 @@ class HistoricCSVPriceHandler(PriceHandler):
         events_queue.put(self.run())
 
 
+class HistoricTickStorePriceHandler(PriceHandler):
+    """
+    HistoricTickStorePriceHandler replays the ticks held in a
+    TickStore (see qsforex.library.tick_store), which is created
+    once from the CSV files via ingest_csv_dir. The daily columns
+    are memory-mapped rather than parsed, so that repeated
+    backtests over the same data start almost immediately.
+    """
+
+    def initialize(self,
+                   pairs=settings.PAIRS,
+                   store_dir=settings.TICK_STORE_DIR,
+                   fixed_point=False,
+                   start=None,
+                   end=None,
+                   until=None):
+        """
+        Initialises the tick store data handler.
+
+        Parameters:
+        pairs - The list of currency pairs to obtain.
+        store_dir - Absolute directory path to the tick store.
+        fixed_point - Carry prices as integer pipettes.
+        start - The time of the first tick to replay, by default
+            the earliest available (see HistoricCSVPriceHandler).
+        end - The last day to replay (inclusive).
+        until - The time before which the replay ends (exclusive).
+        """
+        self.pairs = pairs
+        self.fixed_point = fixed_point
+        self.store = TickStore(store_dir)
+        self.prices = self._set_up_prices_dict()
+        self.start = to_epoch_ns(start)
+        self.end = window_end_ns(end, until)
+        self.file_dates = self._list_all_file_dates(
+            *window_days(self.start, self.end)
+        )
+        self.continue_backtest = True
+        self._open_at(0, self.start)
+        self._initialized = True
+
+    def _list_all_file_dates(self, start=None, end=None):
+        """
+        Returns the sorted list of "YYYYMMDD" date strings between
+        start and end for which at least one of the requested
+        pairs has data.
+        """
+        dates = set()
+        for p in self.pairs:
+            dates.update(self.store.dates(p))
+        dates = sorted(dates)
+        lo = 0 if start is None else bisect.bisect_left(dates, start)
+        hi = len(dates) if end is None else bisect.bisect_right(dates, end)
+        return dates[lo:hi]
+
+    def _open_at(self, date_idx, floor):
+        """
+        Makes the day file_dates[date_idx] the current one, skipping
+        its ticks before the floor time (epoch ns or None).
+        """
+        self._floor = floor
+        self.cur_date_idx = date_idx
+        if date_idx < len(self.file_dates):
+            self.cur_date_pairs = self._open_day(self.file_dates[date_idx])
+        else:
+            self.cur_date_pairs = iter([])
+
+    def seek(self, timestamp):
+        """
+        Repositions the replay at the first tick at or after the
+        given time (but not before start), see
+        HistoricCSVPriceHandler.seek.
+        """
+        floor = to_epoch_ns(timestamp)
+        if self.start is not None:
+            floor = max(floor, self.start)
+        self.prices = self._set_up_prices_dict()
+        self.continue_backtest = True
+        self._open_at(
+            bisect.bisect_left(self.file_dates, window_days(floor, None)[0]),
+            floor
+        )
+
+    def _open_day(self, date_str):
+        """
+        Memory-maps the columns of every pair for a single day
+        and returns an iterator over the time ordered ticks, as
+        (time, pair, bid, ask) tuples with integer prices.
+        """
+        pair_arrays = []
+        for p in self.pairs:
+            if self.store.has_day(p, date_str):
+                day = self.store.read_day(p, date_str)
+                pair_arrays.append((p, day["time"], day["bid"], day["ask"]))
+        return merge_pair_arrays(
+            trim_pair_arrays(pair_arrays, self._floor, self.end)
+        )
+
+    def _update_day(self):
+        try:
+            dt = self.file_dates[self.cur_date_idx + 1]
+        except IndexError:  # End of file dates
+            return False
+        else:
+            self.cur_date_pairs = self._open_day(dt)
+            self.cur_date_idx += 1
+            return True
+
+    def _next_row(self):
+        """
+        Returns the next row of the current day, moving on to the
+        following days as they run out, or None at the end of
+        the data.
+        """
+        while True:
+            try:
+                return next(self.cur_date_pairs)
+            except StopIteration:
+                # End of the current days data
+                if not self._update_day():  # End of the data
+                    self.continue_backtest = False
+                    return None
+
+    def next_tick(self):
+        row = self._next_row()
+        if row is None:
+            return
+        index, pair, bid, ask = row
+
+        # The store already holds integer pipettes
+        if not self.fixed_point:
+            bid = from_pipettes(bid)
+            ask = from_pipettes(ask)
+        return TickEvent(pair, index, bid, ask)
+
+    def run(self):
+        """
+        This method returns a single tick and it updates
+        the current bid/ask.
+        """
+        tick = self.next_tick()
+        if tick is not None:
+            self.update_prices(tick)
+        return tick
+
+    def stream_next_tick(self, events_queue):
+        events_queue.put(self.run())
+
+
+class HistoricBarPriceHandler(HistoricTickStorePriceHandler):
+    """
+    HistoricBarPriceHandler replays OHLC bars (see
+    qsforex.library.bars) made from a TickStore, as BarEvents,
+    in place of the individual ticks. The bars are cached on
+    disk by pair, day and bar specification, so that only the
+    first backtest over a day has to aggregate its ticks.
+
+    Each bar is emitted at its close time and updates the
+    prices to its closing bid/ask, so the portfolio and the
+    execution handler treat it like a tick at the bar close.
+    """
+    bar_columns = ("open", "high", "low", "close", "ask", "volume", "ticks")
+
+    def initialize(self,
+                   pairs=settings.PAIRS,
+                   store_dir=settings.TICK_STORE_DIR,
+                   fixed_point=False,
+                   start=None,
+                   end=None,
+                   until=None,
+                   bar_spec=None,
+                   cache_dir=settings.BAR_CACHE_DIR):
+        """
+        Initialises the bar data handler.
+
+        Parameters:
+        pairs - The list of currency pairs to obtain.
+        store_dir - Absolute directory path to the tick store.
+        fixed_point - Carry prices as integer pipettes.
+        start - The close time of the first bar to replay.
+        end - The last day to replay (inclusive).
+        until - The time before which the replay ends (exclusive).
+        bar_spec - The BarSpec, by default one minute time bars.
+        cache_dir - Absolute directory path to the bar cache.
+        """
+        self.bar_spec = bar_spec or BarSpec("time", 60)
+        self.bar_cache = BarCache(cache_dir, TickStore(store_dir))
+        super(HistoricBarPriceHandler, self).initialize(
+            pairs, store_dir, fixed_point, start, end, until
+        )
+
+    def _open_day(self, date_str):
+        """
+        Reads (or makes) the bars of every pair for a single day
+        and returns an iterator over them in order of close time,
+        as (time, pair, open, high, low, close, ask, volume, ticks)
+        tuples with integer prices.
+        """
+        pair_bars = []
+        for p in self.pairs:
+            if not self.store.has_day(p, date_str):
+                continue
+            bars = self.bar_cache.read_bars(p, date_str, self.bar_spec)
+            times = bars["time"]
+            lo = 0 if self._floor is None else np.searchsorted(
+                times, self._floor, "left"
+            )
+            hi = len(times) if self.end is None else np.searchsorted(
+                times, self.end, "left"
+            )
+            if hi > lo:
+                pair_bars.append((p, dict(
+                    (name, col[lo:hi]) for name, col in bars.items()
+                )))
+        if not pair_bars:
+            return iter([])
+        all_times, order = merge_order([b["time"] for p, b in pair_bars])
+        pairs = np.repeat(
+            np.array([p for p, b in pair_bars], dtype=object),
+            [len(b["time"]) for p, b in pair_bars]
+        )
+        columns = [
+            np.concatenate([b[name] for p, b in pair_bars])[order].tolist()
+            for name in self.bar_columns
+        ]
+        return zip(
+            pd.to_datetime(all_times[order]), pairs[order].tolist(), *columns
+        )
+
+    def next_tick(self):
+        row = self._next_row()
+        if row is None:
+            return
+        time, pair, open, high, low, close, ask, volume, ticks = row
+        if not self.fixed_point:
+            open, high, low, close, ask = [
+                from_pipettes(x) for x in (open, high, low, close, ask)
+            ]
+        return BarEvent(
+            pair, time, open, high, low, close, ask, volume, ticks
+        )
+
+
 class StreamingForexPrices(PriceHandler):
 
     def initialize(self,
                    domain=settings.STREAM_DOMAIN,
                    access_token=settings.ACCESS_TOKEN,
                    account_id=settings.ACCOUNT_ID,
-                   pairs=settings.PAIRS):
+                   pairs=settings.PAIRS,
+                   fixed_point=False):
         self.domain = domain
         self.access_token = access_token
         self.account_id = account_id
         self.pairs = pairs
+        self.fixed_point = fixed_point
         self.prices = self._set_up_prices_dict()
         self.logger = logging.getLogger(__name__)
         self.stream = self.connect_to_stream()
@@ -252,35 +811,34 @@ class StreamingForexPrices(PriceHandler):
             print("Caught exception when connecting to stream\n" + str(e))
 
     def process_line(self, line):
-        if line:
-            try:
-                dline = line.decode('utf-8')
-                msg = json.loads(dline)
-            except Exception as e:
-                self.logger.error(
-                    "Caught exception when converting message into json: %s" % str(
-                        e)
-                )
-                return
-            if "instrument" in msg or "tick" in msg:
-                self.logger.debug(msg)
-                getcontext().rounding = ROUND_HALF_DOWN
-                instrument = msg["tick"]["instrument"].replace("_", "")
-                time = msg["tick"]["time"]
-                bid = self.to_decimal(msg["tick"]["bid"])
-                ask = self.to_decimal(msg["tick"]["ask"])
-
-                self.prices[instrument]["bid"] = bid
-                self.prices[instrument]["ask"] = ask
-                # Invert the prices (GBP_USD -> USD_GBP)
-                inv_pair, inv_bid, inv_ask = self.invert_prices(
-                    instrument, bid, ask)
-                self.prices[inv_pair]["bid"] = inv_bid
-                self.prices[inv_pair]["ask"] = inv_ask
-                self.prices[inv_pair]["time"] = time
-                return TickEvent(instrument, time, bid, ask)
-            else:
-                return None
+        """
+        Converts a line of the stream into a TickEvent, updating
+        the prices, or returns None for heartbeats (see parse_tick).
+        """
+        received = perf_counter()
+        if not line:
+            return None
+        try:
+            tick = parse_tick(line)
+        except ValueError as e:
+            self.logger.error(
+                "Caught exception when converting message into json: %s", e
+            )
+            return None
+        if tick is None:
+            return None
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(line)
+        instrument, time, bid, ask = tick
+        if self.fixed_point:
+            bid, ask = to_pipettes(bid), to_pipettes(ask)
+        else:
+            bid, ask = decimal_price(bid), decimal_price(ask)
+
+        # The inverted prices (GBP_USD -> USD_GBP) are
+        # calculated lazily by the prices object
+        self.prices.set_quote(instrument, bid, ask, time)
+        return TickEvent(instrument, time, bid, ask, received)
 
     def run(self):
         for line in self.stream.iter_lines(1):
@@ -298,13 +856,26 @@ class StreamingForexPrices(PriceHandler):
 class RandomPriceHandler(PriceHandler):
     """
       RandomPriceHandler is designed to generate a random tick.
+
+      If buffer_size is given the ticks are instead drawn
+      buffer_size at a time, in NumPy, and handed out from the
+      buffer. Each of the instruments (by default just instrument,
+      otherwise a list of names or a dictionary of names and S0)
+      then has its own np.random.Generator, seeded with seed and
+      the instrument's name, so that each instrument's ticks do not
+      depend on which others there are,
+      nor on buffer_size, and the global NumPy random state is
+      left alone. The ticks of all of the instruments are handed
+      out in time order, with the prices as integer pipettes if
+      fixed_point is True.
     """
 
     def initialize(self, instrument='EURUSD',
                    S0=1.1, spread=0.002,
                    start_time=datetime.datetime.now(),
-                   mu_dt=1400, sigma_dt=100, seed=42):
-        np.random.seed(seed)
+                   mu_dt=1400, sigma_dt=100, seed=42,
+                   buffer_size=None, instruments=None,
+                   fixed_point=False):
         self.instrument = instrument
         self.S0 = S0
         self.spread = spread
@@ -313,8 +884,86 @@ class RandomPriceHandler(PriceHandler):
         self.current_time = start_time
         self.mu_dt = mu_dt
         self.sigma_dt = sigma_dt
+        self.buffer_size = buffer_size
+        self.fixed_point = fixed_point
+        if buffer_size is None:
+            np.random.seed(seed)
+        else:
+            self._initialize_buffers(instruments or [instrument], seed)
         self._initialized = True
 
+    def _initialize_buffers(self, instruments, seed):
+        if not isinstance(instruments, dict):
+            instruments = dict((i, self.S0) for i in instruments)
+        self.instruments = sorted(instruments)
+        start_us = int(
+            (np.datetime64(self.current_time, "us") -
+             np.datetime64(0, "us")) / np.timedelta64(1, "us")
+        )
+        spread = int(round(self.spread * PRICE_SCALE))
+        self._streams = []
+        for name in self.instruments:
+            ask = to_pipettes(self.to_decimal(
+                instruments[name] + self.spread / 2.0
+            ))
+            self._streams.append({
+                "rng": np.random.default_rng(np.random.SeedSequence(
+                    [seed] + list(bytearray(name.encode("ascii")))
+                )),
+                "time": start_us, "ask": ask, "spread": spread,
+                "position": 0, "times": [], "asks": [], "stamps": []
+            })
+        self._heap = []
+        for i in range(len(self.instruments)):
+            self._fill_buffer(i)
+            heapq.heappush(self._heap, (self._streams[i]["times"][0], i))
+
+    def _fill_buffer(self, i):
+        """
+        Draws the next buffer_size ticks of instrument i, using
+        the same random walk as run(), in integer pipettes.
+        """
+        stream = self._streams[i]
+        z = stream["rng"].standard_normal((self.buffer_size, 2))
+        dt = np.abs(self.mu_dt + self.sigma_dt * z[:, 0])
+        steps = np.rint(
+            z[:, 1] * dt / 1000.0 / 86400.0 * PRICE_SCALE
+        ).astype(np.int64)
+        times = stream["time"] + np.cumsum(
+            np.rint(dt * 1000.0).astype(np.int64)
+        )
+        asks = stream["ask"] + np.cumsum(steps)
+        stream["time"] = int(times[-1])
+        stream["ask"] = int(asks[-1])
+        stream["times"] = times.tolist()
+        stream["stamps"] = times.astype("datetime64[us]").tolist()
+        stream["asks"] = asks.tolist()
+        stream["position"] = 0
+
+    def _next_buffered(self):
+        time_us, i = heapq.heappop(self._heap)
+        stream = self._streams[i]
+        pos = stream["position"]
+        ask = stream["asks"][pos]
+        bid = ask - stream["spread"]
+        if not self.fixed_point:
+            ask, bid = from_pipettes(ask), from_pipettes(bid)
+        tick = TickEvent(
+            self.instruments[i], stream["stamps"][pos], bid, ask
+        )
+        pos += 1
+        if pos == self.buffer_size:
+            self._fill_buffer(i)
+        else:
+            stream["position"] = pos
+        heapq.heappush(
+            self._heap, (stream["times"][stream["position"]], i)
+        )
+        self.instrument = tick.instrument
+        self.current_time = tick.time
+        self.bid, self.ask = bid, ask
+        return tick
+
     @staticmethod
     def random():
         return np.random.standard_normal() * dt / 1000.0 / 86400.0
@@ -322,6 +971,8 @@ class RandomPriceHandler(PriceHandler):
     def run(self):
         if self._initialized == False:
             raise NameError("Not initialized! Run initialize()")
+        if self.buffer_size is not None:
+            return self._next_buffered()
         dt = abs(np.random.normal(self.mu_dt, self.sigma_dt))
         W = self.to_decimal(np.random.standard_normal()
                             * dt / 1000.0 / 86400.0)
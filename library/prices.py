@@ -0,0 +1,120 @@
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from qsforex.library.currency_graph import CurrencyGraph
+
+
+class TickerPrices(Mapping):
+    """
+    TickerPrices holds the latest bid/ask/time quote of every
+    streamed currency pair, e.g. "GBPUSD", and behaves like the
+    prices dictionary that the Position and Portfolio objects
+    expect, i.e. prices["GBPUSD"]["bid"].
+
+    Reading the reciprocal of a streamed pair, e.g. "USDGBP",
+    or any cross rate that can be reached through a chain of
+    streamed pairs (see CurrencyGraph), e.g. "JPYEUR" from
+    "USDJPY" and "EURUSD", also works. Such derived quotes are
+    only calculated when they are read and are cached until one
+    of their legs ticks again, so derived quotes which are never
+    looked at cost nothing on the per-tick path.
+
+    Iterating over the prices yields the streamed pairs and their
+    reciprocals only, as there are combinatorially many crosses.
+    """
+
+    def __init__(self, pairs, invert, multiply=None):
+        """
+        Parameters:
+        pairs - The list of streamed currency pairs.
+        invert - A function (pair, bid, ask) -> (inv_pair, inv_bid,
+            inv_ask), such as PriceHandler.invert_prices.
+        multiply - A function (prices, inverted) returning the
+            (rounded) product of a list of prices, dividing by those
+            whose inverted flag is True, such as
+            PriceHandler.multiply_prices. It is needed for cross
+            rates with several legs, which are then only rounded once.
+        """
+        self.pairs = list(pairs)
+        self._invert = invert
+        self._multiply = multiply
+        self._quotes = dict(
+            (p, {"bid": None, "ask": None, "time": None}) for p in self.pairs
+        )
+        self._versions = dict((p, 0) for p in self.pairs)
+        self._inverse_pairs = [
+            "%s%s" % (p[3:], p[:3]) for p in self.pairs
+            if "%s%s" % (p[3:], p[:3]) not in self._quotes
+        ]
+        self.graph = CurrencyGraph(self.pairs)
+        self._derived = {}
+
+    def set_quote(self, pair, bid, ask, time):
+        """
+        Stores a new quote for a streamed pair, which marks any
+        derived quotes using it as a leg as out of date.
+        """
+        quote = self._quotes[pair]
+        quote["bid"] = bid
+        quote["ask"] = ask
+        quote["time"] = time
+        self._versions[pair] += 1
+
+    def _leg_quote(self, pair, inverted):
+        quote = self._quotes[pair]
+        if not inverted:
+            return quote["bid"], quote["ask"]
+        inv_pair, inv_bid, inv_ask = self._invert(
+            pair, quote["bid"], quote["ask"]
+        )
+        return inv_bid, inv_ask
+
+    def _derive(self, legs):
+        quotes = [self._quotes[pair] for pair, inverted in legs]
+        for quote in quotes:
+            if quote["bid"] is None or quote["ask"] is None:
+                return {"bid": None, "ask": None, "time": None}
+        if len(legs) == 1:
+            bid, ask = self._leg_quote(*legs[0])
+        else:
+            # The legs are not inverted (and rounded) separately
+            inverted = [inv for pair, inv in legs]
+            bid = self._multiply([q["bid"] for q in quotes], inverted)
+            ask = self._multiply([q["ask"] for q in quotes], inverted)
+        times = [q["time"] for q in quotes]
+        return {"bid": bid, "ask": ask, "time": max(times) if times else None}
+
+    def __getitem__(self, pair):
+        try:
+            return self._quotes[pair]
+        except KeyError:
+            pass
+        try:
+            legs, versions, quote = self._derived[pair]
+        except KeyError:
+            if len(pair) != 6:
+                raise KeyError(pair)
+            legs = self.graph.path(pair[:3], pair[3:])
+            if len(legs) != 1 and self._multiply is None:
+                raise KeyError(pair)
+            versions, quote = None, None
+        cur_versions = tuple(self._versions[leg[0]] for leg in legs)
+        if cur_versions != versions:
+            # Only recalculated when one of the legs has ticked
+            quote = self._derive(legs)
+            self._derived[pair] = (legs, cur_versions, quote)
+        return quote
+
+    def __contains__(self, pair):
+        return pair in self._quotes or pair in self._inverse_pairs
+
+    def __iter__(self):
+        for pair in self._quotes:
+            yield pair
+        for pair in self._inverse_pairs:
+            yield pair
+
+    def __len__(self):
+        return len(self._quotes) + len(self._inverse_pairs)
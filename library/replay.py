@@ -0,0 +1,344 @@
+"""
+A local stand-in for the OANDA price stream and orders endpoint,
+replaying recorded (or simulated) ticks at a chosen speed, and a
+harness running the live components against it:
+
+    server price stream -> AsyncStreamingForexPrices -> events
+        -> trading.trade -> OANDAExecutionHandler -> server orders
+
+Like qsforex.library.streaming this uses asyncio and so requires
+Python 3.5+.
+"""
+
+import asyncio
+import itertools
+import json
+import queue
+import threading
+from time import perf_counter
+from urllib.parse import parse_qs
+
+import numpy as np
+import pandas as pd
+
+from qsforex.library.event_loop import HandlerStatistics
+from qsforex.library.events import OrderEvent
+from qsforex.library.fixed_point import from_pipettes
+
+
+def tick_frames(ticks, max_ticks=None):
+    """
+    Converts TickEvents, e.g. iter(price_handler.run, None), into
+    a list of (seconds, line) frames of the OANDA price stream,
+    where seconds is the tick time in epoch seconds. As the
+    RandomPriceHandler never ends, max_ticks limits the ticks.
+    """
+    frames = []
+    for tick in itertools.islice(ticks, max_ticks):
+        stamp = pd.Timestamp(tick.time)
+        bid, ask = tick.bid, tick.ask
+        if isinstance(bid, int):
+            bid, ask = from_pipettes(bid), from_pipettes(ask)
+        line = (
+            '{"tick":{"instrument":"%s_%s","time":"%s",'
+            '"bid":%s,"ask":%s}}\n' % (
+                tick.instrument[:3], tick.instrument[3:],
+                stamp.strftime("%Y-%m-%dT%H:%M:%S.%fZ"), bid, ask
+            )
+        )
+        frames.append((stamp.value / 1e9, line.encode("ascii")))
+    return frames
+
+
+class ReplayServer(object):
+    """
+    ReplayServer serves the frames over HTTP, on 127.0.0.1, as
+    the chunked GET /v1/prices stream, and accepts the order POSTs
+    of an OANDAExecutionHandler on keep-alive connections.
+
+    The ticks are sent at speed times the rate at which they were
+    recorded (1.0, 100.0, ...) or, with speed None, as fast as the
+    client takes them. Every tick written more than late_after
+    seconds after it was due, because the client could not keep
+    up, is counted as late. While waiting for the next tick a
+    heartbeat is sent every heartbeat_interval seconds.
+
+    A stream resumes where the previous connection left off, and
+    the server ends the stream after the last frame.
+    """
+
+    def __init__(
+        self, frames, speed=1.0, heartbeat_interval=5.0, late_after=0.01,
+        port=0
+    ):
+        self.frames = frames
+        self.speed = speed
+        self.heartbeat_interval = heartbeat_interval
+        self.late_after = late_after
+        self.port = port
+        self.position = 0
+        self.ticks_sent = 0
+        self.late = 0
+        self.stream_start = None
+        self.orders = []
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            self._handle, "127.0.0.1", self.port
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def start_in_thread(self):
+        """
+        Runs the server in an event loop of its own, in a daemon
+        thread, returning once it is listening.
+        """
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def serve():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self.start())
+            ready.set()
+            self.loop.run_forever()
+            self.loop.run_until_complete(self.stop())
+            self.loop.close()
+
+        self.thread = threading.Thread(target=serve)
+        self.thread.daemon = True
+        self.thread.start()
+        ready.wait()
+
+    def stop_thread(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request = await reader.readline()
+                if not request:
+                    break
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                method, path = request.decode("latin-1").split()[:2]
+                if method == "GET" and path.startswith("/v1/prices"):
+                    await self._stream(writer)
+                    break
+                body = await reader.readexactly(
+                    int(headers.get("content-length", 0))
+                )
+                if method == "POST" and path.endswith("/orders"):
+                    self._order(body, writer)
+                else:
+                    writer.write(
+                        b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n"
+                    )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _order(self, body, writer):
+        order = dict((k, v[0]) for k, v in parse_qs(body.decode()).items())
+        self.orders.append((perf_counter(), order))
+        reply = json.dumps({
+            "instrument": order.get("instrument"),
+            "tradeOpened": {"id": len(self.orders)}
+        }).encode("utf-8")
+        writer.write(
+            b"HTTP/1.1 201 Created\r\nContent-Type: application/json\r\n"
+            b"Content-Length: %d\r\n\r\n%s" % (len(reply), reply)
+        )
+
+    async def _write_chunk(self, writer, data):
+        writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+        await writer.drain()
+
+    async def _stream(self, writer):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+        frames = self.frames
+        if self.stream_start is None:
+            self.stream_start = perf_counter()
+        start = perf_counter()
+        first = self.position
+        while self.position < len(frames):
+            if self.speed is None:
+                # Everything is due at once, sent in blocks of frames
+                end = min(self.position + 100, len(frames))
+                await self._write_chunk(writer, b"".join(
+                    line for t, line in frames[self.position:end]
+                ))
+                self.ticks_sent += end - self.position
+                self.position = end
+                continue
+            due = start + (
+                frames[self.position][0] - frames[first][0]
+            ) / self.speed
+            wait = due - perf_counter()
+            if wait > 0:
+                await asyncio.sleep(min(wait, self.heartbeat_interval))
+                if perf_counter() < due:
+                    await self._write_chunk(
+                        writer, b'{"heartbeat":{"time":"%s"}}\n' % (
+                            pd.Timestamp.now("UTC").strftime(
+                                "%Y-%m-%dT%H:%M:%S.%fZ"
+                            ).encode("ascii")
+                        )
+                    )
+                continue
+            # All of the frames which are due are sent in one chunk
+            end = self.position + 1
+            now = perf_counter()
+            while end < len(frames) and start + (
+                frames[end][0] - frames[first][0]
+            ) / self.speed <= now:
+                end += 1
+            for t, line in frames[self.position:end]:
+                if now - (
+                    start + (t - frames[first][0]) / self.speed
+                ) > self.late_after:
+                    self.late += 1
+            await self._write_chunk(writer, b"".join(
+                line for t, line in frames[self.position:end]
+            ))
+            self.ticks_sent += end - self.position
+            self.position = end
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+class SignalToOrder(object):
+    """
+    A minimal stand-in for the Portfolio, turning every signal
+    into a market order of units units.
+    """
+
+    def __init__(self, events, units=1000):
+        self.events = events
+        self.units = units
+
+    def update_portfolio(self, event):
+        pass
+
+    def execute_signal(self, event):
+        self.events.put(
+            OrderEvent(
+                event.instrument, self.units, "market", event.side,
+                event.received
+            )
+        )
+
+
+def latency_percentiles(stats, prefix):
+    """
+    Returns the median, 90th and 99th percentile and maximum of a
+    HandlerStatistics, keyed by e.g. "tick_to_order_p50".
+    """
+    report = dict(
+        ("%s_p%d" % (prefix, q), stats.percentile(q)) for q in (50, 90, 99)
+    )
+    report["%s_max" % prefix] = stats.max if stats.count else np.nan
+    return report
+
+
+def replay_trading(
+    frames, pairs, strategy, speed=None, heartbeat_interval=5.0,
+    late_after=0.01
+):
+    """
+    Replays the frames through the live trading components, with
+    strategy(pairs, events) generating the signals and SignalToOrder
+    as the portfolio, and returns a report dictionary:
+
+    ticks_sent, ticks_received - The ticks sent by the server and
+        converted into TickEvents by the client.
+    dropped - The ticks sent but never received.
+    late - The ticks sent late (see ReplayServer).
+    elapsed, ticks_per_second - The wall time from the first tick
+        having been sent to the trading loop having handled the last
+        event, and the sustained rate of received ticks.
+    orders_sent, orders_received - The orders of the execution
+        handler and those which reached the server.
+    tick_to_order_* - The percentiles of the latency from the
+        receipt of a tick to its order having been sent, see
+        OrderLatency.
+    order_round_trip_* - The percentiles of the order round trips.
+
+    The latencies are approximate, see HandlerStatistics.
+    """
+    from qsforex.execution.execution import OANDAExecutionHandler
+    from qsforex.library.streaming import AsyncStreamingForexPrices
+    from qsforex.trading.trading import trade
+
+    server = ReplayServer(frames, speed, heartbeat_interval, late_after)
+    server.start_in_thread()
+    events = queue.Queue()
+    try:
+        prices = AsyncStreamingForexPrices()
+        prices.initialize(
+            "127.0.0.1", "token", "replay", pairs, port=server.port,
+            use_ssl=False, heartbeat_timeout=3 * heartbeat_interval
+        )
+        received = []
+
+        def on_tick(tick):
+            received.append(None)
+            events.put(tick)
+
+        price_thread = threading.Thread(
+            target=lambda: asyncio.run(prices.stream(on_tick, 1))
+        )
+        execution = OANDAExecutionHandler(
+            "127.0.0.1", "token", "replay", port=server.port, secure=False
+        )
+        stop = threading.Event()
+        result = []
+        trade_thread = threading.Thread(target=lambda: result.append(trade(
+            events, strategy(pairs, events), SignalToOrder(events),
+            execution, timeout=0.1, stop=stop
+        )))
+        trade_thread.start()
+        price_thread.start()
+        price_thread.join()
+        stop.set()
+        trade_thread.join()
+        drained = perf_counter()
+        execution.close()
+    finally:
+        server.stop_thread()
+
+    elapsed = (
+        drained - server.stream_start
+        if server.stream_start is not None else np.nan
+    )
+    latency = result[0]
+    report = {
+        "ticks_sent": server.ticks_sent,
+        "ticks_received": len(received),
+        "dropped": server.ticks_sent - len(received),
+        "late": server.late,
+        "elapsed": elapsed,
+        "ticks_per_second": len(received) / elapsed if elapsed else np.nan,
+        "orders_sent": len(execution.round_trips),
+        "orders_received": len(server.orders),
+    }
+    round_trips = HandlerStatistics()
+    for rt in execution.round_trips:
+        round_trips.record(rt[4])
+    report.update(latency_percentiles(latency.stats, "tick_to_order"))
+    report.update(latency_percentiles(round_trips, "order_round_trip"))
+    return report
@@ -0,0 +1,278 @@
+from __future__ import print_function
+
+from concurrent.futures import ProcessPoolExecutor
+import datetime
+import os
+import os.path
+
+import numpy as np
+
+from qsforex.library.fixed_point import PRICE_SCALE
+from qsforex.library.tick_store import CSV_NAMES, TickStore
+
+
+# The day from which the daily opening prices are random walked,
+# so that any day can be generated without generating the others
+SIMULATION_ORIGIN = datetime.date(2000, 1, 1)
+
+MS_PER_DAY = 86400 * 1000
+
+
+def digits(values, width):
+    """
+    Returns the zero-padded ASCII digits of non-negative integers
+    as a (len(values), width) uint8 array.
+    """
+    powers = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    values = np.asarray(values, dtype=np.int64)
+    return ((values[:, None] // powers) % 10 + ord("0")).astype(np.uint8)
+
+
+def text(s, n):
+    """
+    Returns the ASCII bytes of s repeated as a (n, len(s)) array.
+    """
+    return np.tile(np.frombuffer(s.encode("ascii"), dtype=np.uint8), (n, 1))
+
+
+def format_csv_day(date, columns):
+    """
+    Formats the tick store columns of a single day as the lines
+    (without newlines) of a 'PAIR_YYYYMMDD.csv' file, returning
+    an array of bytes.
+
+    Rather than a strftime and string formatting per tick, each
+    field is written as digits into a fixed-width uint8 array,
+    one row per line, for all of the rows with the same number
+    of digits before the decimal point in their prices (normally
+    every row of the day).
+    """
+    n = len(columns["time"])
+    ms = (np.asarray(columns["time"]) - day_start_ns(date)) // 10 ** 6
+    ask = np.asarray(columns["ask"], dtype=np.int64)
+    bid = np.asarray(columns["bid"], dtype=np.int64)
+    cents = [
+        np.rint(columns[name].astype(np.float64) * 100).astype(np.int64)
+        for name in ("ask_volume", "bid_volume")
+    ]
+    widths = [
+        np.maximum(np.floor(np.log10(np.maximum(p // PRICE_SCALE, 1))), 0)
+        .astype(np.int64) + 1 for p in (ask, bid)
+    ]
+    lines = np.empty(n, dtype=object)
+    groups = widths[0] * 100 + widths[1]
+    for group in np.unique(groups):
+        rows = np.flatnonzero(groups == group)
+        m = len(rows)
+        t = ms[rows]
+        fields = [
+            text(date.strftime("%d.%m.%Y "), m),
+            digits(t // 3600000, 2), text(":", m),
+            digits(t // 60000 % 60, 2), text(":", m),
+            digits(t // 1000 % 60, 2), text(".", m),
+            digits(t % 1000, 3)
+        ]
+        for price, width in ((ask, group // 100), (bid, group % 100)):
+            fields += [
+                text(",", m), digits(price[rows] // PRICE_SCALE, width),
+                text(".", m), digits(price[rows] % PRICE_SCALE, 5)
+            ]
+        for c in cents:
+            # Volumes are written as e.g. "1.2300"
+            fields += [
+                text(",", m), digits(c[rows] // 100, 1), text(".", m),
+                digits(c[rows] % 100, 2), text("00", m)
+            ]
+        block = np.ascontiguousarray(np.hstack(fields))
+        lines[rows] = block.view("S%d" % block.shape[1]).ravel().tolist()
+    return lines
+
+
+def day_start_ns(date):
+    return int(
+        (np.datetime64(date.isoformat(), "D") - np.datetime64(0, "D")) /
+        np.timedelta64(1, "ns")
+    )
+
+
+class TickSimulator(object):
+    """
+    TickSimulator generates days of random ticks for one or more
+    (correlated) currency pairs, drawing whole days of arrival
+    times and price increments at once with NumPy.
+
+    Every day is drawn from its own generator, seeded with
+    SeedSequence([seed, day]), where day counts the days since
+    SIMULATION_ORIGIN, so that a day is the same however many
+    (and in whatever order, or in which process) days are made.
+    The days are joined up by a daily random walk of the opening
+    prices, drawn for all days from SeedSequence([seed]), with
+    the ticks of each day forming a Brownian bridge from its open
+    to the next day's open.
+
+    Parameters:
+    pairs - The list of pairs, e.g. ["EURUSD", "GBPUSD"].
+    seed - The random seed.
+    s0 - The price of every pair at SIMULATION_ORIGIN, a number
+        or a dictionary keyed by pair.
+    daily_vol - The standard deviation of the daily log returns.
+    correlation - The correlation matrix of the pairs' returns,
+        defaults to uncorrelated.
+    spread - The bid/ask spread, in price units.
+    mu_dt, sigma_dt - The mean and standard deviation of the
+        times between ticks, in milliseconds (as for the
+        RandomPriceHandler).
+    quote_prob - The probability with which each pair quotes at
+        every tick time, 1.0 for all of the pairs every time.
+    regime_vols - The volatility multipliers of the volatility
+        regimes, which are cycled through.
+    regime_switch_prob - The probability of moving to the next
+        regime at each tick.
+    """
+
+    def __init__(
+        self, pairs, seed=42, s0=1.1, daily_vol=0.006, correlation=None,
+        spread=0.0002, mu_dt=1400, sigma_dt=100, quote_prob=1.0,
+        regime_vols=(1.0,), regime_switch_prob=0.0
+    ):
+        self.pairs = list(pairs)
+        self.seed = seed
+        if not isinstance(s0, dict):
+            s0 = dict((pair, s0) for pair in self.pairs)
+        self.log_s0 = np.log([float(s0[pair]) for pair in self.pairs])
+        self.daily_vol = daily_vol
+        if correlation is None:
+            correlation = np.eye(len(self.pairs))
+        self.cholesky = np.linalg.cholesky(
+            np.asarray(correlation, dtype=float)
+        )
+        self.spread = int(round(spread * PRICE_SCALE))
+        self.mu_dt = mu_dt
+        self.sigma_dt = sigma_dt
+        self.quote_prob = quote_prob
+        self.regime_vols = np.asarray(regime_vols, dtype=float)
+        self.regime_switch_prob = regime_switch_prob
+
+    def day_index(self, date):
+        index = (date - SIMULATION_ORIGIN).days
+        if index < 0:
+            raise ValueError(
+                "Cannot simulate days before %s" % SIMULATION_ORIGIN
+            )
+        return index
+
+    def log_opens(self, index):
+        """
+        Returns the log opening prices of day index and the next.
+        """
+        rng = np.random.default_rng(np.random.SeedSequence([self.seed]))
+        z = rng.standard_normal((index + 1, len(self.pairs)))
+        walk = np.cumsum(self.daily_vol * z.dot(self.cholesky.T), axis=0)
+        walk = np.vstack([np.zeros(len(self.pairs)), walk])
+        return self.log_s0 + walk[index], self.log_s0 + walk[index + 1]
+
+    def _arrival_times(self, rng):
+        """
+        Returns the tick times of a day, in ms since midnight,
+        drawing the inter-arrival times in blocks.
+        """
+        block = int(MS_PER_DAY / self.mu_dt * 1.05) + 100
+        gaps = []
+        total = 0.0
+        while total < MS_PER_DAY:
+            dt = np.abs(rng.normal(self.mu_dt, self.sigma_dt, block))
+            gaps.append(dt)
+            total += dt.sum()
+        times = np.rint(np.cumsum(np.concatenate(gaps))).astype(np.int64)
+        return times[:np.searchsorted(times, MS_PER_DAY)]
+
+    def day(self, date):
+        """
+        Returns the ticks of every pair on date (a datetime.date)
+        as a dictionary of tick store columns, keyed by pair.
+        """
+        index = self.day_index(date)
+        log_open, log_next = self.log_opens(index)
+        rng = np.random.default_rng(
+            np.random.SeedSequence([self.seed, index])
+        )
+        times = self._arrival_times(rng)
+        n = len(times)
+        k = len(self.pairs)
+
+        switches = rng.random(n) < self.regime_switch_prob
+        regimes = (
+            rng.integers(len(self.regime_vols)) + np.cumsum(switches)
+        ) % len(self.regime_vols)
+        dt = np.diff(np.concatenate([[0], times])) / float(MS_PER_DAY)
+        scale = self.daily_vol * np.sqrt(dt) * self.regime_vols[regimes]
+        steps = rng.standard_normal((n, k)).dot(self.cholesky.T)
+        paths = np.cumsum(steps * scale[:, None], axis=0)
+        if n:
+            # Bridge each path onto the next day's open
+            fraction = times / float(MS_PER_DAY)
+            paths -= fraction[:, None] * (
+                paths[-1] - (log_next - log_open)
+            )[None, :] / fraction[-1]
+        mids = np.exp(log_open + paths)
+
+        quotes = rng.random((n, k)) < self.quote_prob
+        volumes = 1.0 + np.rint(rng.uniform(0.0, 200.0, (n, k, 2))) / 100.0
+        start = day_start_ns(date)
+        days = {}
+        for j, pair in enumerate(self.pairs):
+            rows = quotes[:, j]
+            bid = np.rint(mids[rows, j] * PRICE_SCALE).astype(np.int64)
+            bid -= self.spread // 2
+            days[pair] = {
+                "time": start + times[rows] * 10 ** 6,
+                "bid": bid,
+                "ask": bid + self.spread,
+                "ask_volume": volumes[rows, j, 0].astype(np.float32),
+                "bid_volume": volumes[rows, j, 1].astype(np.float32),
+            }
+        return days
+
+    def write_day(self, date, csv_dir=None, store_dir=None):
+        """
+        Generates a day and writes it as 'PAIR_YYYYMMDD.csv' files
+        into csv_dir and/or into the TickStore at store_dir,
+        returning the number of ticks of each pair.
+        """
+        days = self.day(date)
+        date_str = date.strftime("%Y%m%d")
+        for pair, columns in days.items():
+            if csv_dir is not None:
+                path = os.path.join(csv_dir, "%s_%s.csv" % (pair, date_str))
+                with open(path, "wb") as f:
+                    f.write((",".join(CSV_NAMES) + "\n").encode("ascii"))
+                    lines = format_csv_day(date, columns)
+                    if len(lines):
+                        f.write(b"\n".join(lines.tolist()) + b"\n")
+            if store_dir is not None:
+                TickStore(store_dir).write_day(pair, date_str, columns)
+        return dict((pair, len(c["time"])) for pair, c in days.items())
+
+
+def _write_day(args):
+    simulator, date, csv_dir, store_dir = args
+    return date, simulator.write_day(date, csv_dir, store_dir)
+
+
+def generate_days(simulator, dates, csv_dir=None, store_dir=None,
+                  processes=1):
+    """
+    Writes the days of simulator (see TickSimulator.write_day),
+    in a pool of processes if processes > 1. As every day is
+    seeded separately the files do not depend on processes.
+
+    Returns a list of (date, {pair: ticks}) tuples, in date order.
+    """
+    for d in (csv_dir, store_dir):
+        if d is not None and not os.path.isdir(d):
+            os.makedirs(d)
+    jobs = [(simulator, date, csv_dir, store_dir) for date in dates]
+    if processes > 1:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            return list(executor.map(_write_day, jobs))
+    return [_write_day(job) for job in jobs]
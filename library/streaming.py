@@ -0,0 +1,194 @@
+"""
+An asyncio client for the OANDA price stream.
+
+This module uses async/await and so requires Python 3.5+, it is
+kept apart from qsforex.library.price_handlers for that reason.
+"""
+
+import asyncio
+import logging
+import ssl
+try:
+    from urllib.parse import urlencode
+except ImportError:
+    from urllib import urlencode
+
+from qsforex import settings
+from qsforex.library.price_handlers import StreamingForexPrices
+
+
+class StreamError(Exception):
+    """
+    Raised when the stream cannot be opened, e.g. the server
+    answers with a status other than 200.
+    """
+    pass
+
+
+class AsyncStreamingForexPrices(StreamingForexPrices):
+    """
+    AsyncStreamingForexPrices reads the OANDA price stream with
+    asyncio rather than a blocking requests session reading one
+    byte at a time. The response is read in whole (HTTP chunked
+    or plain) blocks and split into lines in a buffer, and each
+    line is converted by StreamingForexPrices.process_line into
+    the same TickEvents, updating the same prices.
+
+    The stream is reopened whenever it fails, is closed by the
+    server or stays silent for longer than heartbeat_timeout
+    (OANDA sends a heartbeat every few seconds), waiting for
+    reconnect_delay seconds, doubled after every failed attempt
+    up to max_reconnect_delay.
+    """
+
+    def initialize(self,
+                   domain=settings.STREAM_DOMAIN,
+                   access_token=settings.ACCESS_TOKEN,
+                   account_id=settings.ACCOUNT_ID,
+                   pairs=settings.PAIRS,
+                   fixed_point=False,
+                   port=443, use_ssl=True,
+                   heartbeat_timeout=10.0,
+                   reconnect_delay=0.5, max_reconnect_delay=30.0):
+        """
+        Unlike StreamingForexPrices the stream is not opened here
+        but by stream() / stream_to_queue().
+        """
+        self.domain = domain
+        self.access_token = access_token
+        self.account_id = account_id
+        self.pairs = pairs
+        self.fixed_point = fixed_point
+        self.port = port
+        self.use_ssl = use_ssl
+        self.heartbeat_timeout = heartbeat_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.prices = self._set_up_prices_dict()
+        self.logger = logging.getLogger(__name__)
+        self.connections = 0
+        self.reconnects = 0
+
+    def _request(self):
+        params = urlencode({
+            "instruments": ",".join(
+                "%s_%s" % (p[:3], p[3:]) for p in self.pairs
+            ),
+            "accountId": self.account_id
+        })
+        return (
+            "GET /v1/prices?%s HTTP/1.1\r\n"
+            "Host: %s\r\n"
+            "Authorization: Bearer %s\r\n"
+            "Accept-Encoding: identity\r\n"
+            "Connection: keep-alive\r\n"
+            "\r\n" % (params, self.domain, self.access_token)
+        ).encode("ascii")
+
+    async def _read(self, coro):
+        return await asyncio.wait_for(coro, self.heartbeat_timeout)
+
+    async def _connect(self):
+        """
+        Opens the stream, returning the reader and writer and
+        whether the body is chunked.
+        """
+        context = ssl.create_default_context() if self.use_ssl else None
+        reader, writer = await self._read(asyncio.open_connection(
+            self.domain, self.port, ssl=context
+        ))
+        writer.write(self._request())
+        try:
+            status = await self._read(reader.readline())
+            parts = status.split()
+            if len(parts) < 2 or parts[1] != b"200":
+                raise StreamError(
+                    "Error: stream status %s" % status.decode("latin-1").strip()
+                )
+            chunked = False
+            while True:
+                header = await self._read(reader.readline())
+                if header in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = header.partition(b":")
+                if (
+                    name.strip().lower() == b"transfer-encoding" and
+                    b"chunked" in value.lower()
+                ):
+                    chunked = True
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer, chunked
+
+    async def _lines(self, reader, chunked):
+        """
+        Yields the (non-empty) lines of the response body, until
+        the server ends it.
+        """
+        if not chunked:
+            while True:
+                line = await self._read(reader.readline())
+                if not line:
+                    return
+                line = line.strip()
+                if line:
+                    yield line
+        buf = b""
+        while True:
+            size = int((await self._read(reader.readline())).split(b";")[0], 16)
+            if size == 0:
+                return
+            data = await self._read(reader.readexactly(size + 2))
+            lines = (buf + data[:-2]).split(b"\n")
+            buf = lines.pop()
+            for line in lines:
+                line = line.strip()
+                if line:
+                    yield line
+
+    async def stream(self, on_tick, max_connections=None):
+        """
+        Reads the stream, calling on_tick(event) for every tick and
+        reconnecting as described above, until cancelled or until
+        max_connections connections have ended.
+        """
+        delay = self.reconnect_delay
+        while max_connections is None or self.connections < max_connections:
+            writer = None
+            try:
+                reader, writer, chunked = await self._connect()
+                self.connections += 1
+                delay = self.reconnect_delay
+                async for line in self._lines(reader, chunked):
+                    tick = self.process_line(line)
+                    if tick is not None:
+                        on_tick(tick)
+                self.logger.warning("Price stream closed by the server")
+            except asyncio.TimeoutError:
+                self.logger.warning(
+                    "No data on the price stream for %ss", self.heartbeat_timeout
+                )
+            except (OSError, ValueError, asyncio.IncompleteReadError,
+                    StreamError) as e:
+                self.logger.warning("Price stream failed: %s", e)
+            finally:
+                if writer is not None:
+                    writer.close()
+            if max_connections is not None and self.connections >= max_connections:
+                break
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def run(self):
+        raise NotImplementedError(
+            "AsyncStreamingForexPrices only streams, see stream()"
+        )
+
+    def stream_to_queue(self, events_queue):
+        """
+        Runs the stream in its own event loop (e.g. in a thread of
+        its own, as in trading.py), putting the ticks on the queue.
+        """
+        asyncio.run(self.stream(events_queue.put))
@@ -0,0 +1,84 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+
+
+def merge_order(times):
+    """
+    Given a list of already time-ordered int64 timestamp arrays,
+    one per pair, returns the concatenated timestamps together
+    with the permutation that interleaves them chronologically.
+
+    A stable sort is used, so ticks with identical timestamps
+    keep the order in which their pairs were supplied. As each
+    array is a pre-sorted run, the (timsort based) stable sort
+    only needs to merge the runs rather than fully re-sort.
+    """
+    all_times = np.concatenate(times)
+    return all_times, np.argsort(all_times, kind="mergesort")
+
+
+def trim_pair_arrays(pair_arrays, start=None, end=None):
+    """
+    Restricts the ticks of each (pair, times, bids, asks) tuple
+    to the window start <= time < end, where start and end are
+    epoch nanoseconds (None for an open end). The boundaries
+    are found by binary search on the sorted timestamps, so for
+    memory-mapped arrays only the ticks kept are ever read.
+    """
+    trimmed = []
+    for pair, times, bids, asks in pair_arrays:
+        lo = 0 if start is None else np.searchsorted(times, start, "left")
+        hi = len(times) if end is None else np.searchsorted(times, end, "left")
+        trimmed.append((pair, times[lo:hi], bids[lo:hi], asks[lo:hi]))
+    return trimmed
+
+
+def merge_pair_arrays(pair_arrays, method="argsort"):
+    """
+    Interleaves the ticks of several currency pairs into a single
+    chronological stream of lightweight tuples, avoiding both
+    pd.concat/sort_index and the per-row Series allocation of
+    DataFrame.iterrows.
+
+    Parameters:
+    pair_arrays - A list of (pair, times, bids, asks) tuples, where
+        times is an int64 array of epoch nanoseconds sorted in
+        ascending order and bids/asks are arrays of equal length.
+    method - "argsort" (default) uses a stable argsort over the
+        concatenated timestamps, "heap" performs a k-way heap merge.
+
+    Returns:
+    An iterator of (time, pair, bid, ask) tuples, where time is a
+    pandas Timestamp and bid/ask are Python scalars.
+    """
+    pair_arrays = [pa for pa in pair_arrays if len(pa[1])]
+    if not pair_arrays:
+        return iter([])
+    if method == "heap":
+        return _heap_merge(pair_arrays)
+    elif method != "argsort":
+        raise ValueError("Unknown merge method: %s" % method)
+
+    all_times, order = merge_order([pa[1] for pa in pair_arrays])
+    pairs = np.repeat(
+        np.array([pa[0] for pa in pair_arrays], dtype=object),
+        [len(pa[1]) for pa in pair_arrays]
+    )
+    return zip(
+        pd.to_datetime(all_times[order]),
+        pairs[order].tolist(),
+        np.concatenate([pa[2] for pa in pair_arrays])[order].tolist(),
+        np.concatenate([pa[3] for pa in pair_arrays])[order].tolist()
+    )
+
+
+def _heap_merge(pair_arrays):
+    streams = [
+        zip(times.tolist(), [k] * len(times), bids.tolist(), asks.tolist())
+        for k, (pair, times, bids, asks) in enumerate(pair_arrays)
+    ]
+    names = [pa[0] for pa in pair_arrays]
+    for t, k, bid, ask in heapq.merge(*streams):
+        yield pd.Timestamp(t), names[k], bid, ask
@@ -0,0 +1,55 @@
+from decimal import Decimal, ROUND_HALF_DOWN
+import json
+import re
+
+
+# The frames of the OANDA (v1) price stream, one per line:
+#     {"tick":{"instrument":"EUR_USD","time":"...","bid":1.1,"ask":1.1}}
+#     {"heartbeat":{"time":"..."}}
+HEARTBEAT_PREFIX = b'{"heartbeat"'
+TICK_PATTERN = re.compile(
+    br'^\{"tick":\{"instrument":"([A-Z]{3})_([A-Z]{3})",'
+    br'"time":"([^"]*)","bid":([0-9.]+),"ask":([0-9.]+)\}\}\s*$'
+)
+
+PRICE_QUANTUM = Decimal("0.00001")
+
+
+def parse_tick(line):
+    """
+    Parses a line (bytes) of the price stream, returning the
+    (instrument, time, bid, ask) of a tick, e.g. ("EURUSD",
+    "2015-06-01T12:00:00.000000Z", b"1.10001", b"1.10021"),
+    or None for a heartbeat or any other frame.
+
+    Heartbeats are recognised by their prefix, and ticks in the
+    compact layout sent by OANDA are matched by a single regular
+    expression, with the prices left as the bytes of the JSON
+    numbers so that they are converted only once. Anything else
+    falls back to json.loads. Raises ValueError if the line is
+    not valid JSON.
+    """
+    if line.startswith(HEARTBEAT_PREFIX):
+        return None
+    match = TICK_PATTERN.match(line)
+    if match is not None:
+        base, quote, time, bid, ask = match.groups()
+        return (base + quote).decode("ascii"), time.decode("ascii"), bid, ask
+    msg = json.loads(line.decode("utf-8"))
+    tick = msg.get("tick") if isinstance(msg, dict) else None
+    if tick is None:
+        return None
+    return (
+        tick["instrument"].replace("_", ""), tick["time"],
+        repr(tick["bid"]).encode("ascii"), repr(tick["ask"]).encode("ascii")
+    )
+
+
+def decimal_price(raw):
+    """
+    Converts the bytes of a JSON price into a Decimal quantized
+    to five places, as PriceHandler.to_decimal does for a float.
+    """
+    return Decimal(raw.decode("ascii")).quantize(
+        PRICE_QUANTUM, rounding=ROUND_HALF_DOWN
+    )
@@ -0,0 +1,175 @@
+from __future__ import print_function
+
+import os
+import os.path
+import re
+
+import numpy as np
+import pandas as pd
+
+from qsforex.library.fixed_point import PRICE_SCALE, to_pipettes
+
+
+COLUMNS = {
+    "time": np.int64,
+    "bid": np.int64,
+    "ask": np.int64,
+    "ask_volume": np.float32,
+    "bid_volume": np.float32,
+}
+
+CSV_NAMES = ("Time", "Ask", "Bid", "AskVolume", "BidVolume")
+CSV_TIME_FORMAT = "%d.%m.%Y %H:%M:%S.%f"
+CSV_FILE_PATTERN = re.compile(r"^(.+)_(\d{8})\.csv$")
+
+
+def prices_to_pipettes(prices):
+    """
+    Converts an array of float prices into integer pipettes,
+    rounding as to_pipettes does. Only the prices (within float
+    error of) half way between two pipettes can round differently
+    to np.rint, which goes to even, so those are converted one by
+    one by to_pipettes, through their decimal strings.
+    """
+    scaled = prices * PRICE_SCALE
+    pipettes = np.rint(scaled).astype(np.int64)
+    ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.nonzero(ties)[0]:
+        pipettes[i] = to_pipettes(float(prices[i]))
+    return pipettes
+
+
+def read_tick_csv(csv_path):
+    """
+    Reads a single 'PAIR_YYYYMMDD.csv' file into a dictionary
+    of NumPy column arrays, using the same layout as the tick
+    store (int64 epoch-ns timestamps, fixed-point bid/ask and
+    float32 volumes).
+
+    The timestamps are parsed with an explicit format, which
+    is considerably faster than letting pandas infer it. The
+    prices are rounded as by to_pipettes, see prices_to_pipettes.
+    """
+    frame = pd.read_csv(csv_path, header=0, names=CSV_NAMES)
+    times = pd.to_datetime(frame["Time"], format=CSV_TIME_FORMAT)
+    return {
+        "time": times.values.astype("datetime64[ns]").view(np.int64),
+        "bid": prices_to_pipettes(frame["Bid"].values),
+        "ask": prices_to_pipettes(frame["Ask"].values),
+        "ask_volume": frame["AskVolume"].values.astype(np.float32),
+        "bid_volume": frame["BidVolume"].values.astype(np.float32),
+    }
+
+
+class TickStore(object):
+    """
+    TickStore is a compact columnar on-disk representation of
+    the daily tick CSV files. Each pair and day is kept in its
+    own directory, with one '.npy' file per column:
+
+        store_dir/PAIR/YYYYMMDD/time.npy
+        store_dir/PAIR/YYYYMMDD/bid.npy
+        ...
+
+    Columns are memory-mapped on load, so opening a day costs
+    (almost) nothing until the ticks are actually read, and the
+    operating system page cache is shared between processes
+    reading the same store.
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+
+    def _day_dir(self, pair, date_str):
+        return os.path.join(self.store_dir, pair, date_str)
+
+    def pairs(self):
+        """
+        Returns the sorted list of pairs held in the store.
+        """
+        if not os.path.isdir(self.store_dir):
+            return []
+        return sorted(
+            p for p in os.listdir(self.store_dir)
+            if os.path.isdir(os.path.join(self.store_dir, p))
+        )
+
+    def dates(self, pair):
+        """
+        Returns the sorted list of "YYYYMMDD" date strings
+        stored for a particular pair.
+        """
+        pair_dir = os.path.join(self.store_dir, pair)
+        if not os.path.isdir(pair_dir):
+            return []
+        return sorted(d for d in os.listdir(pair_dir) if len(d) == 8)
+
+    def has_day(self, pair, date_str):
+        return os.path.exists(
+            os.path.join(self._day_dir(pair, date_str), "time.npy")
+        )
+
+    def write_day(self, pair, date_str, columns):
+        """
+        Writes the columns for a single pair and day. The
+        'time.npy' file is written last so that a partially
+        written day is never picked up by has_day.
+        """
+        day_dir = self._day_dir(pair, date_str)
+        if not os.path.isdir(day_dir):
+            os.makedirs(day_dir)
+        for name in sorted(COLUMNS, key=lambda c: c == "time"):
+            np.save(
+                os.path.join(day_dir, "%s.npy" % name),
+                np.ascontiguousarray(columns[name], dtype=COLUMNS[name])
+            )
+
+    def read_day(self, pair, date_str, mmap_mode="r"):
+        """
+        Returns a dictionary of (memory-mapped) column arrays
+        for a single pair and day.
+        """
+        day_dir = self._day_dir(pair, date_str)
+        return dict(
+            (name, np.load(
+                os.path.join(day_dir, "%s.npy" % name), mmap_mode=mmap_mode
+            )) for name in COLUMNS
+        )
+
+
+def ingest_csv_dir(csv_dir, store_dir, pairs=None, overwrite=False):
+    """
+    Converts the 'PAIR_YYYYMMDD.csv' files of csv_dir into a
+    TickStore located at store_dir. This only needs to be
+    carried out once; days which are already present in the
+    store (and are newer than their CSV file) are skipped
+    unless overwrite is True.
+
+    Parameters:
+    csv_dir - Absolute directory path to the CSV files.
+    store_dir - Absolute directory path of the tick store.
+    pairs - Optional list of pairs to ingest, defaults to all.
+    overwrite - Re-ingest days already present in the store.
+
+    Returns:
+    The list of (pair, date_str) tuples that were ingested.
+    """
+    store = TickStore(store_dir)
+    ingested = []
+    for f in sorted(os.listdir(csv_dir)):
+        match = CSV_FILE_PATTERN.match(f)
+        if match is None:
+            continue
+        pair, date_str = match.groups()
+        if pairs is not None and pair not in pairs:
+            continue
+        csv_path = os.path.join(csv_dir, f)
+        if not overwrite and store.has_day(pair, date_str):
+            time_path = os.path.join(
+                store._day_dir(pair, date_str), "time.npy"
+            )
+            if os.path.getmtime(time_path) >= os.path.getmtime(csv_path):
+                continue
+        store.write_day(pair, date_str, read_tick_csv(csv_path))
+        ingested.append((pair, date_str))
+    return ingested
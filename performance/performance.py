@@ -1,32 +1,277 @@
+import math
+
 import numpy as np
 import pandas as pd
 
+from qsforex.library.fixed_point import PRICE_SCALE
+
+
+NS_PER_DAY = 86400 * 10 ** 9
+PIPETTE_SCALE = float(PRICE_SCALE)
+
+
+def _drawdown_arrays(pnl):
+    """
+    Returns the high water mark and drawdown of the PnL curve as
+    NumPy arrays. As in the original looped calculation the high
+    water mark starts from zero and the first period is ignored,
+    which handles the undefined (NaN) first value of an equity
+    curve built from period returns.
+    """
+    values = np.asarray(pnl, dtype=np.float64)
+    hwm = np.zeros(len(values))
+    drawdown = np.full(len(values), np.nan)
+    if len(values) > 1:
+        # fmax skips NaNs, as max(hwm, NaN) keeps the previous hwm
+        hwm[1:] = np.fmax.accumulate(np.fmax(values[1:], 0.0))
+        drawdown[1:] = hwm[1:] - values[1:]
+    return hwm, drawdown
+
+
+def _drawdown_durations(drawdown):
+    """
+    Returns the number of periods since the drawdown was last
+    zero, i.e. the run length of the current drawdown. It is
+    undefined (NaN) until the drawdown is zero for the first time.
+    """
+    n = len(drawdown)
+    positions = np.arange(n)
+    last_zero = np.maximum.accumulate(
+        np.where(drawdown == 0, positions, -1)
+    ) if n else np.array([], dtype=np.int64)
+    duration = (positions - last_zero).astype(np.float64)
+    duration[last_zero < 0] = np.nan
+    return duration
+
 
 def create_drawdowns(pnl):
     """
     Calculate the largest peak-to-trough drawdown of the PnL curve
-    as well as the duration of the drawdown. Requires that the 
+    as well as the duration of the drawdown. Requires that the
     pnl_returns is a pandas Series.
 
+    The calculation is vectorised: the High Water Mark is a running
+    maximum and the durations are the run lengths of the non-zero
+    drawdowns, so it is O(n) without any Python level loop.
+
     Parameters:
     pnl - A pandas Series representing period percentage returns.
 
     Returns:
     drawdown, duration - Highest peak-to-trough drawdown and duration.
     """
+    hwm, drawdown = _drawdown_arrays(pnl)
+    duration = _drawdown_durations(drawdown)
+    drawdown = pd.Series(drawdown, index=pnl.index)
+    duration = pd.Series(duration, index=pnl.index)
+    return drawdown, drawdown.max(), duration.max()
+
+
+def create_drawdown_episodes(pnl):
+    """
+    Splits the PnL curve into its individual drawdown episodes,
+    i.e. the maximal runs of periods below the High Water Mark.
+
+    Parameters:
+    pnl - A pandas Series representing the equity curve.
+
+    Returns:
+    A pandas DataFrame with one row per episode and the columns
+    start - Index label of the peak the drawdown starts from.
+    trough - Index label of the deepest point of the drawdown.
+    recovery - Index label at which the High Water Mark is regained,
+        missing (None/NaN) if the curve has not recovered by its end.
+    drawdown - The peak-to-trough drawdown.
+    duration - Number of periods from the peak to the recovery
+        (or to the end of the curve).
+    """
+    columns = ["start", "trough", "recovery", "drawdown", "duration"]
+    hwm, drawdown = _drawdown_arrays(pnl)
+    below = np.nan_to_num(drawdown) > 0
 
-    # Calculate the cumulative returns curve
-    # and set up the High Water Mark
-    hwm = [0]
+    # Runs of consecutive periods below the High Water Mark
+    edges = np.diff(np.concatenate([[0], below.astype(np.int8), [0]]))
+    starts = np.nonzero(edges == 1)[0]
+    ends = np.nonzero(edges == -1)[0]
 
-    # Create the drawdown and duration series
     idx = pnl.index
-    drawdown = pd.Series(index=idx)
-    duration = pd.Series(index=idx)
-
-    # Loop over the index range
-    for t in range(1, len(idx)):
-        hwm.append(max(hwm[t - 1], pnl.ix[t]))
-        drawdown.ix[t] = (hwm[t] - pnl.ix[t])
-        duration.ix[t] = (0 if drawdown.ix[t] == 0 else duration.ix[t - 1] + 1)
-    return drawdown, drawdown.max(), duration.max()
+    episodes = []
+    for s, e in zip(starts.tolist(), ends.tolist()):
+        trough = s + int(np.nanargmax(drawdown[s:e]))
+        recovered = e < len(drawdown)
+        episodes.append((
+            idx[s - 1], idx[trough], idx[e] if recovered else None,
+            drawdown[trough], (e if recovered else len(drawdown) - 1) - s + 1
+        ))
+    return pd.DataFrame(episodes, columns=columns)
+
+
+class EquityStatistics(object):
+    """
+    Maintains the equity curve statistics of a backtest online,
+    in O(1) time and memory per update, so that they are available
+    at the end of a run without storing every tick's account value.
+
+    The definitions follow Portfolio.output_results: the returns
+    are the period-on-period changes of the total account value,
+    the equity curve is the cumulative product of (1 + returns)
+    and the drawdowns are those calculated by create_drawdowns.
+    The mean and variance of the returns use Welford's algorithm.
+
+    The periods are ticks, so the Sharpe ratio is instead that of
+    the daily returns, the changes of the last total of each (UTC)
+    day with ticks, the first from the starting total. These need
+    the time of each update and the ratio is undefined without.
+    """
+
+    def __init__(self):
+        self.periods = 0
+        self.first_total = None
+        self.last_total = None
+        self.equity = np.nan
+        self.hwm = 0.0
+        self.drawdown = np.nan
+        self._max_drawdown = None
+        self._duration = None
+        self._max_duration = None
+        self.num_returns = 0
+        self.mean_return = np.nan
+        self._m2 = 0.0
+        self._day_end = None
+        self._day_close = None
+        self.num_days = 0
+        self._mean_daily = 0.0
+        self._m2_daily = 0.0
+
+    def update(self, total, time=None, pipettes=0):
+        """
+        Adds the total account value (balance plus unrealised
+        P&L) of the latest period, ending at the given time (e.g.
+        of its tick). The unrealised P&L of fixed point positions
+        may instead be given as its integer sum in pipettes, which
+        is scaled once here.
+        """
+        total = float(total)
+        if pipettes:
+            total += pipettes / PIPETTE_SCALE
+        if time is not None:
+            self._update_day(total, time)
+        self.periods += 1
+        if self.first_total is None:
+            self.first_total = self.last_total = total
+            self._day_close = total
+            return
+
+        ret = total / self.last_total - 1.0
+        self.last_total = total
+        self.num_returns += 1
+        if self.num_returns == 1:
+            self.mean_return = ret
+        else:
+            delta = ret - self.mean_return
+            self.mean_return += delta / self.num_returns
+            self._m2 += delta * (ret - self.mean_return)
+
+        self.equity = total / self.first_total
+        if self.equity > self.hwm:
+            self.hwm = self.equity
+        self.drawdown = self.hwm - self.equity
+        if self._max_drawdown is None or self.drawdown > self._max_drawdown:
+            self._max_drawdown = self.drawdown
+        # As in create_drawdowns the duration is undefined until
+        # the first period at the High Water Mark
+        if self.drawdown == 0:
+            self._duration = 0
+        elif self._duration is not None:
+            self._duration += 1
+        else:
+            return
+        if self._max_duration is None or self._duration > self._max_duration:
+            self._max_duration = self._duration
+
+    def _update_day(self, total, time):
+        """
+        Closes the previous day, with the last total before this
+        one, when the time is past its end.
+        """
+        ns = getattr(time, "value", None)
+        if ns is None:
+            ns = pd.Timestamp(time).value
+        if self._day_end is not None and ns < self._day_end:
+            return
+        if self._day_end is not None:
+            self._add_daily_return(self.last_total / self._day_close - 1.0)
+            self._day_close = self.last_total
+        self._day_end = (ns // NS_PER_DAY + 1) * NS_PER_DAY
+
+    def _add_daily_return(self, ret):
+        self.num_days += 1
+        delta = ret - self._mean_daily
+        self._mean_daily += delta / self.num_days
+        self._m2_daily += delta * (ret - self._mean_daily)
+
+    @property
+    def max_drawdown(self):
+        return np.nan if self._max_drawdown is None else self._max_drawdown
+
+    @property
+    def duration(self):
+        return np.nan if self._duration is None else self._duration
+
+    @property
+    def max_duration(self):
+        return np.nan if self._max_duration is None else self._max_duration
+
+    @property
+    def total_return(self):
+        return self.equity - 1.0
+
+    @property
+    def std_return(self):
+        if self.num_returns < 2:
+            return np.nan
+        return math.sqrt(self._m2 / (self.num_returns - 1))
+
+    def daily_returns(self):
+        """
+        Returns the number, mean and standard deviation of the
+        daily returns, including that of the current (last) day.
+        """
+        n, mean, m2 = self.num_days, self._mean_daily, self._m2_daily
+        if self._day_end is not None:
+            ret = self.last_total / self._day_close - 1.0
+            n += 1
+            delta = ret - mean
+            mean += delta / n
+            m2 += delta * (ret - mean)
+        if n == 0:
+            return 0, np.nan, np.nan
+        std = math.sqrt(m2 / (n - 1)) if n > 1 else np.nan
+        return n, mean, std
+
+    def sharpe_ratio(self, periods=252):
+        """
+        The Sharpe ratio of the daily returns (with a zero
+        risk-free rate), annualised assuming 'periods' trading
+        days per year. NaN unless the updates were timed and
+        span at least two days.
+        """
+        n, mean, std = self.daily_returns()
+        if n < 2 or not std:
+            return np.nan
+        return math.sqrt(periods) * mean / std
+
+    def results(self, periods=252):
+        """
+        Returns all of the statistics as a dictionary.
+        """
+        return {
+            "periods": self.periods,
+            "final_total": self.last_total,
+            "total_return": self.total_return,
+            "mean_return": self.mean_return,
+            "std_return": self.std_return,
+            "sharpe_ratio": self.sharpe_ratio(periods),
+            "max_drawdown": self.max_drawdown,
+            "drawdown_duration": self.max_duration,
+        }
@@ -5,11 +5,12 @@ from decimal import Decimal, getcontext, ROUND_HALF_DOWN
 import logging
 import os
 
-import pandas as pd
-
 from qsforex.library.events import OrderEvent
-from qsforex.performance.performance import create_drawdowns
-from qsforex.portfolio.position import Position
+from qsforex.performance.performance import (
+    create_drawdowns, EquityStatistics
+)
+from qsforex.portfolio.position import FixedPointPosition, Position
+from qsforex.portfolio.recorder import CSVEquityRecorder
 from qsforex.settings import OUTPUT_RESULTS_DIR
 
 
@@ -18,8 +19,17 @@ class Portfolio(object):
     def __init__(
         self, ticker, events, home_currency="EUR",
         leverage=20, equity=Decimal("100000.00"),
-        risk_per_trade=Decimal("0.02"), backtest=True
+        risk_per_trade=Decimal("0.02"), backtest=True,
+        output_dir=OUTPUT_RESULTS_DIR, equity_file=True, recorder=None
     ):
+        """
+        In a backtest the account values are recorded by an
+        EquityRecorder, by default a CSVEquityRecorder writing
+        every tick to backtest.csv, or by the given recorder.
+        If equity_file is False nothing is recorded and the
+        performance statistics are only kept by the (constant
+        memory) EquityStatistics.
+        """
         self.ticker = ticker
         self.events = events
         self.home_currency = home_currency
@@ -28,10 +38,16 @@ class Portfolio(object):
         self.balance = deepcopy(self.equity)
         self.risk_per_trade = risk_per_trade
         self.backtest = backtest
+        self.output_dir = output_dir
         self.trade_units = self.calc_risk_position_size()
         self.positions = {}
-        if self.backtest:
-            self.backtest_file = self.create_equity_file()
+        self.fixed_point = getattr(ticker, "fixed_point", False)
+        self.statistics = EquityStatistics()
+        self.recorder = None
+        if self.backtest and equity_file:
+            if recorder is None:
+                recorder = CSVEquityRecorder(self.output_dir, ticker.pairs)
+            self.recorder = recorder
         self.logger = logging.getLogger(__name__)
 
     def calc_risk_position_size(self):
@@ -40,7 +56,13 @@ class Portfolio(object):
     def add_new_position(
         self, position_type, currency_pair, units, ticker
     ):
-        ps = Position(
+        # Price handlers running in fixed point mode quote
+        # integer pipettes rather than Decimals
+        if getattr(ticker, "fixed_point", False):
+            position_class = FixedPointPosition
+        else:
+            position_class = Position
+        ps = position_class(
             self.home_currency, position_type,
             currency_pair, units, ticker
         )
@@ -73,30 +95,33 @@ class Portfolio(object):
             del[self.positions[currency_pair]]
             return True
 
-    def create_equity_file(self):
-        filename = "backtest.csv"
-        out_file = open(os.path.join(OUTPUT_RESULTS_DIR, filename), "w")
-        header = "Timestamp,Balance"
-        for pair in self.ticker.pairs:
-            header += ",%s" % pair
-        header += "\n"
-        out_file.write(header)
-        if self.backtest:
-            print(header[:-2])
-        return out_file
+    def output_results(self, verbose=True):
+        """
+        Returns the equity curve DataFrame (None if no recorder
+        was used), maximum drawdown and drawdown duration, printing
+        a summary unless verbose is False.
+        """
+        stats = self.statistics
+        if self.recorder is None:
+            if verbose:
+                print(
+                    "Simulation complete: total return %0.4f%%, "
+                    "Sharpe ratio %0.4f, max drawdown %0.4f%%" % (
+                        stats.total_return * 100.0, stats.sharpe_ratio(),
+                        stats.max_drawdown * 100.0
+                    )
+                )
+            return None, stats.max_drawdown, stats.max_duration
 
-    def output_results(self):
-        # Closes off the Backtest.csv file so it can be
+        # Closes off the recorded file so it can be
         # read via Pandas without problems
-        self.backtest_file.close()
+        self.recorder.close()
 
-        in_filename = "backtest.csv"
         out_filename = "equity.csv"
-        in_file = os.path.join(OUTPUT_RESULTS_DIR, in_filename)
-        out_file = os.path.join(OUTPUT_RESULTS_DIR, out_filename)
+        out_file = os.path.join(self.output_dir, out_filename)
 
         # Create equity curve dataframe
-        df = pd.read_csv(in_file, index_col=0)
+        df = self.recorder.load()
         df.dropna(inplace=True)
         df["Total"] = df.sum(axis=1)
         df["Returns"] = df["Total"].pct_change()
@@ -107,7 +132,11 @@ class Portfolio(object):
         df["Drawdown"] = drawdown
         df.to_csv(out_file, index=True)
 
-        print("Simulation complete and results exported to %s" % out_filename)
+        if verbose:
+            print(
+                "Simulation complete and results exported to %s" % out_filename
+            )
+        return df, max_dd, dd_duration
 
     def update_portfolio(self, tick_event):
         """
@@ -119,15 +148,22 @@ class Portfolio(object):
             ps = self.positions[currency_pair]
             ps.update_position_price()
         if self.backtest:
-            out_line = "%s,%s" % (tick_event.time, self.balance)
-            for pair in self.ticker.pairs:
-                if pair in self.positions:
-                    out_line += ",%s" % self.positions[pair].profit_base
-                else:
-                    out_line += ",0.00"
-            out_line += "\n"
-            print(out_line[:-2])
-            self.backtest_file.write(out_line)
+            if self.fixed_point:
+                # Summed as integers, scaled once by the statistics
+                self.statistics.update(
+                    self.balance, tick_event.time, sum(
+                        ps.profit_base_pipettes
+                        for ps in self.positions.values()
+                    )
+                )
+            else:
+                self.statistics.update(self.balance + sum(
+                    ps.profit_base for ps in self.positions.values()
+                ), tick_event.time)
+            if self.recorder is not None:
+                self.recorder.record(
+                    tick_event.time, self.balance, self.positions
+                )
 
     def execute_signal(self, signal_event):
         # Check that the prices ticker contains all necessary
@@ -141,6 +177,9 @@ class Portfolio(object):
         # All necessary pricing data is available,
         # we can execute
         if execute:
+            # Keeps the last unsampled tick's P&L before it changes
+            if self.recorder is not None:
+                self.recorder.snapshot()
             side = signal_event.side
             currency_pair = signal_event.instrument
             units = int(self.trade_units)
@@ -185,7 +224,9 @@ class Portfolio(object):
                 elif side == "sell" and ps.position_type == "short":
                     add_position_units(currency_pair, units)
 
-            order = OrderEvent(currency_pair, units, "market", side)
+            order = OrderEvent(
+                currency_pair, units, "market", side, signal_event.received
+            )
             self.events.put(order)
 
             self.logger.info("Portfolio Balance: %s" % self.balance)
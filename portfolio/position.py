@@ -1,5 +1,14 @@
 from decimal import Decimal, getcontext, ROUND_HALF_DOWN
 
+try:
+    from math import gcd as _gcd
+except ImportError:
+    from fractions import gcd as _gcd
+
+from qsforex.library.fixed_point import (
+    PRICE_EXPONENT, PRICE_SCALE, div_round_half_down, from_pipettes
+)
+
 
 class Position(object):
 
@@ -21,7 +30,9 @@ class Position(object):
             :3]    # For EUR/USD, this is EUR
         self.quote_currency = self.currency_pair[
             3:]   # For EUR/USD, this is USD
-        # For EUR/USD, with account denominated in GBP, this is USD/GBP
+        # For EUR/USD, with account denominated in GBP, this is USD/GBP.
+        # It need not be streamed itself, as the ticker prices resolve
+        # (and cache) cross rates through the streamed pairs
         self.quote_home_currency_pair = "%s%s" % (
             self.quote_currency, self.home_currency)
 
@@ -111,3 +122,133 @@ class Position(object):
         pnl = self.calculate_pips() * qh_close * self.units
         getcontext().rounding = ROUND_HALF_DOWN
         return pnl.quantize(Decimal("0.01"))
+
+
+class FixedPointPosition(Position):
+    """
+    A Position whose prices are integer pipettes (as produced by
+    a PriceHandler running with fixed_point=True). All of the
+    per-tick arithmetic is carried out on Python integers and
+    the results are only converted into Decimals when they are
+    reported, i.e. via profit_base, profit_perc, avg_price and
+    the realised P&L returned by remove_units/close_position.
+
+    The rounding mirrors the Decimal implementation exactly, so
+    that both produce identical P&L for five decimal place prices.
+    """
+
+    def set_up_currencies(self):
+        self.base_currency = self.currency_pair[:3]
+        self.quote_currency = self.currency_pair[3:]
+        self.quote_home_currency_pair = "%s%s" % (
+            self.quote_currency, self.home_currency)
+
+        self.units = int(self.units)
+        ticker_cur = self.ticker.prices[self.currency_pair]
+        if self.position_type == "long":
+            open_price = ticker_cur["ask"]
+            self.cur_price = ticker_cur["bid"]
+        else:
+            open_price = ticker_cur["bid"]
+            self.cur_price = ticker_cur["ask"]
+        # The average price is kept as an exact fraction
+        # (avg_num / avg_den pipettes), so that adding
+        # units never loses precision
+        self.avg_num = open_price
+        self.avg_den = 1
+
+    @property
+    def avg_price(self):
+        return (
+            Decimal(self.avg_num) / self.avg_den
+        ).scaleb(-PRICE_EXPONENT)
+
+    @property
+    def profit_base(self):
+        return from_pipettes(self.profit_base_pipettes)
+
+    @profit_base.setter
+    def profit_base(self, value):
+        self.profit_base_pipettes = value
+
+    @property
+    def profit_perc(self):
+        return from_pipettes(self.profit_perc_pipettes)
+
+    @profit_perc.setter
+    def profit_perc(self, value):
+        self.profit_perc_pipettes = value
+
+    def calculate_pips(self):
+        """
+        Returns the price difference in (rounded) pipettes.
+        """
+        diff = self.cur_price * self.avg_den - self.avg_num
+        if self.position_type == "short":
+            diff = -diff
+        return div_round_half_down(diff, self.avg_den)
+
+    def _quote_home_close(self, long_key, short_key):
+        ticker_qh = self.ticker.prices[self.quote_home_currency_pair]
+        if self.position_type == "long":
+            return ticker_qh[long_key]
+        return ticker_qh[short_key]
+
+    def calculate_profit_base(self):
+        """
+        Returns the profit in the home currency, in pipettes.
+        """
+        qh_close = self._quote_home_close("bid", "ask")
+        return div_round_half_down(
+            self.calculate_pips() * qh_close * self.units, PRICE_SCALE
+        )
+
+    def calculate_profit_perc(self):
+        return div_round_half_down(
+            self.profit_base_pipettes * 100, self.units
+        )
+
+    def update_position_price(self):
+        ticker_cur = self.ticker.prices[self.currency_pair]
+        if self.position_type == "long":
+            self.cur_price = ticker_cur["bid"]
+        else:
+            self.cur_price = ticker_cur["ask"]
+        self.profit_base = self.calculate_profit_base()
+        self.profit_perc = self.calculate_profit_perc()
+
+    def add_units(self, units):
+        units = int(units)
+        cp = self.ticker.prices[self.currency_pair]
+        if self.position_type == "long":
+            add_price = cp["ask"]
+        else:
+            add_price = cp["bid"]
+        new_total_units = self.units + units
+        avg_num = self.avg_num * self.units + add_price * units * self.avg_den
+        avg_den = self.avg_den * new_total_units
+        divisor = _gcd(avg_num, avg_den)
+        self.avg_num = avg_num // divisor
+        self.avg_den = avg_den // divisor
+        self.units = new_total_units
+        self.update_position_price()
+
+    def _realise(self, units, qh_close):
+        # pips * qh_close is scaled by 10^10, the P&L by 10^2
+        pnl = div_round_half_down(
+            self.calculate_pips() * qh_close * units,
+            PRICE_SCALE * PRICE_SCALE // 100
+        )
+        return from_pipettes(pnl, 2)
+
+    def remove_units(self, units):
+        units = int(units)
+        qh_close = self._quote_home_close("ask", "bid")
+        self.units -= units
+        self.update_position_price()
+        return self._realise(units, qh_close)
+
+    def close_position(self):
+        qh_close = self._quote_home_close("ask", "bid")
+        self.update_position_price()
+        return self._realise(self.units, qh_close)
@@ -0,0 +1,275 @@
+from __future__ import print_function
+
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class TickSampler(object):
+    """
+    Samples every n-th tick.
+    """
+
+    def __init__(self, n):
+        self.n = n
+        self.count = 0
+
+    def sample(self, time, balance):
+        self.count += 1
+        if self.count >= self.n:
+            self.count = 0
+            return True
+        return False
+
+
+class TimeSampler(object):
+    """
+    Samples the first tick at least 'seconds' seconds of market
+    time after the previously sampled tick.
+    """
+
+    def __init__(self, seconds):
+        self.interval = pd.Timedelta(seconds=seconds).value
+        self.next_time = None
+
+    def sample(self, time, balance):
+        # Compared as epoch nanoseconds, pandas Timestamps (as the
+        # historic price handlers give) need no conversion
+        ns = getattr(time, "value", None)
+        if ns is None:
+            ns = pd.Timestamp(time).value
+        if self.next_time is None or ns >= self.next_time:
+            self.next_time = ns + self.interval
+            return True
+        return False
+
+
+class BalanceChangeSampler(object):
+    """
+    Samples the first tick and every tick at which the (realised)
+    balance of the account has changed, i.e. when a trade closed.
+    """
+
+    def __init__(self):
+        self.balance = None
+
+    def sample(self, time, balance):
+        if balance != self.balance:
+            self.balance = balance
+            return True
+        return False
+
+
+class EquityRecorder(object):
+    """
+    EquityRecorder is an abstract base class providing an interface
+    for recording the equity curve of a backtest, i.e. the balance
+    and the unrealised P&L of every traded pair, to a file.
+
+    Which ticks are recorded is decided by the sampler (every tick
+    if it is None), see TickSampler, TimeSampler and
+    BalanceChangeSampler. The last tick seen is always recorded when
+    the recorder is closed, so that the sampled curve ends at the
+    final account value. The unrealised P&L is only calculated for
+    the recorded ticks, so snapshot must be called before the open
+    positions are changed (by a trade) to keep that of the last tick.
+    """
+
+    def __init__(self, output_dir, pairs, sampler=None, echo=False):
+        """
+        Parameters:
+        output_dir - The directory the file is written to.
+        pairs - The traded currency pairs, one column each.
+        sampler - An object with a sample(time, balance) method
+            deciding whether a tick is recorded.
+        echo - Whether to also print each recorded line to stdout.
+        """
+        self.output_dir = output_dir
+        self.pairs = list(pairs)
+        self.sampler = sampler
+        self.echo = echo
+        self.closed = False
+        self._pending = None
+        self._held = False
+
+    def record(self, time, balance, positions):
+        """
+        Records the account at the time of a tick, if it is sampled.
+
+        Parameters:
+        time - The time of the tick.
+        balance - The balance of the account.
+        positions - Dictionary of pair -> open Position.
+        """
+        if self.sampler is None or self.sampler.sample(time, balance):
+            self._pending = None
+            self._write(time, balance, self._profits(positions))
+        else:
+            self._pending = (time, balance, positions)
+            self._held = False
+
+    def snapshot(self):
+        """
+        Calculates the unrealised P&L of the last tick, if it was
+        not sampled, before the positions it was recorded with
+        change, so that close writes it as it was.
+        """
+        if self._pending is not None and not self._held:
+            time, balance, positions = self._pending
+            self._pending = (time, balance, self._profits(positions))
+            self._held = True
+
+    def _profits(self, positions):
+        return [
+            positions[pair].profit_base if pair in positions else None
+            for pair in self.pairs
+        ]
+
+    def _write(self, time, balance, profits):
+        """
+        Writes a row, profits being the unrealised P&L of each of
+        the pairs (None if there is no open position).
+        """
+        raise NotImplementedError("Should implement _write()")
+
+    def close(self):
+        """
+        Writes the last tick, if it was not sampled, and closes
+        the file.
+        """
+        if self.closed:
+            return
+        if self._pending is not None:
+            self.snapshot()
+            self._write(*self._pending)
+            self._pending = None
+        self._close()
+        self.closed = True
+
+    def _close(self):
+        raise NotImplementedError("Should implement _close()")
+
+    def load(self):
+        """
+        Returns the recorded equity curve as a pandas DataFrame
+        indexed by the Timestamp, with a Balance column and one
+        column of unrealised P&L per pair.
+        """
+        raise NotImplementedError("Should implement load()")
+
+
+class CSVEquityRecorder(EquityRecorder):
+    """
+    Writes the equity curve to a "backtest.csv" file in the
+    output directory, through a large write buffer.
+    """
+    filename = "backtest.csv"
+
+    def __init__(
+        self, output_dir, pairs, sampler=None, echo=False,
+        buffer_size=1 << 20
+    ):
+        super(CSVEquityRecorder, self).__init__(
+            output_dir, pairs, sampler=sampler, echo=echo
+        )
+        self.path = os.path.join(self.output_dir, self.filename)
+        self.out_file = open(self.path, "w", buffer_size)
+        header = "Timestamp,Balance"
+        for pair in self.pairs:
+            header += ",%s" % pair
+        self.out_file.write(header + "\n")
+        if self.echo:
+            print(header)
+
+    def _write(self, time, balance, profits):
+        out_line = "%s,%s" % (time, balance)
+        for profit in profits:
+            out_line += ",0.00" if profit is None else ",%s" % profit
+        if self.echo:
+            print(out_line)
+        self.out_file.write(out_line + "\n")
+
+    def _close(self):
+        self.out_file.close()
+
+    def load(self):
+        return pd.read_csv(self.path, index_col=0)
+
+
+class NumpyEquityRecorder(EquityRecorder):
+    """
+    Writes the equity curve in a binary columnar format: one
+    file of raw (native endian) values per column in the
+    "backtest" subdirectory of the output directory, i.e.
+    time.bin holding the int64 nanoseconds since the epoch and
+    Balance.bin plus one <PAIR>.bin per pair holding float64s.
+
+    The rows are collected in NumPy arrays of buffer_size rows
+    which are appended to the column files when full, so the
+    memory used does not grow with the length of the backtest
+    and no string formatting is needed per tick.
+    """
+    dirname = "backtest"
+
+    def __init__(
+        self, output_dir, pairs, sampler=None, echo=False,
+        buffer_size=65536
+    ):
+        super(NumpyEquityRecorder, self).__init__(
+            output_dir, pairs, sampler=sampler, echo=echo
+        )
+        self.path = os.path.join(self.output_dir, self.dirname)
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+        self.columns = ["Balance"] + self.pairs
+        self.buffer_size = buffer_size
+        self._times = np.empty(buffer_size, dtype=np.int64)
+        self._values = np.empty(
+            (buffer_size, len(self.columns)), dtype=np.float64
+        )
+        self._rows = 0
+        self._files = [
+            open(os.path.join(self.path, "%s.bin" % col), "wb")
+            for col in ["time"] + self.columns
+        ]
+
+    def _write(self, time, balance, profits):
+        row = self._rows
+        self._times[row] = pd.Timestamp(time).value
+        values = self._values[row]
+        values[0] = balance
+        for i, profit in enumerate(profits):
+            values[i + 1] = 0.0 if profit is None else profit
+        if self.echo:
+            print("%s,%s" % (time, ",".join("%s" % v for v in values)))
+        self._rows += 1
+        if self._rows == self.buffer_size:
+            self._flush()
+
+    def _flush(self):
+        rows = self._rows
+        self._times[:rows].tofile(self._files[0])
+        for i, out_file in enumerate(self._files[1:]):
+            self._values[:rows, i].tofile(out_file)
+        self._rows = 0
+
+    def _close(self):
+        self._flush()
+        for out_file in self._files:
+            out_file.close()
+
+    def load(self):
+        times = np.fromfile(
+            os.path.join(self.path, "time.bin"), dtype=np.int64
+        )
+        data = dict(
+            (col, np.fromfile(
+                os.path.join(self.path, "%s.bin" % col), dtype=np.float64
+            )) for col in self.columns
+        )
+        df = pd.DataFrame(
+            data, index=pd.to_datetime(times), columns=self.columns
+        )
+        df.index.name = "Timestamp"
+        return df
@@ -0,0 +1,66 @@
+"""
+Compares the ticks per second of the event queue backtest
+engine with the batched engine, running the
+MovingAverageCrossStrategy over the data in CSV_DATA_DIR
+(or the directory given on the command line):
+
+    python benchmark_backtest.py [PAIR] [CSV_DIR] [BATCH_SIZE]
+
+The console output of the backtest is discarded
+so that it does not dominate the measurement.
+
+The batched engine only removes the queue overhead, the
+per-tick price, position and equity updates remain, so
+expect it to be modestly (about 1.2x) rather than many
+times faster.
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import time
+
+from qsforex import settings
+from qsforex.backtest.backtest import Backtest
+from qsforex.execution.execution import SimulatedExecution
+from qsforex.library.price_handlers import HistoricCSVPriceHandler
+from qsforex.portfolio.portfolio import Portfolio
+from qsforex.strategy.strategy import MovingAverageCrossStrategy
+
+
+def ticks_per_second(pairs, csv_dir, batch_size):
+    backtest = Backtest(
+        pairs, HistoricCSVPriceHandler,
+        MovingAverageCrossStrategy,
+        {"short_window": 500, "long_window": 2000},
+        Portfolio, SimulatedExecution,
+        equity=settings.EQUITY, csv_dir=csv_dir, batch_size=batch_size
+    )
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        start = time.time()
+        if batch_size is None:
+            backtest._run_backtest()
+        else:
+            backtest._run_batch_backtest()
+        elapsed = time.time() - start
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    backtest.portfolio.recorder.close()
+    return backtest.strategy.pairs_dict[pairs[0]]["ticks"] / elapsed
+
+
+if __name__ == "__main__":
+    pairs = [sys.argv[1] if len(sys.argv) > 1 else settings.PAIRS[0]]
+    csv_dir = sys.argv[2] if len(sys.argv) > 2 else settings.CSV_DATA_DIR
+    batch_size = int(sys.argv[3]) if len(sys.argv) > 3 else 10000
+
+    print("Queue engine:   %10.0f ticks/sec" % (
+        ticks_per_second(pairs, csv_dir, None))
+    )
+    print("Batched engine: %10.0f ticks/sec" % (
+        ticks_per_second(pairs, csv_dir, batch_size))
+    )
@@ -0,0 +1,120 @@
+"""
+Measures the cost of allocating TickEvents and of dispatching
+events on their type, comparing the original (per-instance
+__dict__, string type) events with the __slots__ events of
+qsforex.library.events and their integer type_id:
+
+    python benchmark_events.py [N]
+"""
+
+from __future__ import print_function
+
+from decimal import Decimal
+import sys
+import timeit
+import tracemalloc
+
+from qsforex.library.events import OrderEvent, SignalEvent, TickEvent
+
+
+class DictTickEvent(object):
+    """
+    The original TickEvent, with a __dict__ and an instance type.
+    """
+
+    def __init__(self, instrument, time, bid, ask):
+        self.type = 'TICK'
+        self.instrument = instrument
+        self.time = time
+        self.bid = bid
+        self.ask = ask
+
+
+def allocate(event_class, n):
+    bid, ask = Decimal("1.50000"), Decimal("1.50020")
+    return [event_class("GBPUSD", i, bid, ask) for i in range(n)]
+
+
+def bytes_per_event(event_class, n):
+    tracemalloc.start()
+    events = allocate(event_class, n)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del events
+    return size / float(n)
+
+
+def dispatch_on_string(events):
+    counts = [0, 0, 0]
+    for event in events:
+        if event.type == 'TICK':
+            counts[0] += 1
+        elif event.type == 'SIGNAL':
+            counts[1] += 1
+        elif event.type == 'ORDER':
+            counts[2] += 1
+    return counts
+
+
+def dispatch_on_type_id(events):
+    counts = [0, 0, 0]
+    tick, signal, order = (
+        TickEvent.type_id, SignalEvent.type_id, OrderEvent.type_id
+    )
+    for event in events:
+        type_id = event.type_id
+        if type_id == tick:
+            counts[0] += 1
+        elif type_id == signal:
+            counts[1] += 1
+        elif type_id == order:
+            counts[2] += 1
+    return counts
+
+
+def dispatch_on_table(events):
+    counts = [0, 0, 0, 0]
+    for event in events:
+        counts[event.type_id] += 1
+    return counts
+
+
+def mixed_events(n):
+    """
+    Mostly ticks with the occasional signal and order, as in a
+    backtest, where dispatching a tick is the common case.
+    """
+    events = allocate(TickEvent, n)
+    for i in range(0, n, 100):
+        events[i] = SignalEvent("GBPUSD", "market", "buy", i)
+        events[i + 1] = OrderEvent("GBPUSD", 1000, "market", "buy")
+    return events
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    repeat = 5
+
+    # The classes are timed alternately, as the allocator state
+    # (and a noisy machine) otherwise favours one or the other
+    classes = (("dict", DictTickEvent), ("slots", TickEvent))
+    best = dict((name, float("inf")) for name, event_class in classes)
+    for i in range(repeat):
+        for name, event_class in classes:
+            best[name] = min(best[name], timeit.timeit(
+                lambda: allocate(event_class, n), number=1
+            ))
+    for name, event_class in classes:
+        print("Allocate %-5s: %8.1f ns/event, %6.1f bytes/event" % (
+            name, best[name] / n * 1e9, bytes_per_event(event_class, n)
+        ))
+
+    events = mixed_events(n)
+    for name, dispatch in (
+        ("string", dispatch_on_string), ("type_id", dispatch_on_type_id),
+        ("table", dispatch_on_table)
+    ):
+        seconds = min(timeit.repeat(
+            lambda: dispatch(events), number=1, repeat=repeat
+        ))
+        print("Dispatch %-7s: %8.1f ns/event" % (name, seconds / n * 1e9))
@@ -0,0 +1,71 @@
+"""
+A small benchmark comparing the original daily tick merging of
+HistoricCSVPriceHandler (pd.concat + sort_index + iterrows) with
+the k-way merge in qsforex.library.tick_merge, reported as ticks
+per second for a synthetic day of data:
+
+    python benchmark_tick_merge.py [NUM_PAIRS] [TICKS_PER_PAIR]
+"""
+
+from __future__ import print_function
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from qsforex.library.tick_merge import merge_pair_arrays
+
+
+def make_pair_arrays(num_pairs, ticks_per_pair, seed=42):
+    np.random.seed(seed)
+    start = np.datetime64("2015-01-05T00:00:00", "ns").astype(np.int64)
+    pair_arrays = []
+    for i in range(num_pairs):
+        gaps = np.random.randint(1, 2 * 10 ** 9, size=ticks_per_pair)
+        times = start + np.cumsum(gaps)
+        bids = 1.1 + np.cumsum(np.random.normal(0.0, 1e-5, ticks_per_pair))
+        pair_arrays.append(("PAIR%02d" % i, times, bids, bids + 0.0002))
+    return pair_arrays
+
+
+def concat_iterrows(pair_arrays):
+    frames = []
+    for pair, times, bids, asks in pair_arrays:
+        frame = pd.DataFrame(
+            {"Ask": asks, "Bid": bids}, index=pd.to_datetime(times)
+        )
+        frame["Pair"] = pair
+        frames.append(frame)
+    for index, row in pd.concat(frames).sort_index().iterrows():
+        row["Pair"], row["Bid"], row["Ask"]
+
+
+def k_way_merge(pair_arrays, method):
+    for index, pair, bid, ask in merge_pair_arrays(pair_arrays, method):
+        pass
+
+
+def ticks_per_second(func, pair_arrays, *args):
+    num_ticks = sum(len(pa[1]) for pa in pair_arrays)
+    start = time.time()
+    func(pair_arrays, *args)
+    return num_ticks / (time.time() - start)
+
+
+if __name__ == "__main__":
+    num_pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    ticks_per_pair = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    pair_arrays = make_pair_arrays(num_pairs, ticks_per_pair)
+
+    print("%s pairs x %s ticks" % (num_pairs, ticks_per_pair))
+    print("concat + sort_index + iterrows: %12.0f ticks/sec" % (
+        ticks_per_second(concat_iterrows, pair_arrays))
+    )
+    print("k-way merge (argsort):          %12.0f ticks/sec" % (
+        ticks_per_second(k_way_merge, pair_arrays, "argsort"))
+    )
+    print("k-way merge (heap):             %12.0f ticks/sec" % (
+        ticks_per_second(k_way_merge, pair_arrays, "heap"))
+    )
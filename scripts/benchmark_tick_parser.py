@@ -0,0 +1,117 @@
+"""
+Measures the lines per second of StreamingForexPrices.process_line
+(see qsforex.library.tick_parser) against the original json.loads
+based conversion, on a recorded OANDA price stream (one frame per
+line) or, if none is given, a synthetic one in the same format
+with a heartbeat every 20 lines:
+
+    python benchmark_tick_parser.py [STREAM_FILE] [N]
+"""
+
+from __future__ import print_function
+
+from decimal import getcontext, ROUND_HALF_DOWN
+import json
+import logging
+import sys
+import timeit
+
+import numpy as np
+
+from qsforex.library.events import TickEvent
+from qsforex.library.price_handlers import StreamingForexPrices
+
+
+class JSONStreamingForexPrices(StreamingForexPrices):
+    """
+    The original conversion of a line of the stream.
+    """
+
+    def process_line(self, line):
+        if line:
+            try:
+                dline = line.decode('utf-8')
+                msg = json.loads(dline)
+            except Exception as e:
+                self.logger.error(
+                    "Caught exception when converting message into json: %s" % str(
+                        e)
+                )
+                return
+            if "instrument" in msg or "tick" in msg:
+                self.logger.debug(msg)
+                getcontext().rounding = ROUND_HALF_DOWN
+                instrument = msg["tick"]["instrument"].replace("_", "")
+                time = msg["tick"]["time"]
+                bid = self.to_price(msg["tick"]["bid"])
+                ask = self.to_price(msg["tick"]["ask"])
+                self.prices.set_quote(instrument, bid, ask, time)
+                return TickEvent(instrument, time, bid, ask)
+            else:
+                return None
+
+
+def synthetic_stream(n, seed=42):
+    np.random.seed(seed)
+    pairs = ["EUR_USD", "GBP_USD", "USD_JPY"]
+    mids = {"EUR_USD": 1.1, "GBP_USD": 1.5, "USD_JPY": 120.0}
+    lines = []
+    for i in range(n):
+        stamp = "2015-06-01T12:%02d:%02d.%06dZ" % (
+            i // 60000 % 60, i // 1000 % 60, i % 1000 * 1000
+        )
+        if i % 20 == 0:
+            lines.append(json.dumps(
+                {"heartbeat": {"time": stamp}}, separators=(",", ":")
+            ).encode("utf-8"))
+            continue
+        pair = pairs[i % 3]
+        mids[pair] *= 1.0 + np.random.normal(0.0, 1e-5)
+        digits = 3 if pair == "USD_JPY" else 5
+        lines.append(json.dumps({"tick": {
+            "instrument": pair, "time": stamp,
+            "bid": round(mids[pair], digits),
+            "ask": round(mids[pair] + 2 * 10 ** -digits, digits)
+        }}, separators=(",", ":")).encode("utf-8"))
+    return lines
+
+
+def make_handler(handler_class, pairs):
+    ph = handler_class()
+    ph.pairs = pairs
+    ph.prices = ph._set_up_prices_dict()
+    ph.logger = logging.getLogger(__name__)
+    return ph
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    if len(sys.argv) > 1 and sys.argv[1] != "-":
+        with open(sys.argv[1], "rb") as f:
+            lines = [line.strip() for line in f if line.strip()]
+    else:
+        lines = synthetic_stream(n)
+    pairs = ["EURUSD", "GBPUSD", "USDJPY"]
+
+    results = {}
+    for name, handler_class in (
+        ("json", JSONStreamingForexPrices), ("parser", StreamingForexPrices)
+    ):
+        ph = make_handler(handler_class, pairs)
+        process_line = ph.process_line
+        results[name] = [process_line(line) for line in lines]
+        seconds = min(timeit.repeat(
+            lambda: [process_line(line) for line in lines],
+            number=1, repeat=3
+        ))
+        print("%-6s: %10.0f lines/s, %6.2f us/line" % (
+            name, len(lines) / seconds, seconds / len(lines) * 1e6
+        ))
+    same = all(
+        (a is None and b is None) or
+        (a is not None and b is not None and
+         (a.instrument, a.time, a.bid, a.ask) ==
+         (b.instrument, b.time, b.bid, b.ask))
+        for a, b in zip(results["json"], results["parser"])
+    )
+    print("Identical ticks: %s" % same)
@@ -1,14 +1,26 @@
+"""
+Generates a month of simulated ticks (see TickSimulator) for
+one or more pairs as 'PAIR_YYYYMMDD.csv' files in CSV_DATA_DIR,
+or into the binary tick store at TICK_STORE_DIR with "store":
+
+    python generate_simulated_pair.py [PAIR,PAIR,...] [YEAR MONTH]
+        [SEED] [PROCESSES] [csv|store]
+
+The pairs are given a correlation of 0.5 and switch between a
+calm and a volatile regime. Each day is seeded separately, so
+the output does not depend on the number of processes.
+"""
+
 from __future__ import print_function
 
 import calendar
-import os.path
 import sys
 from datetime import datetime
 
 import numpy as np
 
 from qsforex import settings
-from qsforex.library.price_handlers import RandomPriceHandler
+from qsforex.library.simulation import TickSimulator, generate_days
 
 
 def month_weekdays(year_int, month_int):
@@ -19,54 +31,36 @@ def month_weekdays(year_int, month_int):
     cal = calendar.Calendar()
     return [
         d for d in cal.itermonthdates(year_int, month_int)
-        if d.weekday() < 5 and d.year == year_int
+        if d.weekday() < 5 and d.year == year_int and d.month == month_int
     ]
 
 
 if __name__ == "__main__":
-    try:
-        pair = sys.argv[1]
-    except:
-        pair = settings.PAIRS[0]
-
-    rph = RandomPriceHandler()
-    rph.initialize()
+    pairs = (
+        sys.argv[1] if len(sys.argv) > 1 else settings.PAIRS[0]
+    ).split(",")
+    if len(sys.argv) > 3:
+        year, month = int(sys.argv[2]), int(sys.argv[3])
+    else:
+        year, month = datetime.now().year, datetime.now().month
+    seed = int(sys.argv[4]) if len(sys.argv) > 4 else 42
+    processes = int(sys.argv[5]) if len(sys.argv) > 5 else 1
+    output = sys.argv[6] if len(sys.argv) > 6 else "csv"
 
-    days = month_weekdays(datetime.now().year,
-                          datetime.now().month)
-
-    rph.current_time = datetime(
-        days[0].year, days[0].month, days[0].day, 0, 0, 0,
+    correlation = np.full((len(pairs), len(pairs)), 0.5)
+    np.fill_diagonal(correlation, 1.0)
+    simulator = TickSimulator(
+        pairs, seed=seed, correlation=correlation,
+        regime_vols=(1.0, 3.0), regime_switch_prob=1e-4
     )
-
-    # Loop over every day in the month and create a CSV file
-    # for each day, e.g. "GBPUSD_20150101.csv"
-    for d in days:
-        rph.current_time = rph.current_time.replace(day=d.day)
-        filename = os.path.join(
-            settings.CSV_DATA_DIR,
-            "%s_%s.csv" % (
-                pair, d.strftime("%Y%m%d")
-            )
-        )
-        outfile = open(filename,"w")
-        print(filename)
-        outfile.write("Time,Ask,Bid,AskVolume,BidVolume\n")
-
-        # Create the random walk for the bid/ask prices
-        # with fixed spread between them
-        while True:
-            tev = rph()
-            if rph.current_time.day != d.day:
-                outfile.close()
-                break
-            else:
-                ask_volume = 1.0 + np.random.uniform(0.0, 2.0)
-                bid_volume = 1.0 + np.random.uniform(0.0, 2.0)
-
-                line = "%s,%s,%s,%s,%s\n" % (
-                    rph.current_time.strftime("%d.%m.%Y %H:%M:%S.%f")[:-3],
-                    "%0.5f" % tev.ask, "%0.5f" % tev.bid,
-                    "%0.2f00" % ask_volume, "%0.2f00" % bid_volume
-                )
-                outfile.write(line)
+    days = month_weekdays(year, month)
+    if output == "store":
+        kwargs = {"store_dir": settings.TICK_STORE_DIR}
+    else:
+        kwargs = {"csv_dir": settings.CSV_DATA_DIR}
+    for date, ticks in generate_days(
+        simulator, days, processes=processes, **kwargs
+    ):
+        print(date, ", ".join(
+            "%s: %d ticks" % (pair, n) for pair, n in sorted(ticks.items())
+        ))
@@ -0,0 +1,29 @@
+"""
+Converts the daily 'PAIR_YYYYMMDD.csv' tick files of the CSV
+data directory into the columnar binary tick store used by the
+HistoricTickStorePriceHandler.
+
+This only needs to be run once (and again whenever new CSV
+files are added, in which case only the new days are ingested):
+
+    python ingest_tick_store.py [PAIR PAIR ...]
+"""
+
+from __future__ import print_function
+
+import sys
+
+from qsforex import settings
+from qsforex.library.tick_store import ingest_csv_dir
+
+
+if __name__ == "__main__":
+    pairs = sys.argv[1:] or None
+    ingested = ingest_csv_dir(
+        settings.CSV_DATA_DIR, settings.TICK_STORE_DIR, pairs=pairs
+    )
+    for pair, date_str in ingested:
+        print("Ingested %s %s" % (pair, date_str))
+    print("%s pair-days written to %s" % (
+        len(ingested), settings.TICK_STORE_DIR)
+    )
@@ -0,0 +1,52 @@
+"""
+Load-tests the live components (the asyncio price stream, the
+trading loop and the OANDA execution handler) against a local
+ReplayServer, replaying the ticks of the CSV_DATA_DIR files (or
+of a RandomPriceHandler with "random") at the given speed, a
+multiple of real time or "max":
+
+    python replay_harness.py [PAIR] [CSV_DIR|random] [SPEED] [MAX_TICKS]
+
+e.g. python replay_harness.py EURUSD random max 100000
+"""
+
+from __future__ import print_function
+
+import sys
+
+from qsforex import settings
+from qsforex.library.price_handlers import (
+    HistoricCSVPriceHandler, RandomPriceHandler
+)
+from qsforex.library.replay import replay_trading, tick_frames
+from qsforex.strategy.strategy import TestStrategy
+
+
+if __name__ == "__main__":
+    pair = sys.argv[1] if len(sys.argv) > 1 else "EURUSD"
+    source = sys.argv[2] if len(sys.argv) > 2 else settings.CSV_DATA_DIR
+    speed = sys.argv[3] if len(sys.argv) > 3 else "max"
+    max_ticks = int(sys.argv[4]) if len(sys.argv) > 4 else 100000
+    speed = None if speed == "max" else float(speed)
+
+    if source == "random":
+        ph = RandomPriceHandler()
+        ph.initialize(instrument=pair)
+    else:
+        ph = HistoricCSVPriceHandler()
+        ph.initialize([pair], source)
+    print("Loading %d ticks..." % max_ticks)
+    frames = tick_frames(iter(ph.run, None), max_ticks)
+
+    print("Replaying %d ticks at %s..." % (
+        len(frames), "max speed" if speed is None else "%gx" % speed
+    ))
+    report = replay_trading(frames, [pair], TestStrategy, speed)
+    for key in sorted(report):
+        value = report[key]
+        if key.endswith(("_p50", "_p90", "_p99", "_max")):
+            print("%-24s %10.1f us" % (key, value * 1e6))
+        elif isinstance(value, float):
+            print("%-24s %10.2f" % (key, value))
+        else:
+            print("%-24s %10d" % (key, value))
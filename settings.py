@@ -18,6 +18,8 @@ qsforexdir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentfram
 
 CSV_DATA_DIR = qsforexdir + "/csv_files"
 OUTPUT_RESULTS_DIR = qsforexdir + "/output_dir"
+TICK_STORE_DIR = qsforexdir + "/tick_store"
+BAR_CACHE_DIR = qsforexdir + "/bar_cache"
 
 DOMAIN = os.environ.get('OANDA_API_DOMAIN', None)
 STREAM_DOMAIN = ENVIRONMENTS["streaming"][DOMAIN]
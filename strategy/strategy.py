@@ -1,6 +1,9 @@
 import copy
 
-from qsforex.event.event import SignalEvent
+import numpy as np
+from scipy.signal import lfilter
+
+from qsforex.library.events import SignalEvent
 
 
 class TestStrategy(object):
@@ -25,12 +28,14 @@ class TestStrategy(object):
             if self.ticks % 5 == 0:
                 if self.invested == False:
                     signal = SignalEvent(
-                        self.pairs[0], "market", "buy", event.time)
+                        self.pairs[0], "market", "buy", event.time,
+                        event.received)
                     self.events.put(signal)
                     self.invested = True
                 else:
                     signal = SignalEvent(
-                        self.pairs[0], "market", "sell", event.time)
+                        self.pairs[0], "market", "sell", event.time,
+                        event.received)
                     self.events.put(signal)
                     self.invested = False
             self.ticks += 1
@@ -51,6 +56,10 @@ class MovingAverageCrossStrategy(object):
     The strategy uses a rolling SMA calculation in order to
     increase efficiency by eliminating the need to call two
     full moving average calculations on each tick.
+
+    It can equally be run on bars (BarEvents, see
+    HistoricBarPriceHandler), using their closing bid prices,
+    in which case the windows are measured in bars.
     """
 
     def __init__(
@@ -78,30 +87,179 @@ class MovingAverageCrossStrategy(object):
     def calc_rolling_sma(self, sma_m_1, window, price):
         return ((sma_m_1 * (window - 1)) + price) / window
 
-    def calculate_signals(self, event):
-        if event.type == 'TICK':
-            pair = event.instrument
-            price = event.bid
-            pd = self.pairs_dict[pair]
-            if pd["ticks"] == 0:
-                pd["short_sma"] = price
-                pd["long_sma"] = price
-            else:
-                pd["short_sma"] = self.calc_rolling_sma(
-                    pd["short_sma"], self.short_window, price
+    def _update_pair(self, event):
+        """
+        Updates the rolling SMAs of the tick's pair and returns
+        a SignalEvent if the tick causes a crossover, else None.
+        """
+        pair = event.instrument
+        price = event.bid
+        # Bars have no received stamp
+        received = getattr(event, "received", None)
+        pd = self.pairs_dict[pair]
+        signal = None
+        if pd["ticks"] == 0:
+            pd["short_sma"] = price
+            pd["long_sma"] = price
+        else:
+            pd["short_sma"] = self.calc_rolling_sma(
+                pd["short_sma"], self.short_window, price
+            )
+            pd["long_sma"] = self.calc_rolling_sma(
+                pd["long_sma"], self.long_window, price
+            )
+        # Only start the strategy when we have created an accurate short
+        # window
+        if pd["ticks"] > self.short_window:
+            if pd["short_sma"] > pd["long_sma"] and not pd["invested"]:
+                signal = SignalEvent(
+                    pair, "market", "buy", event.time, received
                 )
-                pd["long_sma"] = self.calc_rolling_sma(
-                    pd["long_sma"], self.long_window, price
+                pd["invested"] = True
+            if pd["short_sma"] < pd["long_sma"] and pd["invested"]:
+                signal = SignalEvent(
+                    pair, "market", "sell", event.time, received
                 )
-            # Only start the strategy when we have created an accurate short
-            # window
-            if pd["ticks"] > self.short_window:
-                if pd["short_sma"] > pd["long_sma"] and not pd["invested"]:
-                    signal = SignalEvent(pair, "market", "buy", event.time)
-                    self.events.put(signal)
-                    pd["invested"] = True
-                if pd["short_sma"] < pd["long_sma"] and pd["invested"]:
-                    signal = SignalEvent(pair, "market", "sell", event.time)
-                    self.events.put(signal)
-                    pd["invested"] = False
-            pd["ticks"] += 1
+                pd["invested"] = False
+        pd["ticks"] += 1
+        return signal
+
+    def calculate_signals(self, event):
+        if event.type == 'TICK' or event.type == 'BAR':
+            signal = self._update_pair(event)
+            if signal is not None:
+                self.events.put(signal)
+
+    def calculate_signals_batch(self, ticks):
+        """
+        Opts in to the batched backtest engine. Processes a whole
+        block of ticks and returns the generated signals as a list
+        of (index, SignalEvent) tuples, where index is the position
+        of the generating tick within the block.
+        """
+        signals = []
+        for i, event in enumerate(ticks):
+            signal = self._update_pair(event)
+            if signal is not None:
+                signals.append((i, signal))
+        return signals
+
+
+class VectorisedMovingAverageCrossStrategy(MovingAverageCrossStrategy):
+    """
+    A vectorised implementation of the MovingAverageCrossStrategy,
+    intended for parameter research, which emits exactly the same
+    sequence of SignalEvents as the tick-by-tick version.
+
+    The rolling SMA recurrence sma_t = ((w - 1) * sma_t-1 + p_t) / w
+    is a first order IIR filter, so both SMAs of a whole array of
+    bid prices are calculated at once with scipy.signal.lfilter,
+    carrying the filter state over from one array to the next.
+    The crossovers are then found from the sign changes of the
+    difference between the two SMAs.
+
+    The filters are applied to the deviations of the prices from
+    the first price seen for each pair, which keeps the SMAs of a
+    flat price series exactly equal, as they are in the Decimal
+    calculation. Differences below 'tolerance' count as equal.
+    """
+
+    def __init__(
+        self, pairs, events,
+        short_window=500, long_window=2000, tolerance=1e-12
+    ):
+        super(VectorisedMovingAverageCrossStrategy, self).__init__(
+            pairs, events, short_window, long_window
+        )
+        self.tolerance = tolerance
+        for p in self.pairs:
+            self.pairs_dict[p]["ref_price"] = None
+            self.pairs_dict[p]["short_dev"] = 0.0
+            self.pairs_dict[p]["long_dev"] = 0.0
+
+    @staticmethod
+    def _rolling_sma(deviations, window, prev):
+        r = (window - 1.0) / window
+        sma, zf = lfilter([1.0 / window], [1.0, -r], deviations, zi=[r * prev])
+        return sma
+
+    def calculate_signals_day(self, pair, times, bids):
+        """
+        Calculates the signals of a whole array of (time ordered)
+        ticks of a single pair, e.g. a full day, and returns them
+        as a list of (index, SignalEvent) tuples where index is the
+        position of the generating tick within the arrays.
+
+        Parameters:
+        pair - The currency pair, e.g. "EURUSD".
+        times - A sequence of the tick times.
+        bids - An array of the bid prices (as floats).
+        """
+        bids = np.asarray(bids, dtype=np.float64)
+        n = len(bids)
+        if n == 0:
+            return []
+        pd = self.pairs_dict[pair]
+        if pd["ref_price"] is None:
+            pd["ref_price"] = bids[0]
+        deviations = bids - pd["ref_price"]
+        short_sma = self._rolling_sma(
+            deviations, self.short_window, pd["short_dev"]
+        )
+        long_sma = self._rolling_sma(
+            deviations, self.long_window, pd["long_dev"]
+        )
+        pd["short_dev"] = short_sma[-1]
+        pd["long_dev"] = long_sma[-1]
+        pd["short_sma"] = pd["ref_price"] + short_sma[-1]
+        pd["long_sma"] = pd["ref_price"] + long_sma[-1]
+
+        # Only start the strategy when we have created an accurate
+        # short window, i.e. from the (short_window + 1)th tick on
+        start = max(self.short_window + 1 - pd["ticks"], 0)
+        pd["ticks"] += n
+        if start >= n:
+            return []
+        diff = short_sma[start:] - long_sma[start:]
+        signs = np.sign(diff)
+        signs[np.abs(diff) <= self.tolerance] = 0
+
+        # The position is long exactly when the most recent non-zero
+        # sign is positive, so signals fire where that sign changes
+        idx = np.nonzero(signs)[0]
+        if len(idx) == 0:
+            return []
+        vals = signs[idx]
+        prev = np.empty_like(vals)
+        prev[0] = 1 if pd["invested"] else -1
+        prev[1:] = vals[:-1]
+        fire = vals != prev
+        pd["invested"] = bool(vals[-1] > 0)
+        return [
+            (i, SignalEvent(
+                pair, "market", "buy" if v > 0 else "sell", times[i]
+            )) for i, v in zip(
+                (idx[fire] + start).tolist(), vals[fire].tolist()
+            )
+        ]
+
+    def calculate_signals_batch(self, ticks):
+        instruments = np.array([t.instrument for t in ticks], dtype=object)
+        signals = []
+        for pair in self.pairs:
+            idx = np.nonzero(instruments == pair)[0]
+            if len(idx) == 0:
+                continue
+            pair_ticks = [ticks[i] for i in idx]
+            pair_signals = self.calculate_signals_day(
+                pair, [t.time for t in pair_ticks],
+                [float(t.bid) for t in pair_ticks]
+            )
+            signals.extend((int(idx[i]), s) for i, s in pair_signals)
+        signals.sort(key=lambda s: s[0])
+        return signals
+
+    def calculate_signals(self, event):
+        if event.type == 'TICK' or event.type == 'BAR':
+            for i, signal in self.calculate_signals_batch([event]):
+                self.events.put(signal)
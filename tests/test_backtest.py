@@ -0,0 +1,181 @@
+import datetime
+from decimal import Decimal
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from qsforex.backtest.backtest import Backtest
+from qsforex.library.price_handlers import HistoricCSVPriceHandler
+from qsforex.portfolio.portfolio import Portfolio
+from qsforex.portfolio.recorder import NumpyEquityRecorder
+from qsforex.strategy.strategy import MovingAverageCrossStrategy, TestStrategy
+
+
+def write_random_csv_files(csv_dir, pairs, dates, ticks_per_day, seed=42):
+    """
+    Writes a random walk of ticks for each pair and date into
+    csv_dir, using the DukasCopy 'PAIR_YYYYMMDD.csv' format.
+    """
+    np.random.seed(seed)
+    for pair in pairs:
+        price = 1.5
+        for date in dates:
+            times = np.sort(np.random.uniform(0, 86000, ticks_per_day))
+            filename = os.path.join(
+                csv_dir, "%s_%s.csv" % (pair, date.strftime("%Y%m%d"))
+            )
+            with open(filename, "w") as f:
+                f.write("Time,Ask,Bid,AskVolume,BidVolume\n")
+                for t in times:
+                    price += np.random.normal(0.0, 0.0002)
+                    stamp = date + datetime.timedelta(seconds=t)
+                    f.write("%s,%0.5f,%0.5f,1.00,1.00\n" % (
+                        stamp.strftime("%d.%m.%Y %H:%M:%S.%f")[:-3],
+                        price + 0.0002, price
+                    ))
+
+
+class CountingStrategy(object):
+
+    def __init__(self, pairs, events):
+        self.ticks = 0
+
+    def calculate_signals(self, event):
+        self.ticks += 1
+
+
+class RecordingExecution(object):
+
+    def __init__(self):
+        self.orders = []
+
+    def execute_order(self, event):
+        self.orders.append(str(event))
+
+
+class TestBatchBacktest(unittest.TestCase):
+
+    def setUp(self):
+        self.csv_dir = tempfile.mkdtemp()
+        self.pairs = ["GBPUSD", "EURUSD"]
+        write_random_csv_files(
+            self.csv_dir, self.pairs,
+            [datetime.datetime(2015, 6, 1), datetime.datetime(2015, 6, 2)],
+            250
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.csv_dir)
+
+    def run_backtest(self, strategy, strategy_params, batch_size):
+        backtest = Backtest(
+            self.pairs, HistoricCSVPriceHandler,
+            strategy, strategy_params,
+            Portfolio, RecordingExecution,
+            equity=Decimal("100000.00"),
+            csv_dir=self.csv_dir, batch_size=batch_size
+        )
+        if batch_size is None:
+            backtest._run_backtest()
+        else:
+            backtest._run_batch_backtest()
+        backtest.portfolio.recorder.close()
+        return backtest
+
+    def assert_same_run(self, strategy, strategy_params):
+        queued = self.run_backtest(strategy, strategy_params, None)
+        self.assertTrue(len(queued.execution.orders) > 2)
+        for batch_size in (1, 7, 1000):
+            batched = self.run_backtest(strategy, strategy_params, batch_size)
+            self.assertEqual(batched.execution.orders, queued.execution.orders)
+            self.assertEqual(batched.portfolio.balance, queued.portfolio.balance)
+
+    def test_batch_strategy_matches_queue(self):
+        self.assert_same_run(
+            MovingAverageCrossStrategy, {"short_window": 5, "long_window": 20}
+        )
+
+    def test_tick_strategy_matches_queue(self):
+        self.assert_same_run(TestStrategy, {})
+
+    def test_max_iters_limits_ticks(self):
+        backtest = Backtest(
+            self.pairs, HistoricCSVPriceHandler, CountingStrategy, {},
+            Portfolio, RecordingExecution, equity=Decimal("100000.00"),
+            csv_dir=self.csv_dir, batch_size=30, max_iters=100
+        )
+        backtest._run_batch_backtest()
+        backtest.portfolio.recorder.close()
+        self.assertEqual(backtest.strategy.ticks, 100)
+
+    def test_price_handler_is_closed(self):
+        output_dir = tempfile.mkdtemp()
+        try:
+            backtest = Backtest(
+                self.pairs, HistoricCSVPriceHandler, CountingStrategy, {},
+                Portfolio, RecordingExecution, equity=Decimal("100000.00"),
+                csv_dir=self.csv_dir, batch_size=30, max_iters=100,
+                output_dir=output_dir, equity_file=False,
+                data_params={"prefetch_days": 1}
+            )
+            backtest.simulate_trading()
+        finally:
+            shutil.rmtree(output_dir)
+        # Stopped on the first day, with the second one prefetched
+        self.assertEqual(backtest.strategy.ticks, 100)
+        self.assertIsNone(backtest.ticker._executor)
+
+    def test_statistics_without_equity_file(self):
+        output_dir = tempfile.mkdtemp()
+        try:
+            results = {}
+            for equity_file in (True, False):
+                backtest = Backtest(
+                    self.pairs, HistoricCSVPriceHandler,
+                    MovingAverageCrossStrategy,
+                    {"short_window": 5, "long_window": 20},
+                    Portfolio, RecordingExecution,
+                    equity=Decimal("100000.00"), csv_dir=self.csv_dir,
+                    batch_size=100, output_dir=output_dir,
+                    equity_file=equity_file
+                )
+                results[equity_file] = backtest.simulate_trading()
+                stats = backtest.portfolio.statistics
+        finally:
+            shutil.rmtree(output_dir)
+        equity_df, max_dd, dd_duration = results[True]
+        self.assertIsNone(results[False][0])
+        self.assertAlmostEqual(results[False][1], max_dd, places=10)
+        self.assertEqual(results[False][2], dd_duration)
+        self.assertEqual(stats.periods, len(equity_df))
+        self.assertAlmostEqual(
+            stats.last_total, equity_df["Total"].iloc[-1], places=6
+        )
+
+    def test_numpy_recorder_matches_csv(self):
+        output_dir = tempfile.mkdtemp()
+        try:
+            results = []
+            for recorder in (None, NumpyEquityRecorder(output_dir, self.pairs)):
+                backtest = Backtest(
+                    self.pairs, HistoricCSVPriceHandler,
+                    MovingAverageCrossStrategy,
+                    {"short_window": 5, "long_window": 20},
+                    Portfolio, RecordingExecution,
+                    equity=Decimal("100000.00"), csv_dir=self.csv_dir,
+                    batch_size=100, output_dir=output_dir, recorder=recorder
+                )
+                results.append(backtest.simulate_trading())
+        finally:
+            shutil.rmtree(output_dir)
+        (csv_df, csv_dd, csv_dur), (np_df, np_dd, np_dur) = results
+        np.testing.assert_allclose(np_df["Total"], csv_df["Total"])
+        self.assertAlmostEqual(np_dd, csv_dd, places=10)
+        self.assertEqual(np_dur, csv_dur)
+
+
+if __name__ == "__main__":
+    unittest.main()
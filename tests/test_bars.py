@@ -0,0 +1,167 @@
+import datetime
+from decimal import Decimal
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from qsforex.backtest.backtest import Backtest
+from qsforex.library.bars import BarCache, BarSpec, make_bars
+from qsforex.library.price_handlers import HistoricBarPriceHandler
+from qsforex.library.tick_store import TickStore, ingest_csv_dir
+from qsforex.portfolio.portfolio import Portfolio
+from qsforex.strategy.strategy import MovingAverageCrossStrategy
+from qsforex.tests.test_backtest import (
+    RecordingExecution, write_random_csv_files
+)
+
+
+def random_day(n=5000, seed=3):
+    np.random.seed(seed)
+    start = pd.Timestamp("2015-06-01").value
+    times = np.sort(start + np.random.randint(0, 86400 * 10 ** 9, n))
+    bid = 150000 + np.random.normal(0, 20, n).cumsum().astype(np.int64)
+    return {
+        "time": times.astype(np.int64),
+        "bid": bid,
+        "ask": bid + 20,
+        "ask_volume": np.random.uniform(0.5, 3.0, n).astype(np.float32),
+        "bid_volume": np.random.uniform(0.5, 3.0, n).astype(np.float32),
+    }
+
+
+class TestMakeBars(unittest.TestCase):
+
+    def assert_matches_groupby(self, bars, day, groups):
+        frame = pd.DataFrame({
+            "bid": day["bid"], "ask": day["ask"],
+            "volume": day["ask_volume"].astype(np.float64) + day["bid_volume"]
+        })
+        grouped = frame.groupby(groups)
+        np.testing.assert_array_equal(bars["open"], grouped["bid"].first())
+        np.testing.assert_array_equal(bars["high"], grouped["bid"].max())
+        np.testing.assert_array_equal(bars["low"], grouped["bid"].min())
+        np.testing.assert_array_equal(bars["close"], grouped["bid"].last())
+        np.testing.assert_array_equal(bars["ask"], grouped["ask"].last())
+        np.testing.assert_allclose(bars["volume"], grouped["volume"].sum())
+        np.testing.assert_array_equal(bars["ticks"], grouped.size())
+
+    def test_time_bars(self):
+        day = random_day()
+        bars = make_bars(day, BarSpec("time", 300))
+        minutes = pd.to_datetime(day["time"]).floor("300s")
+        self.assert_matches_groupby(bars, day, minutes)
+        np.testing.assert_array_equal(
+            pd.to_datetime(bars["time"]),
+            minutes.unique() + pd.Timedelta(seconds=300)
+        )
+
+    def test_tick_bars(self):
+        day = random_day()
+        bars = make_bars(day, BarSpec("tick", 64))
+        self.assert_matches_groupby(bars, day, np.arange(5000) // 64)
+        self.assertEqual(len(bars["time"]), 79)
+        self.assertEqual(bars["time"][0], day["time"][63])
+
+    def test_volume_bars(self):
+        day = random_day()
+        bars = make_bars(day, BarSpec("volume", 250.0))
+        self.assertEqual(bars["ticks"].sum(), 5000)
+        volume = day["ask_volume"].astype(np.float64) + day["bid_volume"]
+        # The bars end where the cumulative volume crosses each
+        # multiple of the bar size
+        ends = np.cumsum(volume)[np.cumsum(bars["ticks"]) - 1]
+        np.testing.assert_array_equal(
+            np.floor_divide(ends[:-1], 250.0), np.arange(1, len(ends))
+        )
+        self.assertTrue(np.all(np.abs(bars["volume"][:-1] - 250.0) < 6.0))
+
+    def test_empty_day_and_bad_spec(self):
+        day = dict((k, v[:0]) for k, v in random_day().items())
+        self.assertEqual(len(make_bars(day, BarSpec("tick", 10))["time"]), 0)
+        self.assertRaises(ValueError, BarSpec, "range", 10)
+        self.assertEqual(BarSpec("volume", 2.5).key, "volume_2p5")
+
+
+class TestBarBacktest(unittest.TestCase):
+
+    def setUp(self):
+        self.csv_dir = tempfile.mkdtemp()
+        self.store_dir = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.pairs = ["GBPUSD", "EURUSD"]
+        write_random_csv_files(
+            self.csv_dir, self.pairs,
+            [datetime.datetime(2015, 6, 1), datetime.datetime(2015, 6, 2)],
+            2000
+        )
+        ingest_csv_dir(self.csv_dir, self.store_dir)
+
+    def tearDown(self):
+        for d in (self.csv_dir, self.store_dir, self.cache_dir):
+            shutil.rmtree(d)
+
+    def test_bar_cache(self):
+        store = TickStore(self.store_dir)
+        cache = BarCache(self.cache_dir, store)
+        spec = BarSpec("time", 600)
+        self.assertFalse(cache.is_fresh("GBPUSD", "20150601", spec))
+        bars = cache.read_bars("GBPUSD", "20150601", spec)
+        self.assertTrue(cache.is_fresh("GBPUSD", "20150601", spec))
+        cached = cache.read_bars("GBPUSD", "20150601", spec)
+        for name in bars:
+            np.testing.assert_array_equal(cached[name], bars[name])
+        # Rewriting the day in the tick store invalidates the bars
+        tick_path = os.path.join(
+            self.store_dir, "GBPUSD", "20150601", "time.npy"
+        )
+        mtime = os.path.getmtime(tick_path) + 10
+        os.utime(tick_path, (mtime, mtime))
+        self.assertFalse(cache.is_fresh("GBPUSD", "20150601", spec))
+
+    def test_price_handler(self):
+        ph = HistoricBarPriceHandler()
+        ph.initialize(
+            self.pairs, self.store_dir, bar_spec=BarSpec("tick", 100),
+            cache_dir=self.cache_dir
+        )
+        bars = list(iter(ph.run, None))
+        self.assertEqual(len(bars), 80)
+        self.assertEqual(bars[0].type, "BAR")
+        times = [b.time for b in bars]
+        self.assertEqual(times, sorted(times))
+        self.assertEqual(sum(b.ticks for b in bars), 8000)
+        last = [b for b in bars if b.instrument == "EURUSD"][-1]
+        self.assertEqual(ph.prices["EURUSD"]["bid"], last.close)
+        self.assertEqual(ph.prices["EURUSD"]["ask"], last.ask)
+        self.assertTrue(last.low <= last.close <= last.high)
+
+    def test_backtest_on_bars(self):
+        orders = []
+        for batch_size in (None, 50):
+            backtest = Backtest(
+                self.pairs, HistoricBarPriceHandler,
+                MovingAverageCrossStrategy,
+                {"short_window": 3, "long_window": 10},
+                Portfolio, RecordingExecution,
+                equity=Decimal("100000.00"), csv_dir=self.store_dir,
+                batch_size=batch_size, equity_file=False,
+                data_params={
+                    "bar_spec": BarSpec("tick", 50),
+                    "cache_dir": self.cache_dir
+                }
+            )
+            if batch_size is None:
+                backtest._run_backtest()
+            else:
+                backtest._run_batch_backtest()
+            orders.append(backtest.execution.orders)
+        self.assertTrue(len(orders[0]) > 2)
+        self.assertEqual(orders[1], orders[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
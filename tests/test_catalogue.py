@@ -0,0 +1,97 @@
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from qsforex.library.catalogue import CSVCatalogue, CATALOGUE_FILENAME
+from qsforex.library.price_handlers import HistoricCSVPriceHandler
+from qsforex.tests.test_backtest import write_random_csv_files
+
+
+class TestCSVCatalogue(unittest.TestCase):
+
+    def setUp(self):
+        self.csv_dir = tempfile.mkdtemp()
+        self.dates = [datetime.datetime(2015, 6, d) for d in (1, 2, 4, 5)]
+        write_random_csv_files(
+            self.csv_dir, ["GBPUSD", "EURUSD"], self.dates, 20
+        )
+        # Pair names are not assumed to be six letters long
+        write_random_csv_files(
+            self.csv_dir, ["XAUUSD.X"], self.dates[1:2], 5
+        )
+        open(os.path.join(self.csv_dir, "README.txt"), "w").close()
+
+    def tearDown(self):
+        shutil.rmtree(self.csv_dir)
+
+    def test_refresh(self):
+        catalogue = CSVCatalogue(self.csv_dir)
+        self.assertEqual(len(catalogue.refresh()), 9)
+        self.assertEqual(catalogue.pairs(), ["EURUSD", "GBPUSD", "XAUUSD.X"])
+        self.assertEqual(
+            catalogue.dates("GBPUSD"),
+            ["20150601", "20150602", "20150604", "20150605"]
+        )
+        self.assertEqual(catalogue.dates("XAUUSD.X"), ["20150602"])
+
+        entry = catalogue.entry("EURUSD", "20150604")
+        frame = pd.read_csv(
+            os.path.join(self.csv_dir, "EURUSD_20150604.csv")
+        )
+        times = pd.to_datetime(frame["Time"], format="%d.%m.%Y %H:%M:%S.%f")
+        self.assertEqual(entry["ticks"], 20)
+        self.assertEqual(entry["first"], times.iloc[0].isoformat())
+        self.assertEqual(entry["last"], times.iloc[-1].isoformat())
+
+    def test_incremental_refresh(self):
+        CSVCatalogue(self.csv_dir).refresh()
+        self.assertTrue(
+            os.path.exists(os.path.join(self.csv_dir, CATALOGUE_FILENAME))
+        )
+        catalogue = CSVCatalogue(self.csv_dir)
+        self.assertEqual(catalogue.dates("EURUSD")[0], "20150601")
+        self.assertEqual(catalogue.refresh(), [])
+
+        write_random_csv_files(
+            self.csv_dir, ["EURUSD"], [datetime.datetime(2015, 6, 1)], 7
+        )
+        os.remove(os.path.join(self.csv_dir, "GBPUSD_20150605.csv"))
+        self.assertEqual(catalogue.refresh(), ["EURUSD_20150601.csv"])
+        self.assertEqual(catalogue.entry("EURUSD", "20150601")["ticks"], 7)
+        self.assertFalse(catalogue.has_day("GBPUSD", "20150605"))
+        self.assertEqual(CSVCatalogue(self.csv_dir).files, catalogue.files)
+
+    def test_date_range(self):
+        catalogue = CSVCatalogue(self.csv_dir)
+        catalogue.refresh()
+        self.assertEqual(
+            catalogue.dates("GBPUSD", "20150602", "20150604"),
+            ["20150602", "20150604"]
+        )
+        self.assertEqual(
+            catalogue.select_dates(
+                ["GBPUSD", "XAUUSD.X"], datetime.date(2015, 6, 3)
+            ),
+            ["20150604", "20150605"]
+        )
+        self.assertEqual(catalogue.dates("GBPUSD", end="20150531"), [])
+
+    def test_price_handler_date_range(self):
+        ph = HistoricCSVPriceHandler()
+        ph.initialize(
+            ["GBPUSD", "XAUUSD.X"], self.csv_dir,
+            start=datetime.datetime(2015, 6, 2), end="20150604"
+        )
+        ticks = list(iter(ph.run, None))
+        self.assertEqual(ph.file_dates, ["20150602", "20150604"])
+        self.assertEqual(len(ticks), 45)
+        self.assertEqual(ticks[0].time.date(), datetime.date(2015, 6, 2))
+        self.assertEqual(ticks[-1].time.date(), datetime.date(2015, 6, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
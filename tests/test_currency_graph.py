@@ -0,0 +1,119 @@
+from decimal import Decimal
+import unittest
+
+from qsforex.library.currency_graph import CurrencyGraph
+from qsforex.library.fixed_point import invert_pipettes, multiply_pipettes
+from qsforex.library.price_handlers import PriceHandler
+from qsforex.library.prices import TickerPrices
+from qsforex.portfolio.position import Position
+
+
+class TestCurrencyGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = CurrencyGraph(["EURUSD", "USDJPY", "GBPUSD", "AUDNZD"])
+
+    def test_direct_and_inverse(self):
+        self.assertEqual(self.graph.path("EUR", "USD"), (("EURUSD", False),))
+        self.assertEqual(self.graph.path("USD", "EUR"), (("EURUSD", True),))
+
+    def test_shortest_cross_path(self):
+        self.assertEqual(
+            self.graph.path("JPY", "EUR"),
+            (("USDJPY", True), ("EURUSD", True))
+        )
+        self.assertEqual(
+            self.graph.path("GBP", "JPY"),
+            (("GBPUSD", False), ("USDJPY", False))
+        )
+
+    def test_identity_and_unreachable(self):
+        self.assertEqual(self.graph.path("USD", "USD"), ())
+        self.assertRaises(KeyError, self.graph.path, "JPY", "NZD")
+
+    def test_path_is_cached(self):
+        self.assertTrue(
+            self.graph.path("JPY", "EUR") is self.graph.path("JPY", "EUR")
+        )
+
+
+class TestCrossRates(unittest.TestCase):
+
+    def setUp(self):
+        self.prices = TickerPrices(
+            ["EURUSD", "USDJPY"],
+            PriceHandler.invert_prices, PriceHandler.multiply_prices
+        )
+        self.prices.set_quote(
+            "EURUSD", Decimal("1.07832"), Decimal("1.07847"), 1
+        )
+        self.prices.set_quote(
+            "USDJPY", Decimal("123.456"), Decimal("123.478"), 2
+        )
+
+    def test_cross_rate(self):
+        jpyeur = self.prices["JPYEUR"]
+        # Multiplied at full precision and rounded once
+        self.assertEqual(
+            jpyeur["bid"],
+            (Decimal(1) / Decimal("123.456") / Decimal("1.07832")).quantize(
+                Decimal("0.00001")
+            )
+        )
+        self.assertEqual(jpyeur["time"], 2)
+        self.assertEqual(self.prices["EUREUR"]["bid"], Decimal("1.00000"))
+        self.assertFalse("JPYEUR" in self.prices)
+
+    def test_cross_rate_is_rounded_once(self):
+        # Rounding the reciprocals of the legs first gives 0.00847
+        self.prices.set_quote(
+            "EURUSD", Decimal("1.31234"), Decimal("1.31250"), 3
+        )
+        self.prices.set_quote(
+            "USDJPY", Decimal("90.01994"), Decimal("90.03000"), 4
+        )
+        self.assertEqual(self.prices["JPYEUR"]["bid"], Decimal("0.00846"))
+        prices = TickerPrices(
+            ["EURUSD", "USDJPY"], invert_pipettes, multiply_pipettes
+        )
+        prices.set_quote("EURUSD", 131234, 131250, 3)
+        prices.set_quote("USDJPY", 9001994, 9003000, 4)
+        self.assertEqual(prices["JPYEUR"]["bid"], 846)
+
+    def test_recomputed_only_when_a_leg_ticks(self):
+        jpyeur = self.prices["JPYEUR"]
+        self.assertTrue(self.prices["JPYEUR"] is jpyeur)
+        self.prices.set_quote(
+            "EURUSD", Decimal("1.20000"), Decimal("1.20010"), 3
+        )
+        self.assertFalse(self.prices["JPYEUR"] is jpyeur)
+        self.assertEqual(self.prices["JPYEUR"]["time"], 3)
+
+    def test_fixed_point_cross_rate(self):
+        prices = TickerPrices(
+            ["EURUSD", "USDJPY"], invert_pipettes, multiply_pipettes
+        )
+        prices.set_quote("EURUSD", 107832, 107847, 1)
+        prices.set_quote("USDJPY", 12345600, 12347800, 2)
+        self.assertEqual(
+            prices["JPYEUR"]["bid"],
+            int(self.prices["JPYEUR"]["bid"].scaleb(5))
+        )
+        self.assertEqual(prices["EUREUR"]["ask"], 100000)
+
+    def test_position_without_direct_quote_home_pair(self):
+        class Ticker(object):
+            pass
+        ticker = Ticker()
+        ticker.prices = self.prices
+        position = Position("EUR", "long", "USDJPY", Decimal("2000"), ticker)
+        self.assertEqual(position.quote_home_currency_pair, "JPYEUR")
+        self.assertEqual(
+            position.profit_base,
+            (position.calculate_pips() * self.prices["JPYEUR"]["bid"] *
+             Decimal("2000")).quantize(Decimal("0.00001"))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+import datetime
+from decimal import Decimal
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from qsforex.backtest.backtest import Backtest, EventDeque
+from qsforex.library.event_loop import (
+    EventLoop, EventLoopStatistics, HandlerStatistics, OrderLatency
+)
+from qsforex.library.events import OrderEvent, SignalEvent, TickEvent
+from qsforex.library.price_handlers import (
+    HistoricCSVPriceHandler, perf_counter
+)
+from qsforex.portfolio.portfolio import Portfolio
+from qsforex.strategy.strategy import MovingAverageCrossStrategy
+from qsforex.tests.test_backtest import (
+    RecordingExecution, write_random_csv_files
+)
+
+
+class TestEventLoop(unittest.TestCase):
+
+    def test_dispatch_in_registration_order(self):
+        events = EventDeque()
+        calls = []
+        loop = EventLoop(events, stats=EventLoopStatistics())
+        loop.register(TickEvent, lambda e: calls.append(("a", e.type)), "a")
+        loop.register(TickEvent, lambda e: calls.append(("b", e.type)), "b")
+        loop.register(SignalEvent, lambda e: calls.append(("s", e.type)), "s")
+        events.put(TickEvent("GBPUSD", 0, Decimal("1.5"), Decimal("1.5002")))
+        events.put(SignalEvent("GBPUSD", "market", "buy", 0))
+        events.put(OrderEvent("GBPUSD", 1000, "market", "buy"))
+        iters = loop.run(max_iters=3)
+        self.assertEqual(iters, 3)
+        self.assertEqual(
+            calls, [("a", "TICK"), ("b", "TICK"), ("s", "SIGNAL")]
+        )
+        frame = loop.stats.to_dataframe()
+        self.assertEqual(list(frame["handler"]), ["a", "b", "s"])
+        self.assertEqual(list(frame["count"]), [1, 1, 1])
+
+    def test_run_until_and_idle(self):
+        events = EventDeque()
+        ticks = [TickEvent("GBPUSD", i, 1, 1) for i in range(5)]
+        seen = []
+        loop = EventLoop(events)
+        loop.register(TickEvent, seen.append, "seen")
+        loop.run(
+            idle=lambda: events.put(ticks[len(seen)]),
+            until=lambda: len(seen) < 5
+        )
+        self.assertEqual(seen, ticks)
+
+    def test_order_latency_from_originating_tick(self):
+        events = EventDeque()
+        loop = EventLoop(events, stats=EventLoopStatistics())
+        # Signals on the first tick only, orders every signal
+        loop.register(TickEvent, lambda e: e.time == 0 and events.put(
+            SignalEvent(e.instrument, "market", "buy", e.time, e.received)
+        ), "strategy")
+        loop.register(SignalEvent, lambda e: events.put(OrderEvent(
+            e.instrument, 1000, "market", e.side, e.received
+        )), "portfolio")
+        latency = OrderLatency()
+        latency.register(loop)
+        now = perf_counter()
+        # A later tick is queued ahead of the first tick's signal
+        events.put(TickEvent("GBPUSD", 0, 1, 1, now - 1.0))
+        events.put(TickEvent("GBPUSD", 1, 1, 1, now))
+        unstamped = TickEvent("GBPUSD", 2, 1, 1)
+        events.put(unstamped)
+        loop.run(max_iters=5)
+        self.assertEqual(latency.stats.count, 1)
+        self.assertGreaterEqual(latency.stats.max, 1.0)
+        # Ticks without a stamp are stamped as they are dispatched,
+        # through the (timed) handlers of the loop
+        self.assertIsNotNone(unstamped.received)
+        self.assertIn(
+            "order_latency.on_tick", list(loop.stats.to_dataframe()["handler"])
+        )
+
+    def test_default_handler_names(self):
+        def on_tick(event):
+            pass
+        loop = EventLoop(EventDeque(), stats=EventLoopStatistics())
+        loop.register(TickEvent, on_tick)
+        loop.register(TickEvent, lambda e: None)
+        loop.register(TickEvent, EventDeque().append)
+        loop.dispatch(TickEvent("GBPUSD", 0, 1, 1))
+        names = set(loop.stats.to_dataframe()["handler"])
+        self.assertEqual(names, {
+            "TestEventLoop.test_default_handler_names.<locals>.on_tick",
+            "TestEventLoop.test_default_handler_names.<locals>.<lambda>",
+            "EventDeque.append"
+        })
+
+    def test_register_first(self):
+        events = EventDeque()
+        calls = []
+        loop = EventLoop(events)
+        loop.register(TickEvent, lambda e: calls.append("a"), "a")
+        loop.register(TickEvent, lambda e: calls.append("b"), "b", first=True)
+        loop.dispatch(TickEvent("GBPUSD", 0, 1, 1))
+        self.assertEqual(calls, ["b", "a"])
+
+    def test_percentiles(self):
+        stats = HandlerStatistics()
+        for i in range(1, 1001):
+            stats.record(i * 1e-6)
+        self.assertEqual(stats.count, 1000)
+        self.assertAlmostEqual(stats.total, 0.5005, places=10)
+        self.assertEqual(stats.max, 1e-3)
+        for q, expected in ((50, 500e-6), (90, 900e-6), (99, 990e-6)):
+            self.assertAlmostEqual(
+                stats.percentile(q) / expected, 1.0, delta=0.05
+            )
+
+
+class TestProfiledBacktest(unittest.TestCase):
+
+    def setUp(self):
+        self.csv_dir = tempfile.mkdtemp()
+        self.output_dir = tempfile.mkdtemp()
+        self.pairs = ["GBPUSD", "EURUSD"]
+        write_random_csv_files(
+            self.csv_dir, self.pairs, [datetime.datetime(2015, 6, 1)], 300
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.csv_dir)
+        shutil.rmtree(self.output_dir)
+
+    def run_backtest(self, batch_size, profile):
+        backtest = Backtest(
+            self.pairs, HistoricCSVPriceHandler,
+            MovingAverageCrossStrategy, {"short_window": 5, "long_window": 20},
+            Portfolio, RecordingExecution, equity=Decimal("100000.00"),
+            csv_dir=self.csv_dir, batch_size=batch_size,
+            output_dir=self.output_dir, equity_file=False, profile=profile
+        )
+        backtest.simulate_trading()
+        return backtest
+
+    def test_profile_matches_and_exports(self):
+        for batch_size in (None, 50):
+            plain = self.run_backtest(batch_size, False)
+            profiled = self.run_backtest(batch_size, True)
+            self.assertTrue(len(plain.execution.orders) > 2)
+            self.assertEqual(profiled.execution.orders, plain.execution.orders)
+            frame = pd.read_csv(
+                os.path.join(self.output_dir, "handler_stats.csv")
+            )
+            counts = dict(zip(frame["handler"], frame["count"]))
+            self.assertEqual(counts["portfolio.update_portfolio"], 600)
+            self.assertEqual(
+                counts["execution.execute_order"],
+                len(plain.execution.orders)
+            )
+            self.assertTrue(
+                os.path.exists(os.path.join(self.output_dir, "queue_depth.csv"))
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
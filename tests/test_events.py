@@ -0,0 +1,41 @@
+from decimal import Decimal
+import unittest
+
+from qsforex.library.events import (
+    BarEvent, EventType, OrderEvent, SignalEvent, TickEvent
+)
+
+
+class TestEvents(unittest.TestCase):
+
+    def test_slots(self):
+        tick = TickEvent("GBPUSD", "2015-06-01", Decimal("1.5"), Decimal("1.6"))
+        self.assertFalse(hasattr(tick, "__dict__"))
+        self.assertRaises(AttributeError, setattr, tick, "volume", 1.0)
+
+    def test_type_tags(self):
+        for event_class, name in (
+            (TickEvent, "TICK"), (BarEvent, "BAR"),
+            (SignalEvent, "SIGNAL"), (OrderEvent, "ORDER")
+        ):
+            self.assertEqual(event_class.type, name)
+            self.assertEqual(event_class.type_id, EventType[name])
+            self.assertIs(type(event_class.type_id), int)
+
+    def test_str(self):
+        tick = TickEvent("GBPUSD", "2015-06-01", Decimal("1.5"), Decimal("1.6"))
+        self.assertEqual(
+            str(tick),
+            "Type: TICK, Instrument: GBPUSD, Time: 2015-06-01, "
+            "Bid: 1.5, Ask: 1.6"
+        )
+        order = OrderEvent("GBPUSD", 1000, "market", "buy")
+        self.assertEqual(
+            str(order),
+            "Type: ORDER, Instrument: GBPUSD, Units: 1000, "
+            "Order Type: market, Side: buy"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
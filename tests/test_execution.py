@@ -0,0 +1,184 @@
+try:
+    import httplib
+except ImportError:
+    import http.client as httplib
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler
+except ImportError:
+    from http.server import BaseHTTPRequestHandler
+try:
+    from SocketServer import ThreadingMixIn, TCPServer
+except ImportError:
+    from socketserver import ThreadingMixIn, TCPServer
+try:
+    from urlparse import parse_qs
+except ImportError:
+    from urllib.parse import parse_qs
+import socket
+import threading
+import time
+import unittest
+
+from qsforex.execution.execution import OANDAExecutionHandler
+from qsforex.library.events import OrderEvent
+
+
+class StubOrderServer(ThreadingMixIn, TCPServer):
+    """
+    A local stand-in for the OANDA orders endpoint, which keeps
+    connections alive and records every order received. With
+    drop_after set it silently drops each connection once it has
+    served that many requests, as a server timing out idle
+    keep-alive connections would. With hang_up_on set it reads
+    that order (counting from 1) and then drops the connection
+    without replying.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, drop_after=None, delay=0.0, hang_up_on=None):
+        TCPServer.__init__(self, ("127.0.0.1", 0), StubOrderHandler)
+        self.drop_after = drop_after
+        self.hang_up_on = hang_up_on
+        self.delay = delay
+        self.connections = 0
+        self.orders = []
+        self.lock = threading.Lock()
+
+
+class StubOrderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.served = 0
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        order = dict((k, v[0]) for k, v in parse_qs(body.decode()).items())
+        time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.orders.append((self.path, order))
+            hang_up = len(self.server.orders) == self.server.hang_up_on
+        if hang_up:
+            self.close_connection = True
+            return
+        reply = b'{"instrument": "%s"}' % order["instrument"].encode()
+        self.send_response(201)
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+        self.served += 1
+        if self.server.drop_after and self.served >= self.server.drop_after:
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+class TestOANDAExecutionHandler(unittest.TestCase):
+
+    def start_server(self, lanes=False, **kwargs):
+        self.server = StubOrderServer(**kwargs)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        return OANDAExecutionHandler(
+            "127.0.0.1", "token", "1234", lanes=lanes,
+            port=self.server.server_address[1], secure=False
+        )
+
+    def test_connection_is_reused(self):
+        execution = self.start_server()
+        for i in range(5):
+            status, response = execution.execute_order(
+                OrderEvent("GBPUSD", 1000 + i, "market", "buy")
+            )
+            self.assertEqual(status, 201)
+            self.assertEqual(response, '{"instrument": "GBP_USD"}')
+        execution.close()
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(execution.pool.connections_made, 1)
+        path, order = self.server.orders[-1]
+        self.assertEqual(path, "/v1/accounts/1234/orders")
+        self.assertEqual(order, {
+            "instrument": "GBP_USD", "units": "1004",
+            "type": "market", "side": "buy"
+        })
+        self.assertEqual(len(execution.round_trips), 5)
+        self.assertEqual(execution.round_trips[0][:4], ("GBPUSD", "buy", 1000, 201))
+        self.assertTrue(all(rt[4] > 0 for rt in execution.round_trips))
+
+    def test_dropped_connections_are_reestablished(self):
+        execution = self.start_server(drop_after=2)
+        for i in range(6):
+            execution.execute_order(OrderEvent("EURUSD", 10, "market", "sell"))
+            # Let the server drop the connection before it is reused
+            time.sleep(0.01)
+        execution.close()
+        # Every order arrives exactly once
+        self.assertEqual(len(self.server.orders), 6)
+        self.assertEqual(self.server.connections, 3)
+
+    def test_orders_are_not_resent_after_a_hang_up(self):
+        execution = self.start_server(hang_up_on=2)
+        execution.execute_order(OrderEvent("EURUSD", 1, "market", "buy"))
+        # The server receives the order on the reused connection,
+        # which must not be sent again when the connection drops
+        with self.assertRaises((httplib.HTTPException, socket.error)):
+            execution.execute_order(OrderEvent("EURUSD", 2, "market", "buy"))
+        execution.execute_order(OrderEvent("EURUSD", 3, "market", "buy"))
+        execution.close()
+        self.assertEqual(
+            [o["units"] for path, o in self.server.orders], ["1", "2", "3"]
+        )
+
+    def test_lanes_send_instruments_in_parallel(self):
+        execution = self.start_server(lanes=True, delay=0.1)
+        pairs = ["GBPUSD", "EURUSD", "USDJPY", "AUDUSD"]
+        start = time.time()
+        futures = [
+            execution.execute_order(OrderEvent(pair, units, "market", "buy"))
+            for units in (1, 2) for pair in pairs
+        ]
+        execution.close()
+        elapsed = time.time() - start
+        self.assertTrue(all(f.result()[0] == 201 for f in futures))
+        self.assertLess(elapsed, 0.6)
+        for pair in pairs:
+            units = [
+                o["units"] for path, o in self.server.orders
+                if o["instrument"] == pair[:3] + "_" + pair[3:]
+            ]
+            self.assertEqual(units, ["1", "2"])
+
+    def test_lane_failures_are_reported(self):
+        # A port with nothing listening on it
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        execution = OANDAExecutionHandler(
+            "127.0.0.1", "token", "1234", lanes=True, port=port,
+            secure=False
+        )
+        with self.assertLogs("qsforex.execution.execution", "ERROR") as logs:
+            future = execution.execute_order(
+                OrderEvent("EURUSD", 1, "market", "buy")
+            )
+            execution.close()
+        self.assertIsInstance(future.exception(), socket.error)
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("Order failed", logs.output[0])
+        self.assertEqual(len(execution.round_trips), 1)
+        self.assertEqual(
+            execution.round_trips[0][:4], ("EURUSD", "buy", 1, None)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+from decimal import Decimal
+import unittest
+
+import numpy as np
+
+from qsforex.library.fixed_point import (
+    div_round_half_down, from_pipettes, invert_pipettes, to_pipettes
+)
+from qsforex.library.price_handlers import PriceHandler
+from qsforex.portfolio.portfolio import Portfolio
+from qsforex.portfolio.position import FixedPointPosition
+from qsforex.tests.test_position import TickerMock
+
+
+class FixedPointTickerMock(TickerMock):
+    """
+    The TickerMock with all of its prices held as integer pipettes.
+    """
+    fixed_point = True
+
+    def __init__(self):
+        super(FixedPointTickerMock, self).__init__()
+        for pair in self.prices:
+            self.set_prices(pair, **self.prices[pair])
+
+    def set_prices(self, pair, bid, ask):
+        self.prices[pair] = {
+            "bid": int(bid.scaleb(5)), "ask": int(ask.scaleb(5))
+        }
+
+
+PRICE_UPDATES = [
+    {
+        "GBPUSD": (Decimal("1.51878"), Decimal("1.51928")),
+        "USDGBP": (Decimal("0.65842"), Decimal("0.65821")),
+    },
+    {
+        "GBPUSD": (Decimal("1.52017"), Decimal("1.52134")),
+        "USDGBP": (Decimal("0.65782"), Decimal("0.65732")),
+    },
+    {
+        "GBPUSD": (Decimal("1.52017"), Decimal("1.52134")),
+        "USDGBP": (Decimal("0.65782"), Decimal("0.65732")),
+    },
+]
+
+
+class TestFixedPointHelpers(unittest.TestCase):
+
+    def test_div_round_half_down(self):
+        self.assertEqual(div_round_half_down(15, 10), 1)
+        self.assertEqual(div_round_half_down(16, 10), 2)
+        self.assertEqual(div_round_half_down(-15, 10), -1)
+        self.assertEqual(div_round_half_down(-16, 10), -2)
+        self.assertEqual(div_round_half_down(-14, 10), -1)
+
+    def test_conversions_match_decimal(self):
+        np.random.seed(42)
+        for x in np.round(np.random.uniform(0.5, 150.0, 500), 5):
+            dec = PriceHandler.to_decimal(x)
+            pip = to_pipettes(x)
+            self.assertEqual(from_pipettes(pip), dec)
+            inv_pair, inv_bid, inv_ask = PriceHandler.invert_prices(
+                "GBPUSD", dec, dec
+            )
+            self.assertEqual(
+                from_pipettes(invert_pipettes("GBPUSD", pip, pip)[1]),
+                inv_bid
+            )
+
+    def test_to_pipettes_rounds_as_decimal(self):
+        # Ties beyond five places round half down, not to even
+        for x in (
+            "1.100005", "1.100015", "1.100025", "0.123455", "1.1000051",
+            1.100015, 123.456785, Decimal("1.100015"), b"1.100015"
+        ):
+            raw = x.decode("ascii") if isinstance(x, bytes) else x
+            self.assertEqual(
+                from_pipettes(to_pipettes(x)), PriceHandler.to_decimal(raw)
+            )
+        self.assertEqual(to_pipettes("1.100015"), 110001)
+        self.assertEqual(to_pipettes("1.1000051"), 110001)
+
+
+class TestFixedPointPortfolio(unittest.TestCase):
+    """
+    Replays the Portfolio scenarios of test_portfolio using both
+    the Decimal and the fixed point price representations and
+    checks that they produce identical P&L at every step.
+    """
+
+    def make_portfolio(self, ticker):
+        return Portfolio(
+            ticker, {}, home_currency="GBP", leverage=20,
+            equity=Decimal("100000.00"), risk_per_trade=Decimal("0.02"),
+            backtest=False
+        )
+
+    def assert_identical(self, dec_port, fix_port, pair):
+        self.assertEqual(fix_port.balance, dec_port.balance)
+        if pair in dec_port.positions:
+            dec_ps = dec_port.positions[pair]
+            fix_ps = fix_port.positions[pair]
+            self.assertTrue(isinstance(fix_ps, FixedPointPosition))
+            self.assertEqual(fix_ps.units, dec_ps.units)
+            self.assertEqual(fix_ps.avg_price, dec_ps.avg_price)
+            self.assertEqual(
+                from_pipettes(fix_ps.calculate_pips()),
+                dec_ps.calculate_pips()
+            )
+            self.assertEqual(fix_ps.profit_base, dec_ps.profit_base)
+            self.assertEqual(fix_ps.profit_perc, dec_ps.profit_perc)
+
+    def run_scenario(self, position_type):
+        pair = "GBPUSD"
+        dec_ticker = TickerMock()
+        fix_ticker = FixedPointTickerMock()
+        dec_port = self.make_portfolio(dec_ticker)
+        fix_port = self.make_portfolio(fix_ticker)
+
+        for port, ticker in ((dec_port, dec_ticker), (fix_port, fix_ticker)):
+            port.add_new_position(position_type, pair, 2000, ticker)
+        self.assert_identical(dec_port, fix_port, pair)
+
+        steps = [
+            lambda port: port.add_position_units(pair, 8000),
+            lambda port: port.remove_position_units(pair, 3000),
+            lambda port: port.close_position(pair),
+        ]
+        for prices, step in zip(PRICE_UPDATES, steps):
+            for p, (bid, ask) in prices.items():
+                dec_ticker.prices[p] = {"bid": bid, "ask": ask}
+                fix_ticker.set_prices(p, bid, ask)
+            for port in (dec_port, fix_port):
+                if pair in port.positions:
+                    port.positions[pair].update_position_price()
+            self.assert_identical(dec_port, fix_port, pair)
+            self.assertTrue(step(dec_port))
+            self.assertTrue(step(fix_port))
+            self.assert_identical(dec_port, fix_port, pair)
+        return fix_port
+
+    def test_long_scenario(self):
+        port = self.run_scenario("long")
+        self.assertEqual(port.balance, Decimal("100026.63"))
+
+    def test_short_scenario(self):
+        port = self.run_scenario("short")
+        self.assertEqual(port.balance, Decimal("99962.77"))
+
+    def test_initial_position_values(self):
+        ps = FixedPointPosition(
+            "GBP", "long", "GBPUSD", 2000, FixedPointTickerMock()
+        )
+        self.assertEqual(ps.calculate_pips(), -21)
+        self.assertEqual(ps.profit_base, Decimal("-0.27939"))
+        self.assertEqual(ps.profit_perc, Decimal("-0.01397"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+from decimal import Decimal
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from qsforex.performance.performance import (
+    create_drawdown_episodes, create_drawdowns, EquityStatistics
+)
+
+
+def looped_drawdowns(pnl):
+    """
+    The original looped implementation of create_drawdowns,
+    used as the reference for the vectorised one.
+    """
+    hwm = [0]
+    idx = pnl.index
+    drawdown = pd.Series(np.nan, index=idx)
+    duration = pd.Series(np.nan, index=idx)
+    for t in range(1, len(idx)):
+        hwm.append(max(hwm[t - 1], pnl.iloc[t]))
+        drawdown.iloc[t] = (hwm[t] - pnl.iloc[t])
+        duration.iloc[t] = (
+            0 if drawdown.iloc[t] == 0 else duration.iloc[t - 1] + 1
+        )
+    return drawdown, drawdown.max(), duration.max()
+
+
+class TestCreateDrawdowns(unittest.TestCase):
+
+    def assert_matches_loop(self, pnl):
+        drawdown, max_dd, dd_duration = create_drawdowns(pnl)
+        ref_drawdown, ref_max_dd, ref_duration = looped_drawdowns(pnl)
+        pd.testing.assert_series_equal(drawdown, ref_drawdown)
+        np.testing.assert_equal(max_dd, ref_max_dd)
+        np.testing.assert_equal(dd_duration, ref_duration)
+
+    def test_equity_curve(self):
+        np.random.seed(42)
+        returns = pd.Series(np.random.normal(0.0, 0.01, 2000))
+        returns.iloc[0] = np.nan
+        equity = (1.0 + returns).cumprod()
+        equity.iloc[0] = np.nan
+        self.assert_matches_loop(equity)
+
+    def test_negative_and_missing_values(self):
+        np.random.seed(1)
+        pnl = pd.Series(np.random.normal(0.0, 1.0, 500).cumsum())
+        pnl.iloc[[10, 11, 200]] = np.nan
+        self.assert_matches_loop(pnl)
+
+    def test_short_series(self):
+        self.assert_matches_loop(pd.Series([], dtype=float))
+        self.assert_matches_loop(pd.Series([1.0]))
+        self.assert_matches_loop(pd.Series([1.0, 2.0]))
+
+
+class TestDrawdownEpisodes(unittest.TestCase):
+
+    def test_episodes(self):
+        pnl = pd.Series(
+            [np.nan, 1.0, 1.2, 1.1, 0.9, 1.0, 1.3, 1.3, 1.25, 1.2],
+            index=list("abcdefghij")
+        )
+        episodes = create_drawdown_episodes(pnl)
+        self.assertEqual(list(episodes["start"]), ["c", "h"])
+        self.assertEqual(list(episodes["trough"]), ["e", "j"])
+        self.assertEqual(episodes["recovery"].iloc[0], "g")
+        self.assertTrue(pd.isnull(episodes["recovery"].iloc[1]))
+        np.testing.assert_allclose(episodes["drawdown"], [0.3, 0.1])
+        self.assertEqual(list(episodes["duration"]), [4, 2])
+
+    def test_no_drawdown(self):
+        episodes = create_drawdown_episodes(pd.Series([np.nan, 1.0, 2.0]))
+        self.assertEqual(len(episodes), 0)
+
+
+class TestEquityStatistics(unittest.TestCase):
+
+    def test_matches_pandas(self):
+        np.random.seed(7)
+        total = pd.Series(
+            100000.0 * np.exp(np.random.normal(0.0, 0.001, 3000).cumsum())
+        )
+        stats = EquityStatistics()
+        for value in total:
+            stats.update(value)
+
+        returns = total.pct_change()
+        equity = (1.0 + returns).cumprod()
+        drawdown, max_dd, dd_duration = create_drawdowns(equity)
+        self.assertEqual(stats.periods, 3000)
+        self.assertEqual(stats.last_total, total.iloc[-1])
+        self.assertAlmostEqual(stats.equity, equity.iloc[-1], places=10)
+        self.assertAlmostEqual(stats.drawdown, drawdown.iloc[-1], places=10)
+        self.assertAlmostEqual(stats.max_drawdown, max_dd, places=10)
+        self.assertEqual(stats.max_duration, dd_duration)
+        self.assertAlmostEqual(stats.mean_return, returns.mean(), places=14)
+        self.assertAlmostEqual(stats.std_return, returns.std(), places=14)
+        # The Sharpe ratio needs the times of the updates
+        self.assertTrue(np.isnan(stats.sharpe_ratio()))
+
+    def test_daily_sharpe_ratio(self):
+        np.random.seed(11)
+        times = pd.Timestamp("2015-06-01") + pd.to_timedelta(
+            np.sort(np.random.randint(0, 30 * 86400, 5000)), unit="s"
+        )
+        total = pd.Series(
+            100000.0 * np.exp(np.random.normal(0.0, 0.001, 5000).cumsum()),
+            index=times
+        )
+        stats = EquityStatistics()
+        for time, value in total.items():
+            stats.update(value, time)
+
+        closes = total.groupby(total.index.normalize()).last()
+        daily = pd.concat([total.iloc[:1], closes]).pct_change().dropna()
+        self.assertEqual(stats.daily_returns()[0], len(daily))
+        self.assertAlmostEqual(
+            stats.sharpe_ratio(),
+            np.sqrt(252) * daily.mean() / daily.std(), places=8
+        )
+
+    def test_pipettes_are_scaled(self):
+        stats = EquityStatistics()
+        stats.update(Decimal("100000.00"), pipettes=150000)
+        self.assertEqual(stats.last_total, 100001.5)
+
+    def test_undefined_statistics(self):
+        stats = EquityStatistics()
+        self.assertTrue(np.isnan(stats.max_drawdown))
+        stats.update(100.0)
+        self.assertTrue(np.isnan(stats.std_return))
+        stats.update(100.0)
+        self.assertEqual(stats.max_drawdown, 0.0)
+        self.assertTrue(np.isnan(stats.sharpe_ratio()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,11 @@
 from qsforex.library.price_handlers import StreamingForexPrices, RandomPriceHandler, HistoricCSVPriceHandler
+from qsforex.tests.test_backtest import write_random_csv_files
 from nose.tools import eq_
 from decimal import Decimal
+import datetime
+import numpy as np
+import shutil
+import tempfile
 
 def test_streaming_price_handler():
     ph = StreamingForexPrices()
@@ -15,8 +20,89 @@ def test_random_price_handler():
     eq_(t.ask, Decimal('1.10100'))
 
 
+def random_ticks(n, **kwargs):
+    ph = RandomPriceHandler()
+    ph.initialize(start_time=datetime.datetime(2015, 6, 1), **kwargs)
+    return [(t.instrument, t.time, t.bid, t.ask) for t in
+            (ph.run() for i in range(n))]
+
+
+def test_random_price_handler_buffer():
+    state = np.random.get_state()[1].copy()
+    ticks = random_ticks(100, buffer_size=64)
+    eq_(ticks[0][3] - ticks[0][2], Decimal('0.00200'))
+    # Independent of the buffer size, and of the global random state
+    eq_(random_ticks(100, buffer_size=7), ticks)
+    eq_(list(np.random.get_state()[1]), list(state))
+    fixed = random_ticks(100, buffer_size=64, fixed_point=True)
+    eq_([t[3] for t in fixed], [int(t[3] * 100000) for t in ticks])
+    assert random_ticks(100, buffer_size=64, seed=1) != ticks
+
+
+def test_random_price_handler_instruments():
+    ticks = random_ticks(
+        450, buffer_size=50,
+        instruments={'AUDUSD': 0.75, 'EURUSD': 1.1, 'USDJPY': 120.0}
+    )
+    times = [t[1] for t in ticks]
+    eq_(times, sorted(times))
+    eurusd = [t for t in ticks if t[0] == 'EURUSD']
+    usdjpy = [t for t in ticks if t[0] == 'USDJPY']
+    assert len(eurusd) > 100 and len(usdjpy) > 100
+    assert abs(usdjpy[0][3] - Decimal('120.00100')) < Decimal('0.0001')
+    # An instrument's stream does not depend on the others, even
+    # those which sort before it
+    alone = random_ticks(len(eurusd), buffer_size=50, instruments=['EURUSD'])
+    eq_(alone, eurusd)
+
+
 def test_historical_price_handler():
     ph = HistoricCSVPriceHandler()
     ph.initialize(['XXXYYY'])
     t = ph.run()
     eq_(t.ask, Decimal('1.10100'))
+
+
+def test_historical_price_handler_prefetch():
+    csv_dir = tempfile.mkdtemp()
+    pairs = ['GBPUSD', 'EURUSD']
+    dates = [datetime.datetime(2015, 6, d) for d in range(1, 6)]
+    try:
+        write_random_csv_files(csv_dir, pairs, dates, 50)
+        runs = []
+        for prefetch_days, processes in ((0, False), (1, False), (3, True)):
+            ph = HistoricCSVPriceHandler()
+            ph.initialize(
+                pairs, csv_dir, prefetch_days=prefetch_days,
+                prefetch_processes=processes
+            )
+            runs.append([str(t) for t in iter(ph.run, None)])
+            eq_(ph.prefetch_stats()['days'], 5)
+            eq_(ph._executor, None)
+    finally:
+        shutil.rmtree(csv_dir)
+    eq_(len(runs[0]), 500)
+    eq_(runs[1], runs[0])
+    eq_(runs[2], runs[0])
+
+
+def test_historical_price_handler_close():
+    csv_dir = tempfile.mkdtemp()
+    pairs = ['GBPUSD', 'EURUSD']
+    dates = [datetime.datetime(2015, 6, d) for d in range(1, 6)]
+    try:
+        write_random_csv_files(csv_dir, pairs, dates, 50)
+        ph = HistoricCSVPriceHandler()
+        ph.initialize(pairs, csv_dir, prefetch_days=2)
+        first = [ph.run() for i in range(10)]
+        assert ph._executor is not None
+        # Stopping early leaves days prefetched, which close cancels
+        ph.close()
+        eq_(ph._executor, None)
+        eq_(len(ph._prefetched), 0)
+        # The replay can still be continued, prefetching again
+        rest = list(iter(ph.run, None))
+        ph.close()
+    finally:
+        shutil.rmtree(csv_dir)
+    eq_(len(first) + len(rest), 500)
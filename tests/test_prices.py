@@ -0,0 +1,77 @@
+from decimal import Decimal
+import unittest
+
+from qsforex.library.fixed_point import invert_pipettes
+from qsforex.library.price_handlers import PriceHandler
+from qsforex.library.prices import TickerPrices
+
+
+class CountingInvert(object):
+
+    def __init__(self, invert):
+        self.invert = invert
+        self.calls = 0
+
+    def __call__(self, pair, bid, ask):
+        self.calls += 1
+        return self.invert(pair, bid, ask)
+
+
+class TestTickerPrices(unittest.TestCase):
+
+    def setUp(self):
+        self.invert = CountingInvert(PriceHandler.invert_prices)
+        self.prices = TickerPrices(["GBPUSD", "EURUSD"], self.invert)
+
+    def test_keys(self):
+        self.assertEqual(
+            sorted(self.prices), ["EURUSD", "GBPUSD", "USDEUR", "USDGBP"]
+        )
+        self.assertEqual(len(self.prices), 4)
+        self.assertTrue("USDGBP" in self.prices)
+        self.assertFalse("GBPEUR" in self.prices)
+        self.assertRaises(KeyError, lambda: self.prices["GBPEUR"])
+
+    def test_inverse_before_first_tick(self):
+        self.assertEqual(self.prices["USDGBP"]["bid"], None)
+        self.assertEqual(self.invert.calls, 0)
+
+    def test_lazy_cached_inverse(self):
+        self.prices.set_quote(
+            "GBPUSD", Decimal("1.50328"), Decimal("1.50349"), 1
+        )
+        self.prices.set_quote(
+            "GBPUSD", Decimal("1.50330"), Decimal("1.50351"), 2
+        )
+        self.assertEqual(self.invert.calls, 0)
+
+        usdgbp = self.prices["USDGBP"]
+        self.assertEqual(usdgbp["bid"], Decimal("0.66520"))
+        self.assertEqual(usdgbp["ask"], Decimal("0.66511"))
+        self.assertEqual(usdgbp["time"], 2)
+        self.prices["USDGBP"]
+        self.assertEqual(self.invert.calls, 1)
+
+        # Ticks of an unrelated pair keep the cached inverse
+        self.prices.set_quote(
+            "EURUSD", Decimal("1.07832"), Decimal("1.07847"), 3
+        )
+        self.prices["USDGBP"]
+        self.assertEqual(self.invert.calls, 1)
+
+        # A new tick of the underlying pair invalidates it
+        self.prices.set_quote(
+            "GBPUSD", Decimal("1.50486"), Decimal("1.50586"), 4
+        )
+        self.assertEqual(self.prices["USDGBP"]["bid"], Decimal("0.66451"))
+        self.assertEqual(self.invert.calls, 2)
+
+    def test_fixed_point_inverse(self):
+        prices = TickerPrices(["GBPUSD"], invert_pipettes)
+        prices.set_quote("GBPUSD", 150328, 150349, 1)
+        self.assertEqual(prices["USDGBP"]["bid"], 66521)
+        self.assertEqual(prices["USDGBP"]["ask"], 66512)
+
+
+if __name__ == "__main__":
+    unittest.main()
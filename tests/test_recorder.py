@@ -0,0 +1,112 @@
+from decimal import Decimal
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from qsforex.portfolio.recorder import (
+    BalanceChangeSampler, CSVEquityRecorder, NumpyEquityRecorder,
+    TickSampler, TimeSampler
+)
+
+
+class PositionMock(object):
+
+    def __init__(self, profit_base):
+        self.profit_base = profit_base
+
+
+def record_ticks(recorder, n=25):
+    start = pd.Timestamp("2015-06-01 09:00:00")
+    positions = {}
+    for i in range(n):
+        balance = Decimal("100000.00") + Decimal(i // 10)
+        positions["GBPUSD"] = PositionMock(Decimal(i) / 100)
+        recorder.record(
+            start + pd.Timedelta(seconds=i), balance, positions
+        )
+    recorder.close()
+    return recorder.load()
+
+
+class TestSamplers(unittest.TestCase):
+
+    def sampled(self, sampler, n=25):
+        start = pd.Timestamp("2015-06-01 09:00:00")
+        return [
+            i for i in range(n) if sampler.sample(
+                start + pd.Timedelta(seconds=i),
+                Decimal(i // 10)
+            )
+        ]
+
+    def test_tick_sampler(self):
+        self.assertEqual(self.sampled(TickSampler(10)), [9, 19])
+
+    def test_time_sampler(self):
+        self.assertEqual(self.sampled(TimeSampler(7.5)), [0, 8, 16, 24])
+
+    def test_balance_change_sampler(self):
+        self.assertEqual(self.sampled(BalanceChangeSampler()), [0, 10, 20])
+
+
+class TestEquityRecorders(unittest.TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_csv_recorder(self):
+        df = record_ticks(
+            CSVEquityRecorder(self.output_dir, ["GBPUSD", "EURUSD"])
+        )
+        self.assertEqual(list(df.columns), ["Balance", "GBPUSD", "EURUSD"])
+        self.assertEqual(len(df), 25)
+        self.assertEqual(df["GBPUSD"].iloc[-1], 0.24)
+        self.assertEqual(df["EURUSD"].iloc[-1], 0.0)
+
+    def test_numpy_recorder_matches_csv(self):
+        pairs = ["GBPUSD", "EURUSD"]
+        csv_df = record_ticks(CSVEquityRecorder(self.output_dir, pairs))
+        # A buffer smaller than the number of rows exercises flushing
+        np_df = record_ticks(
+            NumpyEquityRecorder(self.output_dir, pairs, buffer_size=4)
+        )
+        self.assertEqual(list(np_df.columns), list(csv_df.columns))
+        np.testing.assert_array_equal(np_df.values, csv_df.values)
+        np.testing.assert_array_equal(
+            np_df.index, pd.to_datetime(csv_df.index)
+        )
+
+    def test_sampled_recorder_ends_at_last_tick(self):
+        df = record_ticks(NumpyEquityRecorder(
+            self.output_dir, ["GBPUSD"], sampler=TickSampler(10)
+        ))
+        self.assertEqual(list(df["GBPUSD"]), [0.09, 0.19, 0.24])
+        self.assertEqual(list(df["Balance"]), [100000.0, 100001.0, 100002.0])
+
+    def test_last_tick_is_recorded_as_it_was(self):
+        recorder = CSVEquityRecorder(
+            self.output_dir, ["GBPUSD"], sampler=TickSampler(10)
+        )
+        positions = {"GBPUSD": PositionMock(Decimal("0.50"))}
+        recorder.record(
+            pd.Timestamp("2015-06-01 09:00:00"), Decimal("100000.00"),
+            positions
+        )
+        # The position is closed after the last (unsampled) tick
+        recorder.snapshot()
+        positions["GBPUSD"].profit_base = Decimal("0.75")
+        del positions["GBPUSD"]
+        recorder.close()
+        df = recorder.load()
+        self.assertEqual(list(df["GBPUSD"]), [0.5])
+        self.assertEqual(list(df["Balance"]), [100000.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import datetime
+from decimal import Decimal
+import unittest
+
+from qsforex.library.events import TickEvent
+from qsforex.library.price_handlers import RandomPriceHandler
+from qsforex.library.replay import replay_trading, tick_frames
+from qsforex.library.tick_parser import parse_tick
+from qsforex.strategy import strategy
+
+
+def spaced_ticks(n, seconds):
+    start = datetime.datetime(2015, 6, 1, 12)
+    return [
+        TickEvent(
+            "EURUSD", start + datetime.timedelta(seconds=i * seconds),
+            Decimal("1.10000") + i * Decimal("0.00001"), Decimal("1.10020")
+        )
+        for i in range(n)
+    ]
+
+
+class TestReplay(unittest.TestCase):
+
+    def test_tick_frames(self):
+        frames = tick_frames(iter(spaced_ticks(3, 0.5)))
+        self.assertEqual(frames[1][0] - frames[0][0], 0.5)
+        self.assertEqual(parse_tick(frames[1][1]), (
+            "EURUSD", "2015-06-01T12:00:00.500000Z", b"1.10001", b"1.10020"
+        ))
+        ph = RandomPriceHandler()
+        ph.initialize()
+        self.assertEqual(len(tick_frames(iter(ph.run, None), 10)), 10)
+
+    def test_replay_at_max_speed(self):
+        ph = RandomPriceHandler()
+        ph.initialize()
+        report = replay_trading(
+            tick_frames(iter(ph.run, None), 500), ["EURUSD"],
+            strategy.TestStrategy
+        )
+        self.assertEqual(report["ticks_sent"], 500)
+        self.assertEqual(report["ticks_received"], 500)
+        self.assertEqual(report["dropped"], 0)
+        # TestStrategy trades on every fifth tick
+        self.assertEqual(report["orders_sent"], 100)
+        self.assertEqual(report["orders_received"], 100)
+        self.assertTrue(
+            0 < report["tick_to_order_p50"] <= report["tick_to_order_p99"]
+        )
+        self.assertTrue(report["order_round_trip_max"] > 0)
+
+    def test_replay_is_paced(self):
+        frames = tick_frames(iter(spaced_ticks(21, 0.1)))
+        report = replay_trading(
+            frames, ["EURUSD"], strategy.TestStrategy, speed=10.0,
+            heartbeat_interval=0.005
+        )
+        self.assertEqual(report["ticks_received"], 21)
+        self.assertTrue(report["elapsed"] >= 0.2)
+
+
+if __name__ == "__main__":
+    unittest.main()
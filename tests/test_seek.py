@@ -0,0 +1,105 @@
+import datetime
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from qsforex.library.price_handlers import (
+    HistoricCSVPriceHandler, HistoricTickStorePriceHandler
+)
+from qsforex.library.tick_store import ingest_csv_dir
+from qsforex.tests.test_backtest import write_random_csv_files
+
+
+class TestTimeWindow(unittest.TestCase):
+
+    def setUp(self):
+        self.csv_dir = tempfile.mkdtemp()
+        self.store_dir = tempfile.mkdtemp()
+        self.pairs = ["GBPUSD", "EURUSD"]
+        write_random_csv_files(
+            self.csv_dir, self.pairs,
+            [datetime.datetime(2015, 6, d) for d in range(1, 8)], 40
+        )
+        ingest_csv_dir(self.csv_dir, self.store_dir)
+        self.all_ticks = self.replay(HistoricCSVPriceHandler)
+
+    def tearDown(self):
+        shutil.rmtree(self.csv_dir)
+        shutil.rmtree(self.store_dir)
+
+    def replay(self, handler, **kwargs):
+        ph = handler()
+        data_dir = (
+            self.csv_dir if handler is HistoricCSVPriceHandler
+            else self.store_dir
+        )
+        ph.initialize(self.pairs, data_dir, **kwargs)
+        self.ph = ph
+        return [(t.time, str(t)) for t in iter(ph.run, None)]
+
+    def expected(self, start, until=None):
+        start = pd.Timestamp(start)
+        until = pd.Timestamp(until) if until is not None else pd.Timestamp.max
+        return [t for t in self.all_ticks if start <= t[0] < until]
+
+    def test_start_until(self):
+        start = "2015-06-03 10:30:00"
+        until = "2015-06-05 17:00:00"
+        for handler in (HistoricCSVPriceHandler, HistoricTickStorePriceHandler):
+            ticks = self.replay(handler, start=start, until=until)
+            self.assertEqual(ticks, self.expected(start, until))
+            self.assertEqual(
+                self.ph.file_dates, ["20150603", "20150604", "20150605"]
+            )
+
+    def test_end_day_is_inclusive(self):
+        for handler in (HistoricCSVPriceHandler, HistoricTickStorePriceHandler):
+            ticks = self.replay(
+                handler, start="2015-06-03 10:30:00", end="20150605"
+            )
+            self.assertEqual(
+                ticks, self.expected("2015-06-03 10:30:00", "2015-06-06")
+            )
+            # The earlier of end and until applies
+            ticks = self.replay(
+                handler, end="20150605", until="2015-06-05 12:00:00"
+            )
+            self.assertEqual(
+                ticks, self.expected("2015-06-01", "2015-06-05 12:00:00")
+            )
+
+    def test_csv_window_reads_only_its_days(self):
+        ph = HistoricCSVPriceHandler()
+        ph.initialize(self.pairs, self.csv_dir, start="20150602", end="20150603")
+        list(iter(ph.run, None))
+        self.assertEqual(ph.prefetch_stats()["days"], 2)
+
+    def test_seek(self):
+        for handler in (HistoricCSVPriceHandler, HistoricTickStorePriceHandler):
+            self.replay(handler)
+            ph = self.ph
+            ph.seek("2015-06-04 12:00:00")
+            self.assertTrue(ph.continue_backtest)
+            self.assertEqual(ph.prices["GBPUSD"]["bid"], None)
+            first = [(t.time, str(t)) for t in ph.next_ticks(5)]
+            self.assertEqual(first, self.expected("2015-06-04 12:00:00")[:5])
+            # Seeking backwards, before the data and after the data
+            ph.seek("2015-06-02 06:00:00")
+            ticks = [(t.time, str(t)) for t in iter(ph.run, None)]
+            self.assertEqual(ticks, self.expected("2015-06-02 06:00:00"))
+            ph.seek("2015-05-01")
+            self.assertEqual(str(ph.run()), self.all_ticks[0][1])
+            ph.seek("2015-07-01")
+            self.assertEqual(ph.run(), None)
+            self.assertFalse(ph.continue_backtest)
+
+    def test_seek_is_clamped_to_start(self):
+        self.replay(HistoricCSVPriceHandler, start="2015-06-05")
+        self.ph.seek("2015-06-01")
+        self.assertEqual(str(self.ph.run()), self.expected("2015-06-05")[0][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
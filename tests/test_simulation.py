@@ -0,0 +1,108 @@
+import datetime
+import filecmp
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from qsforex.library.simulation import (
+    TickSimulator, format_csv_day, generate_days
+)
+from qsforex.library.tick_store import TickStore, read_tick_csv
+
+
+class TestTickSimulator(unittest.TestCase):
+
+    def setUp(self):
+        self.simulator = TickSimulator(**self.kwargs())
+        self.dates = [datetime.date(2015, 6, d) for d in (1, 2, 3)]
+
+    def kwargs(self, **overrides):
+        kwargs = {
+            "pairs": ["EURUSD", "GBPUSD"], "seed": 7,
+            "s0": {"EURUSD": 1.1, "GBPUSD": 1.5},
+            "correlation": [[1.0, 0.8], [0.8, 1.0]],
+            "regime_vols": (1.0, 3.0), "regime_switch_prob": 1e-3
+        }
+        kwargs.update(overrides)
+        return kwargs
+
+    def test_days_are_reproducible_and_independent(self):
+        day = self.simulator.day(self.dates[1])
+        again = TickSimulator(**self.kwargs()).day(self.dates[1])
+        for pair in day:
+            for name in day[pair]:
+                np.testing.assert_array_equal(
+                    day[pair][name], again[pair][name]
+                )
+        other = TickSimulator(**self.kwargs(seed=8)).day(self.dates[1])
+        self.assertFalse(np.array_equal(
+            day["EURUSD"]["bid"][:100], other["EURUSD"]["bid"][:100]
+        ))
+        self.assertRaises(
+            ValueError, self.simulator.day, datetime.date(1999, 12, 31)
+        )
+
+    def test_ticks(self):
+        days = [self.simulator.day(d) for d in self.dates]
+        eur = days[0]["EURUSD"]
+        self.assertTrue(50000 < len(eur["time"]) < 70000)
+        self.assertTrue(np.all(np.diff(eur["time"]) > 0))
+        np.testing.assert_array_equal(eur["ask"] - eur["bid"], 20)
+        self.assertTrue(np.all(
+            (eur["ask_volume"] >= 1) & (eur["ask_volume"] <= 3)
+        ))
+        # Consecutive days join up
+        for pair in ("EURUSD", "GBPUSD"):
+            for today, tomorrow in zip(days, days[1:]):
+                gap = tomorrow[pair]["bid"][0] - today[pair]["bid"][-1]
+                self.assertLess(abs(gap), 50)
+        returns = [
+            np.diff(np.log(days[0][pair]["bid"].astype(float)))
+            for pair in ("EURUSD", "GBPUSD")
+        ]
+        self.assertAlmostEqual(np.corrcoef(returns)[0, 1], 0.8, delta=0.05)
+
+    def test_csv_format(self):
+        columns = {
+            "time": np.array([1433116801313000000, 1433203199999000000]),
+            "bid": np.array([999999, 12345678]),
+            "ask": np.array([1000019, 12345698]),
+            "ask_volume": np.array([1.0, 2.5], dtype=np.float32),
+            "bid_volume": np.array([3.0, 1.23], dtype=np.float32),
+        }
+        lines = format_csv_day(datetime.date(2015, 6, 1), columns)
+        self.assertEqual(list(lines), [
+            b"01.06.2015 00:00:01.313,10.00019,9.99999,1.0000,3.0000",
+            b"01.06.2015 23:59:59.999,123.45698,123.45678,2.5000,1.2300",
+        ])
+
+    def test_generate_days(self):
+        dirs = [tempfile.mkdtemp() for i in range(3)]
+        try:
+            serial = generate_days(
+                self.simulator, self.dates, csv_dir=dirs[0], store_dir=dirs[1]
+            )
+            parallel = generate_days(
+                self.simulator, self.dates, csv_dir=dirs[2], processes=2
+            )
+            self.assertEqual(serial, parallel)
+            names = sorted(os.listdir(dirs[0]))
+            self.assertEqual(len(names), 6)
+            self.assertEqual(
+                filecmp.cmpfiles(dirs[0], dirs[2], names)[0], names
+            )
+            store = TickStore(dirs[1])
+            csv = read_tick_csv(os.path.join(dirs[0], "GBPUSD_20150602.csv"))
+            stored = store.read_day("GBPUSD", "20150602")
+            for name in csv:
+                np.testing.assert_array_equal(csv[name], stored[name])
+        finally:
+            for d in dirs:
+                shutil.rmtree(d)
+
+
+if __name__ == "__main__":
+    unittest.main()
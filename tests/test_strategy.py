@@ -0,0 +1,95 @@
+import datetime
+from decimal import Decimal
+import unittest
+
+import numpy as np
+
+from qsforex.library.events import TickEvent
+from qsforex.strategy.strategy import (
+    MovingAverageCrossStrategy, VectorisedMovingAverageCrossStrategy
+)
+
+
+class ListEvents(list):
+    put = list.append
+
+
+def random_ticks(pairs, num_ticks, seed=42):
+    """
+    A random walk of Decimal ticks, randomly interleaved between
+    the pairs, including flat stretches where the price does not
+    move at all.
+    """
+    np.random.seed(seed)
+    prices = dict((p, Decimal("1.50000")) for p in pairs)
+    start = datetime.datetime(2015, 6, 1)
+    ticks = []
+    for i in range(num_ticks):
+        pair = pairs[np.random.randint(len(pairs))]
+        if np.random.uniform() < 0.8:
+            prices[pair] += Decimal(int(np.random.normal(0, 20))).scaleb(-5)
+        time = start + datetime.timedelta(seconds=i)
+        ticks.append(
+            TickEvent(pair, time, prices[pair], prices[pair] + Decimal("0.0002"))
+        )
+    return ticks
+
+
+def signal_tuples(signals):
+    return [(s.instrument, s.side, s.time) for s in signals]
+
+
+class TestVectorisedMovingAverageCross(unittest.TestCase):
+
+    def setUp(self):
+        self.pairs = ["GBPUSD", "EURUSD"]
+        self.params = {"short_window": 20, "long_window": 80}
+        self.ticks = random_ticks(self.pairs, 5000)
+        events = ListEvents()
+        strategy = MovingAverageCrossStrategy(self.pairs, events, **self.params)
+        for tick in self.ticks:
+            strategy.calculate_signals(tick)
+        self.expected = signal_tuples(events)
+        self.assertTrue(len(self.expected) > 20)
+
+    def test_batch_parity(self):
+        for batch_size in (1, 33, 1000, 5000):
+            strategy = VectorisedMovingAverageCrossStrategy(
+                self.pairs, ListEvents(), **self.params
+            )
+            signals = []
+            for i in range(0, len(self.ticks), batch_size):
+                block = self.ticks[i:i + batch_size]
+                for j, signal in strategy.calculate_signals_batch(block):
+                    self.assertEqual(block[j].time, signal.time)
+                    signals.append(signal)
+            self.assertEqual(signal_tuples(signals), self.expected)
+
+    def test_day_array_parity(self):
+        strategy = VectorisedMovingAverageCrossStrategy(
+            self.pairs, ListEvents(), **self.params
+        )
+        signals = []
+        for pair in self.pairs:
+            pair_ticks = [t for t in self.ticks if t.instrument == pair]
+            # Split the ticks into two "days"
+            for day in (pair_ticks[:1000], pair_ticks[1000:]):
+                signals.extend(s for i, s in strategy.calculate_signals_day(
+                    pair, [t.time for t in day],
+                    np.array([float(t.bid) for t in day])
+                ))
+        signals.sort(key=lambda s: s.time)
+        self.assertEqual(signal_tuples(signals), self.expected)
+
+    def test_tick_by_tick_parity(self):
+        events = ListEvents()
+        strategy = VectorisedMovingAverageCrossStrategy(
+            self.pairs, events, **self.params
+        )
+        for tick in self.ticks:
+            strategy.calculate_signals(tick)
+        self.assertEqual(signal_tuples(events), self.expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
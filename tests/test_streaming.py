@@ -0,0 +1,141 @@
+import asyncio
+from decimal import Decimal
+import json
+import unittest
+
+from qsforex.library.streaming import AsyncStreamingForexPrices
+
+
+def tick_line(instrument, bid, ask, time="2015-06-01T12:00:00.000000Z"):
+    return (json.dumps({"tick": {
+        "instrument": instrument, "time": time, "bid": bid, "ask": ask
+    }}) + "\n").encode("utf-8")
+
+
+HEARTBEAT = b'{"heartbeat":{"time":"2015-06-01T12:00:00.000000Z"}}\n'
+
+
+class FakeStreamServer(object):
+    """
+    A local stand-in for the OANDA stream server. Each connection
+    plays the next of the scripts, a list of (action, argument):
+    ("status", b"401 Unauthorized") answers with that status,
+    ("send", data) sends data as a single HTTP chunk, ("sleep", s)
+    pauses and ("close", None) ends the response. A connection
+    whose script does not close is left hanging.
+    """
+
+    def __init__(self, scripts, chunked=True):
+        self.scripts = list(scripts)
+        self.chunked = chunked
+        self.requests = []
+
+    async def start(self):
+        self.server = await asyncio.start_server(
+            self.handle, "127.0.0.1", 0
+        )
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        request = b""
+        while not request.endswith(b"\r\n\r\n"):
+            request += await reader.read(1024)
+        self.requests.append(request)
+        script = self.scripts.pop(0) if self.scripts else [("sleep", 60)]
+        status = b"200 OK"
+        if script and script[0][0] == "status":
+            status = script.pop(0)[1]
+        headers = b"HTTP/1.1 " + status + b"\r\nContent-Type: application/json\r\n"
+        if self.chunked:
+            headers += b"Transfer-Encoding: chunked\r\n"
+        writer.write(headers + b"\r\n")
+        try:
+            for action, arg in script:
+                if action == "send":
+                    if self.chunked:
+                        arg = b"%x\r\n%s\r\n" % (len(arg), arg)
+                    writer.write(arg)
+                    await writer.drain()
+                elif action == "sleep":
+                    await asyncio.sleep(arg)
+                elif action == "close":
+                    if self.chunked:
+                        writer.write(b"0\r\n\r\n")
+                    break
+            else:
+                await asyncio.sleep(60)
+        finally:
+            writer.close()
+
+
+class TestAsyncStreamingForexPrices(unittest.TestCase):
+
+    def stream(self, scripts, max_connections, chunked=True):
+        ticks = []
+
+        async def main():
+            server = FakeStreamServer(scripts, chunked)
+            await server.start()
+            ph = AsyncStreamingForexPrices()
+            ph.initialize(
+                domain="127.0.0.1", access_token="token", account_id="1",
+                pairs=["GBPUSD", "EURUSD"], port=server.port, use_ssl=False,
+                heartbeat_timeout=0.2, reconnect_delay=0.01
+            )
+            try:
+                await asyncio.wait_for(
+                    ph.stream(ticks.append, max_connections), 5
+                )
+            finally:
+                await server.stop()
+            return ph, server
+
+        ph, server = asyncio.run(main())
+        return ph, server, ticks
+
+    def test_line_framing_across_chunks(self):
+        first = tick_line("GBP_USD", 1.5, 1.5002)
+        second = tick_line("EUR_USD", 1.1, 1.1001)
+        data = HEARTBEAT + first + second
+        for chunked in (True, False):
+            ph, server, ticks = self.stream([[
+                ("send", data[:7]), ("send", data[7:70]),
+                ("send", data[70:]), ("close", None)
+            ]], 1, chunked)
+            self.assertEqual(
+                [(t.instrument, t.bid, t.ask) for t in ticks], [
+                    ("GBPUSD", Decimal("1.50000"), Decimal("1.50020")),
+                    ("EURUSD", Decimal("1.10000"), Decimal("1.10010"))
+                ]
+            )
+            self.assertTrue(all(t.received is not None for t in ticks))
+            self.assertEqual(ph.prices["EURUSD"]["ask"], Decimal("1.10010"))
+            self.assertIn(
+                b"GET /v1/prices?instruments=GBP_USD%2CEUR_USD&accountId=1",
+                server.requests[0]
+            )
+            self.assertIn(b"Authorization: Bearer token", server.requests[0])
+
+    def test_reconnects_after_close_error_and_silence(self):
+        ph, server, ticks = self.stream([
+            [("send", tick_line("GBP_USD", 1.5, 1.5002)), ("close", None)],
+            [("status", b"503 Service Unavailable"), ("close", None)],
+            # Goes silent, so the heartbeat timeout expires
+            [("send", HEARTBEAT), ("send", tick_line("GBP_USD", 1.6, 1.6002))],
+            [("send", tick_line("GBP_USD", 1.7, 1.7002)), ("close", None)],
+        ], 3)
+        self.assertEqual(
+            [t.bid for t in ticks],
+            [Decimal("1.50000"), Decimal("1.60000"), Decimal("1.70000")]
+        )
+        self.assertEqual(len(server.requests), 4)
+        self.assertEqual(ph.connections, 3)
+        self.assertEqual(ph.reconnects, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
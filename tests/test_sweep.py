@@ -0,0 +1,81 @@
+import datetime
+from decimal import Decimal
+import shutil
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+import sys
+import tempfile
+import unittest
+
+from qsforex.backtest.sweep import parameter_grid, run_combination, run_sweep
+from qsforex.execution.execution import SimulatedExecution
+from qsforex.portfolio.portfolio import Portfolio
+from qsforex.strategy.strategy import MovingAverageCrossStrategy
+from qsforex.tests.test_backtest import write_random_csv_files
+
+
+class TestParameterGrid(unittest.TestCase):
+
+    def test_parameter_grid(self):
+        grid = parameter_grid({
+            "short_window": [250, 500],
+            "long_window": [2000, 4000, 8000]
+        })
+        self.assertEqual(len(grid), 6)
+        self.assertEqual(grid[0], {"long_window": 2000, "short_window": 250})
+        self.assertEqual(grid[-1], {"long_window": 8000, "short_window": 500})
+
+    def test_empty_grid(self):
+        self.assertEqual(parameter_grid({}), [{}])
+
+
+class TestSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.csv_dir = tempfile.mkdtemp()
+        self.store_dir = tempfile.mkdtemp()
+        self.pairs = ["GBPUSD", "EURUSD"]
+        write_random_csv_files(
+            self.csv_dir, self.pairs,
+            [datetime.datetime(2015, 6, 1), datetime.datetime(2015, 6, 2)],
+            250
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.csv_dir)
+        shutil.rmtree(self.store_dir)
+
+    def test_run_sweep(self):
+        grid = {"short_window": [5, 10], "long_window": [20, 40]}
+        results = run_sweep(
+            self.pairs, MovingAverageCrossStrategy, grid,
+            store_dir=self.store_dir, csv_dir=self.csv_dir,
+            equity=Decimal("100000.00"), max_workers=2, batch_size=100
+        )
+        self.assertEqual(len(results), 4)
+        self.assertEqual(
+            list(results.columns[:2]), ["long_window", "short_window"]
+        )
+        self.assertTrue((results["final_equity"] != 100000).any())
+        # Each row is the backtest of its parameters, run in-process
+        stdout = sys.stdout
+        sys.stdout = output = StringIO()
+        try:
+            result = run_combination({
+                "pairs": self.pairs, "strategy": MovingAverageCrossStrategy,
+                "params": {"long_window": 40, "short_window": 10},
+                "portfolio": Portfolio, "execution": SimulatedExecution,
+                "equity": Decimal("100000.00"), "store_dir": self.store_dir,
+                "batch_size": 100
+            })
+        finally:
+            sys.stdout = stdout
+        # The backtest of a sweep prints nothing
+        self.assertEqual(output.getvalue(), "")
+        self.assertEqual(result["final_equity"], results["final_equity"][3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import datetime
+from decimal import Decimal
+import json
+import shutil
+import tempfile
+import unittest
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from celery import Celery
+from celery.app.backends import by_url
+
+from qsforex.backtest.backtest import Backtest
+from qsforex.backtest.sweep import run_sweep
+from qsforex.controller.celery import app
+from qsforex.controller.tasks import (
+    campaign_frame, campaign_tasks, run_campaign
+)
+from qsforex.execution.execution import SimulatedExecution
+from qsforex.library.price_handlers import HistoricCSVPriceHandler
+from qsforex.library.tick_store import ingest_csv_dir
+from qsforex.portfolio.portfolio import Portfolio
+from qsforex.strategy.strategy import MovingAverageCrossStrategy
+from qsforex.tests.test_backtest import write_random_csv_files
+
+
+class TestCampaign(unittest.TestCase):
+
+    def setUp(self):
+        self.csv_dir = tempfile.mkdtemp()
+        self.store_dir = tempfile.mkdtemp()
+        write_random_csv_files(
+            self.csv_dir, ["GBPUSD", "EURUSD"],
+            [datetime.datetime(2015, 6, d) for d in (1, 2, 3)], 200
+        )
+        ingest_csv_dir(self.csv_dir, self.store_dir)
+        # Run the tasks in this process, keeping the chord's results
+        # in an in-memory backend for the duration of the test
+        conf = dict((k, app.conf.get(k)) for k in (
+            "CELERY_ALWAYS_EAGER", "CELERY_EAGER_PROPAGATES_EXCEPTIONS"
+        ))
+        app.conf.update(
+            CELERY_ALWAYS_EAGER=True, CELERY_EAGER_PROPAGATES_EXCEPTIONS=True
+        )
+        self.addCleanup(app.conf.update, conf)
+        backend_cls, url = by_url("cache+memory://", app.loader)
+        backend = mock.patch.object(
+            Celery, "backend", new_callable=mock.PropertyMock,
+            return_value=backend_cls(app=app, url=url)
+        )
+        backend.start()
+        self.addCleanup(backend.stop)
+        self.grid = {"short_window": [5, 10], "long_window": [20]}
+
+    def tearDown(self):
+        shutil.rmtree(self.csv_dir)
+        shutil.rmtree(self.store_dir)
+
+    def descriptors(self, date_ranges=((None, None),)):
+        return campaign_tasks(
+            [["EURUSD"], ["GBPUSD", "EURUSD"]], MovingAverageCrossStrategy,
+            self.grid, date_ranges, store_dir=self.store_dir,
+            equity=Decimal("100000.00"), batch_size=100
+        )
+
+    def test_descriptors(self):
+        descriptors = self.descriptors(
+            [("2015-06-01", "2015-06-01"), ("2015-06-02", None)]
+        )
+        self.assertEqual(len(descriptors), 2 * 2 * 2)
+        # Only small JSON serialisable descriptors are sent
+        self.assertEqual(json.loads(json.dumps(descriptors)), descriptors)
+        self.assertEqual(
+            descriptors[0]["strategy"],
+            "qsforex.strategy.strategy.MovingAverageCrossStrategy"
+        )
+
+    def test_campaign_matches_sweep(self):
+        results = run_campaign(self.descriptors()).get()
+        frame = campaign_frame(results)
+        self.assertEqual(len(frame), 4)
+        self.assertEqual(
+            list(frame["pairs"]), ["EURUSD"] * 2 + ["GBPUSD,EURUSD"] * 2
+        )
+        sweep = run_sweep(
+            ["GBPUSD", "EURUSD"], MovingAverageCrossStrategy, self.grid,
+            store_dir=self.store_dir, equity=Decimal("100000.00"),
+            max_workers=1, batch_size=100
+        )
+        rows = frame[frame["pairs"] == "GBPUSD,EURUSD"]
+        self.assertEqual(
+            dict(zip(rows["short_window"], rows["final_equity"])),
+            dict(zip(
+                sweep["short_window"],
+                [float(v) for v in sweep["final_equity"]]
+            ))
+        )
+
+    def test_date_ranges(self):
+        ranges = [("2015-06-02", "2015-06-02"), ("2015-06-02", None)]
+        frame = campaign_frame(run_campaign(self.descriptors(ranges)).get())
+        self.assertEqual(len(frame), 8)
+        full = campaign_frame(run_campaign(self.descriptors()).get())
+        full = full[
+            (full["pairs"] == "GBPUSD,EURUSD") & (full["short_window"] == 5)
+        ]["final_equity"].iloc[0]
+        for start, end in ranges:
+            rows = frame[
+                (frame["pairs"] == "GBPUSD,EURUSD") &
+                (frame["short_window"] == 5) & (frame["start"] == start) &
+                (frame["end"] == end if end else frame["end"].isnull())
+            ]
+            self.assertEqual(len(rows), 1)
+            # Each range is backtested over its own ticks only
+            backtest = Backtest(
+                ["GBPUSD", "EURUSD"], HistoricCSVPriceHandler,
+                MovingAverageCrossStrategy,
+                {"short_window": 5, "long_window": 20},
+                Portfolio, SimulatedExecution,
+                equity=Decimal("100000.00"), csv_dir=self.csv_dir,
+                batch_size=100, equity_file=False, start=start, end=end,
+                verbose=False
+            )
+            backtest.simulate_trading()
+            self.assertAlmostEqual(
+                rows["final_equity"].iloc[0],
+                float(backtest.portfolio.statistics.last_total), places=6
+            )
+            self.assertNotEqual(rows["final_equity"].iloc[0], full)
+
+
+if __name__ == "__main__":
+    unittest.main()
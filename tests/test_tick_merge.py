@@ -0,0 +1,47 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from qsforex.library.tick_merge import merge_pair_arrays
+
+
+class TestTickMerge(unittest.TestCase):
+
+    def setUp(self):
+        self.pair_arrays = [
+            ("GBPUSD", np.array([1, 3, 3, 7], dtype=np.int64),
+             np.array([10, 11, 12, 13]), np.array([20, 21, 22, 23])),
+            ("EURUSD", np.array([2, 3, 8], dtype=np.int64),
+             np.array([30, 31, 32]), np.array([40, 41, 42])),
+            ("USDJPY", np.array([], dtype=np.int64),
+             np.array([]), np.array([])),
+        ]
+
+    def test_argsort_merge(self):
+        ticks = list(merge_pair_arrays(self.pair_arrays))
+        self.assertEqual(
+            [(t.value, p, b, a) for t, p, b, a in ticks], [
+                (1, "GBPUSD", 10, 20), (2, "EURUSD", 30, 40),
+                (3, "GBPUSD", 11, 21), (3, "GBPUSD", 12, 22),
+                (3, "EURUSD", 31, 41), (7, "GBPUSD", 13, 23),
+                (8, "EURUSD", 32, 42),
+            ]
+        )
+        self.assertTrue(isinstance(ticks[0][0], pd.Timestamp))
+
+    def test_heap_merge_matches_argsort(self):
+        self.assertEqual(
+            list(merge_pair_arrays(self.pair_arrays, "heap")),
+            list(merge_pair_arrays(self.pair_arrays, "argsort"))
+        )
+
+    def test_empty_and_unknown_method(self):
+        self.assertEqual(list(merge_pair_arrays([])), [])
+        self.assertRaises(
+            ValueError, merge_pair_arrays, self.pair_arrays, "bogus"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
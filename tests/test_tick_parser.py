@@ -0,0 +1,72 @@
+from decimal import Decimal
+import logging
+import unittest
+
+from qsforex.library.price_handlers import StreamingForexPrices
+from qsforex.library.tick_parser import decimal_price, parse_tick
+
+
+class TestParseTick(unittest.TestCase):
+
+    def test_compact_tick(self):
+        line = (
+            b'{"tick":{"instrument":"EUR_USD","time":"2015-06-01T12:00:00.'
+            b'123456Z","bid":1.10001,"ask":1.1002}}'
+        )
+        self.assertEqual(parse_tick(line), (
+            "EURUSD", "2015-06-01T12:00:00.123456Z", b"1.10001", b"1.1002"
+        ))
+
+    def test_other_layouts_fall_back_to_json(self):
+        line = (
+            b'{ "tick": { "ask": 1.50020, "bid": 1.5, '
+            b'"time": "2015-06-01T12:00:00Z", "instrument": "GBP_USD" } }\r\n'
+        )
+        self.assertEqual(parse_tick(line), (
+            "GBPUSD", "2015-06-01T12:00:00Z", b"1.5", b"1.5002"
+        ))
+
+    def test_heartbeats_and_other_frames(self):
+        self.assertIsNone(
+            parse_tick(b'{"heartbeat":{"time":"2015-06-01T12:00:00Z"}}')
+        )
+        self.assertIsNone(parse_tick(b'{"disconnect":{"code":64}}'))
+        self.assertRaises(ValueError, parse_tick, b'{"tick":{"instr')
+
+    def test_decimal_price(self):
+        self.assertEqual(decimal_price(b"1.1"), Decimal("1.10000"))
+        self.assertEqual(decimal_price(b"1.100015"), Decimal("1.10001"))
+        self.assertEqual(decimal_price(b"119.5"), Decimal("119.50000"))
+
+
+class TestProcessLine(unittest.TestCase):
+
+    def handler(self, fixed_point):
+        ph = StreamingForexPrices()
+        ph.pairs = ["EURUSD"]
+        ph.fixed_point = fixed_point
+        ph.prices = ph._set_up_prices_dict()
+        ph.logger = logging.getLogger(__name__)
+        return ph
+
+    def test_ticks(self):
+        line = (
+            b'{"tick":{"instrument":"EUR_USD","time":"2015-06-01T12:00:00Z",'
+            b'"bid":1.10001,"ask":1.10021}}'
+        )
+        tick = self.handler(False).process_line(line)
+        self.assertEqual(
+            (tick.instrument, tick.bid, tick.ask),
+            ("EURUSD", Decimal("1.10001"), Decimal("1.10021"))
+        )
+        ph = self.handler(True)
+        tick = ph.process_line(line)
+        self.assertEqual((tick.bid, tick.ask), (110001, 110021))
+        self.assertEqual(ph.prices["EURUSD"]["ask"], 110021)
+        self.assertIsNone(ph.process_line(b'{"heartbeat":{"time":"x"}}'))
+        self.assertIsNone(ph.process_line(b'not json'))
+        self.assertIsNone(ph.process_line(b''))
+
+
+if __name__ == "__main__":
+    unittest.main()
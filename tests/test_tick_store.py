@@ -0,0 +1,108 @@
+from decimal import Decimal
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from qsforex.library.fixed_point import to_pipettes
+from qsforex.library.price_handlers import (
+    HistoricCSVPriceHandler, HistoricTickStorePriceHandler
+)
+from qsforex.library.tick_store import (
+    TickStore, ingest_csv_dir, read_tick_csv
+)
+
+
+CSV_DAYS = {
+    "GBPUSD_20150601.csv": [
+        "01.06.2015 00:00:01.449,1.52100,1.52080,2.4600,2.2000",
+        "01.06.2015 00:00:03.100,1.52110,1.52090,1.1200,2.7300",
+    ],
+    "EURUSD_20150601.csv": [
+        "01.06.2015 00:00:02.000,1.09100,1.09090,1.0400,2.9400",
+        "01.06.2015 00:00:04.384,1.09101,1.09091,1.0400,2.9400",
+    ],
+    "GBPUSD_20150602.csv": [
+        "02.06.2015 00:00:00.500,1.53000,1.52980,1.0000,1.0000",
+    ],
+    "EURUSD_20150602.csv": [
+        "02.06.2015 00:00:00.250,1.10000,1.09980,1.0000,1.0000",
+    ],
+}
+
+
+class TestTickStore(unittest.TestCase):
+
+    def setUp(self):
+        self.csv_dir = tempfile.mkdtemp()
+        self.store_dir = tempfile.mkdtemp()
+        for name, lines in CSV_DAYS.items():
+            with open(os.path.join(self.csv_dir, name), "w") as f:
+                f.write("Time,Ask,Bid,AskVolume,BidVolume\n")
+                f.write("\n".join(lines) + "\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.csv_dir)
+        shutil.rmtree(self.store_dir)
+
+    def test_ingest_columns(self):
+        ingested = ingest_csv_dir(self.csv_dir, self.store_dir)
+        self.assertEqual(len(ingested), 4)
+        store = TickStore(self.store_dir)
+        self.assertEqual(store.pairs(), ["EURUSD", "GBPUSD"])
+        self.assertEqual(store.dates("GBPUSD"), ["20150601", "20150602"])
+        day = store.read_day("GBPUSD", "20150601")
+        self.assertEqual(day["time"].dtype, np.int64)
+        self.assertEqual(day["bid"].dtype, np.int64)
+        self.assertEqual(day["ask_volume"].dtype, np.float32)
+        self.assertEqual(day["bid"].tolist(), [152080, 152090])
+        self.assertEqual(day["ask"].tolist(), [152100, 152110])
+
+    def test_prices_round_as_to_pipettes(self):
+        prices = ["1.000015", "1.000025", "1.0000151", "1.23456", "1.5"]
+        path = os.path.join(self.csv_dir, "USDCHF_20150603.csv")
+        with open(path, "w") as f:
+            f.write("Time,Ask,Bid,AskVolume,BidVolume\n")
+            for price in prices:
+                f.write("03.06.2015 00:00:00.000,%s,%s,1.00,1.00\n" % (
+                    price, price
+                ))
+        day = read_tick_csv(path)
+        expected = [to_pipettes(price) for price in prices]
+        self.assertEqual(expected, [100001, 100002, 100002, 123456, 150000])
+        self.assertEqual(day["bid"].tolist(), expected)
+        self.assertEqual(day["ask"].tolist(), expected)
+
+    def test_ingest_skips_existing_days(self):
+        ingest_csv_dir(self.csv_dir, self.store_dir)
+        self.assertEqual(ingest_csv_dir(self.csv_dir, self.store_dir), [])
+        self.assertEqual(
+            len(ingest_csv_dir(self.csv_dir, self.store_dir, overwrite=True)),
+            4
+        )
+
+    def test_price_handler_matches_csv(self):
+        ingest_csv_dir(self.csv_dir, self.store_dir)
+        pairs = ["GBPUSD", "EURUSD"]
+        csv_ph = HistoricCSVPriceHandler()
+        csv_ph.initialize(pairs, self.csv_dir)
+        store_ph = HistoricTickStorePriceHandler()
+        store_ph.initialize(pairs, self.store_dir)
+        for i in range(6):
+            csv_tick = csv_ph.run()
+            store_tick = store_ph.run()
+            self.assertEqual(str(store_tick), str(csv_tick))
+            self.assertEqual(store_tick.bid, csv_tick.bid)
+            self.assertEqual(store_tick.ask, csv_tick.ask)
+        self.assertEqual(
+            store_ph.prices["USDEUR"]["bid"], csv_ph.prices["USDEUR"]["bid"]
+        )
+        self.assertEqual(store_ph.run(), None)
+        self.assertFalse(store_ph.continue_backtest)
+        self.assertEqual(store_ph.prices["EURUSD"]["ask"], Decimal("1.10000"))
+
+
+if __name__ == "__main__":
+    unittest.main()
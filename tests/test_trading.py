@@ -0,0 +1,121 @@
+from decimal import Decimal
+import os
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from qsforex.library.event_loop import EventLoopStatistics
+from qsforex.library.events import OrderEvent, SignalEvent, TickEvent
+from qsforex.library.price_handlers import perf_counter
+from qsforex.trading.trading import trade
+
+
+class SignalEveryTick(object):
+
+    def __init__(self, events):
+        self.events = events
+
+    def calculate_signals(self, event):
+        self.events.put(SignalEvent(
+            event.instrument, "market", "buy", event.time, event.received
+        ))
+
+
+class OrderEverySignal(object):
+
+    def __init__(self, events):
+        self.events = events
+
+    def update_portfolio(self, event):
+        pass
+
+    def execute_signal(self, event):
+        self.events.put(OrderEvent(
+            event.instrument, 1000, "market", "buy", event.received
+        ))
+
+
+class RecordingExecution(object):
+
+    def __init__(self):
+        self.orders = []
+        self.sent = threading.Event()
+
+    def execute_order(self, event):
+        self.orders.append(event)
+        self.sent.set()
+
+
+class TestTradingLoop(unittest.TestCase):
+
+    def setUp(self):
+        self.events = queue.Queue()
+        self.stop = threading.Event()
+        self.execution = RecordingExecution()
+        self.result = []
+        self.stats = EventLoopStatistics()
+        self.output_dir = tempfile.mkdtemp()
+        self.thread = threading.Thread(target=lambda: self.result.append(
+            trade(
+                self.events, SignalEveryTick(self.events),
+                OrderEverySignal(self.events), self.execution,
+                timeout=0.05, stop=self.stop, stats=self.stats,
+                output_dir=self.output_dir
+            )
+        ))
+        self.thread.start()
+
+    def tearDown(self):
+        self.stop.set()
+        self.thread.join(5)
+        shutil.rmtree(self.output_dir)
+
+    def test_orders_and_latency(self):
+        for i in range(3):
+            self.execution.sent.clear()
+            self.events.put(TickEvent(
+                "GBPUSD", i, Decimal("1.50000"), Decimal("1.50020"),
+                perf_counter()
+            ))
+            self.assertTrue(self.execution.sent.wait(5))
+        self.stop.set()
+        self.thread.join(5)
+        self.assertFalse(self.thread.is_alive())
+        self.assertEqual(len(self.execution.orders), 3)
+        summary = self.result[0].summary()
+        self.assertEqual(summary["count"], 3)
+        self.assertTrue(0 < summary["max"] < 5)
+
+    def test_handler_statistics(self):
+        self.events.put(TickEvent(
+            "GBPUSD", 0, Decimal("1.50000"), Decimal("1.50020"),
+            perf_counter()
+        ))
+        self.assertTrue(self.execution.sent.wait(5))
+        self.stop.set()
+        self.thread.join(5)
+        self.assertFalse(self.thread.is_alive())
+        frame = self.stats.to_dataframe()
+        counts = dict(zip(frame["handler"], frame["count"]))
+        self.assertEqual(counts["execution.execute_order"], 1)
+        self.assertTrue(os.path.exists(
+            os.path.join(self.output_dir, "handler_stats.csv")
+        ))
+
+    def test_idle_loop_does_not_spin(self):
+        start = time.process_time()
+        time.sleep(0.5)
+        self.assertLess(time.process_time() - start, 0.1)
+        self.stop.set()
+        self.thread.join(5)
+        self.assertFalse(self.thread.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,38 +10,95 @@ import threading
 import time
 
 from qsforex.execution.execution import OANDAExecutionHandler
+from qsforex.library.event_loop import EventLoop, OrderLatency
+from qsforex.library.events import OrderEvent, SignalEvent, TickEvent
 from qsforex.portfolio.portfolio import Portfolio
 from qsforex import settings
 from qsforex.strategy.strategy import TestStrategy
-from qsforex.data.streaming import StreamingForexPrices
+from qsforex.library.streaming import AsyncStreamingForexPrices
 
 
-def trade(events, strategy, portfolio, execution, heartbeat):
+logger = logging.getLogger('qsforex.trading.trading')
+
+
+def log_event(event):
+    logger.info("Received new %s event: %s", event.type.lower(), event)
+
+
+def trade(
+    events, strategy, portfolio, execution, heartbeat=None,
+    timeout=1.0, stop=None, latency_every=60.0, stats=None,
+    output_dir=settings.OUTPUT_RESULTS_DIR
+):
     """
-    Carries out an infinite while loop that polls the 
-    events queue and directs each event to either the
-    strategy component of the execution handler. The
-    loop will then pause for "heartbeat" seconds and
-    continue.
+    Carries out an infinite loop that waits on the events
+    queue and directs each event to either the strategy
+    component of the execution handler as soon as it arrives.
+    Once stop (a threading.Event) has been set the loop ends as
+    soon as the queue is empty. Whenever the queue has been empty
+    for timeout seconds the loop checks stop and, every
+    latency_every seconds, logs the latency from the
+    receipt of a tick to the resulting orders having been sent.
+
+    heartbeat is no longer used, the loop does not poll.
+
+    If stats (an EventLoopStatistics) is given the event handlers
+    are timed, and at the end of the session the statistics are
+    logged and written to output_dir.
+
+    Returns the OrderLatency of the session.
     """
-    while True:
-        try:
-            event = events.get(False)
-        except queue.Empty:
-            pass
-        else:
-            if event is not None:
-                if event.type == 'TICK':
-                    logger.info("Received new tick event: %s", event)
-                    strategy.calculate_signals(event)
-                    portfolio.update_portfolio(event)
-                elif event.type == 'SIGNAL':
-                    logger.info("Received new signal event: %s", event)
-                    portfolio.execute_signal(event)
-                elif event.type == 'ORDER':
-                    logger.info("Received new order event: %s", event)
-                    execution.execute_order(event)
-        time.sleep(heartbeat)
+    loop = EventLoop(events, stats=stats)
+    for event_class in (TickEvent, SignalEvent, OrderEvent):
+        loop.register(event_class, log_event, "log_event")
+    loop.register(
+        TickEvent, strategy.calculate_signals, "strategy.calculate_signals"
+    )
+    loop.register(
+        TickEvent, portfolio.update_portfolio, "portfolio.update_portfolio"
+    )
+    loop.register(
+        SignalEvent, portfolio.execute_signal, "portfolio.execute_signal"
+    )
+    loop.register(
+        OrderEvent, execution.execute_order, "execution.execute_order"
+    )
+    latency = OrderLatency()
+    latency.register(loop)
+
+    last_report = [time.time()]
+
+    def housekeeping():
+        if time.time() - last_report[0] >= latency_every:
+            log_latency(latency)
+            last_report[0] = time.time()
+
+    try:
+        loop.run(
+            idle=housekeeping, block=True, timeout=timeout,
+            until=None if stop is None else (
+                lambda: not (stop.is_set() and events.empty())
+            )
+        )
+    finally:
+        log_latency(latency)
+        if stats is not None:
+            logger.info(
+                "Event handler statistics:\n%s",
+                stats.to_dataframe().to_string(index=False)
+            )
+            stats.to_csv(output_dir)
+    return latency
+
+
+def log_latency(latency):
+    summary = latency.summary()
+    if summary["count"]:
+        logger.info(
+            "Tick to order latency over %(count)d orders: "
+            "mean %(mean)0.6fs, median %(p50)0.6fs, "
+            "99%% %(p99)0.6fs, max %(max)0.6fs", summary
+        )
 
 
 if __name__ == "__main__":
@@ -52,7 +109,7 @@ if __name__ == "__main__":
     # Set the number of decimal places to 2
     getcontext().prec = 2
 
-    heartbeat = 0.0  # Time in seconds between polling
+    heartbeat = 0.0  # Unused, the trading loop blocks on the queue
     events = queue.Queue()
     equity = settings.EQUITY
 
@@ -61,7 +118,8 @@ if __name__ == "__main__":
 
     # Create the OANDA market price streaming class
     # making sure to provide authentication commands
-    prices = StreamingForexPrices(
+    prices = AsyncStreamingForexPrices()
+    prices.initialize(
         settings.STREAM_DOMAIN, settings.ACCESS_TOKEN,
         settings.ACCOUNT_ID, pairs
     )